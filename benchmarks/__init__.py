@@ -0,0 +1,8 @@
+# benchmarks/__init__.py
+"""
+Benchmarks de charge de l'API GeODOC
+
+    python -m benchmarks generate --database-url postgresql://.../odocc_bench --scale small
+    python -m benchmarks run --base-url http://localhost:8000 --output results.json
+    python -m benchmarks compare baseline.json results.json
+"""
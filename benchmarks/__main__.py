@@ -0,0 +1,130 @@
+# benchmarks/__main__.py
+"""Point d'entrée : python -m benchmarks {generate,run,compare}"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.datagen import SCALES, DataGenerator, load
+from benchmarks.scenarios import SCENARIOS, ScenarioContext, run_scenario, compare
+
+DEFAULT_MANIFEST = os.path.join("benchmarks", "manifest.json")
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def cmd_generate(args):
+    database_url = args.database_url or os.getenv("BENCH_DATABASE_URL")
+    if not database_url:
+        sys.exit("❌ --database-url ou BENCH_DATABASE_URL requis (jamais la base de production)")
+    if "bench" not in database_url.rsplit("/", 1)[-1] and not args.force:
+        sys.exit("❌ Le nom de la base doit contenir 'bench' (ou utiliser --force)")
+
+    generator = DataGenerator(args.scale, seed=args.seed, imports=args.imports, files_per_import=args.files_per_import)
+    print(f"📦 Génération {args.scale}: {generator.counts}")
+    manifest = load(database_url, generator, args.upload_dir, truncate=args.truncate)
+
+    with open(args.manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"✅ Données chargées, manifest: {args.manifest}")
+
+def cmd_run(args):
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"❌ Scénarios inconnus: {', '.join(unknown)}")
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": manifest.get("seed"),
+            "counts": manifest.get("counts"),
+            "python": platform.python_version(),
+        },
+        "scenarios": {}
+    }
+
+    for name in names:
+        print(f"▶ {name} ({args.concurrency} clients, {args.duration}s)", file=sys.stderr)
+        ctx = ScenarioContext(manifest, seed=args.seed)
+        results["scenarios"][name] = asyncio.run(run_scenario(
+            args.base_url, name, ctx,
+            concurrency=args.concurrency, duration=args.duration, warmup=args.warmup
+        ))
+        if results["scenarios"][name]["rate_limited"]:
+            print(
+                f"⚠ {name}: {results['scenarios'][name]['rate_limited']} réponses 429 "
+                f"(relever RATE_LIMIT_* ou RATE_LIMIT_ENABLED=False côté serveur)",
+                file=sys.stderr
+            )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+def cmd_compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    report = compare(baseline, current, metric=args.metric, tolerance=args.tolerance)
+    print(json.dumps(report, indent=2))
+    if any(r["regression"] for r in report):
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de l'API GeODOC")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Générer et charger le jeu de données synthétique")
+    gen.add_argument("--database-url", help="Base PostgreSQL locale dédiée (défaut: BENCH_DATABASE_URL)")
+    gen.add_argument("--scale", choices=list(SCALES), default="small")
+    gen.add_argument("--imports", type=int, help="Nombre de topo_imports (surcharge l'échelle)")
+    gen.add_argument("--files-per-import", type=float, default=1.5)
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--upload-dir", default=os.getenv("UPLOAD_DIR", "uploads/topo_staging"))
+    gen.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    gen.add_argument("--truncate", action="store_true", help="Vider les tables avant chargement")
+    gen.add_argument("--force", action="store_true")
+    gen.set_defaults(func=cmd_generate)
+
+    run = sub.add_parser("run", help="Exécuter les scénarios de charge")
+    run.add_argument("--base-url", default="http://localhost:8000")
+    run.add_argument("--scenarios", help=f"Liste séparée par des virgules ({','.join(SCENARIOS)})")
+    run.add_argument("--concurrency", type=int, default=10)
+    run.add_argument("--duration", type=float, default=30.0)
+    run.add_argument("--warmup", type=float, default=3.0)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    run.add_argument("--output", help="Fichier JSON de résultats")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="Comparer deux fichiers de résultats")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--metric", choices=["p50", "p95", "p99", "mean"], default="p95")
+    cmp_.add_argument("--tolerance", type=float, default=0.10, help="Régression tolérée (0.10 = +10%%)")
+    cmp_.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
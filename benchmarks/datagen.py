@@ -0,0 +1,291 @@
+# benchmarks/datagen.py
+"""Générateur reproductible de données synthétiques (chargement par COPY)"""
+import csv
+import io
+import json
+import os
+import random
+import uuid
+from datetime import date, datetime, timedelta
+
+# Volumes par échelle (topo_imports peut être surchargé en ligne de commande)
+SCALES = {
+    "tiny": {"districts": 5, "dossiers": 200, "proprietes": 2000, "demandeurs": 2000, "topo_users": 10, "imports": 10000},
+    "small": {"districts": 20, "dossiers": 2000, "proprietes": 50000, "demandeurs": 50000, "topo_users": 50, "imports": 200000},
+    "large": {"districts": 100, "dossiers": 20000, "proprietes": 500000, "demandeurs": 500000, "topo_users": 200, "imports": 3000000},
+}
+
+BENCH_PASSWORD = "benchmark-password"
+COMMUNES = ["Ambohidratrimo", "Antsirabe", "Fianarantsoa", "Toamasina", "Mahajanga", "Toliara", "Ambatolampy", "Moramanga"]
+NATURES = ["Urbaine", "Suburbaine", "Rurale"]
+VOCATIONS = ["Edilitaire", "Agricole", "Forestière", "Touristique"]
+OPERATIONS = ["morcellement", "immatriculation"]
+CATEGORIES = ["document", "plan", "photo"]
+BASE_DATE = datetime(2024, 1, 1)
+
+class _CopyBuffer(io.TextIOBase):
+    """Adaptateur fichier pour copy_expert à partir d'un générateur de lignes"""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._buffer = ""
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            self._writer.writerow(["\\N" if v is None else v for v in row])
+            self._buffer += self._out.getvalue()
+            self._out.seek(0)
+            self._out.truncate()
+        if size < 0:
+            chunk, self._buffer = self._buffer, ""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+def _copy(cursor, table: str, columns: list, rows) -> None:
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    cursor.copy_expert(sql, _CopyBuffer(iter(rows)), size=1 << 16)
+    cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}")
+
+def _cin(n: int) -> str:
+    return f"{101000000000 + n:012d}"
+
+def _lot(n: int) -> str:
+    return f"L{n:06d}"
+
+class DataGenerator:
+    """Jeu de données déterministe pour une graine et une échelle données"""
+
+    def __init__(self, scale: str = "small", seed: int = 42, imports: int = None, files_per_import: float = 1.5):
+        self.counts = dict(SCALES[scale])
+        if imports is not None:
+            self.counts["imports"] = imports
+        self.seed = seed
+        self.files_per_import = files_per_import
+
+    def _rng(self, name: str) -> random.Random:
+        # Un flux par table : l'ajout d'une table ne décale pas les autres
+        return random.Random(f"{self.seed}:{name}")
+
+    def districts(self):
+        for i in range(1, self.counts["districts"] + 1):
+            yield (i, f"District {i:03d}", 1 + i % 22)
+
+    def users(self):
+        # Un validateur GeODOC par district + un super_admin
+        password = self._password_hash()
+        yield (1, "Super Admin", "admin@bench.local", password, "super_admin", None, True, BASE_DATE)
+        for d in range(1, self.counts["districts"] + 1):
+            yield (d + 1, f"Validateur {d}", f"validateur{d}@bench.local", password, "user", d, True, BASE_DATE)
+
+    def topo_users(self):
+        rng = self._rng("topo_users")
+        password = self._password_hash()
+        districts = self.counts["districts"]
+        for i in range(1, self.counts["topo_users"] + 1):
+            allowed = sorted(rng.sample(range(1, districts + 1), k=min(3, districts)))
+            yield (i, f"bench_user_{i}", f"bench{i}@bench.local", f"Géomètre {i}", password,
+                   "operator", True, json.dumps(allowed), BASE_DATE, BASE_DATE)
+
+    def dossiers(self):
+        rng = self._rng("dossiers")
+        districts = self.counts["districts"]
+        for i in range(1, self.counts["dossiers"] + 1):
+            debut = (BASE_DATE + timedelta(days=rng.randint(0, 600))).date()
+            closed = debut + timedelta(days=90) if i % 10 == 0 else None
+            commune = rng.choice(COMMUNES)
+            created = BASE_DATE + timedelta(days=rng.randint(0, 600))
+            yield (i, f"Dossier {commune} {i}", 1000 + i, debut, debut + timedelta(days=15), "Rurale",
+                   commune, f"Fokontany {i % 97}", f"Circonscription {i % 13}",
+                   1 + (i - 1) % districts, 2 + (i - 1) % districts, closed, created, created)
+
+    def proprietes(self):
+        rng = self._rng("proprietes")
+        dossiers = self.counts["dossiers"]
+        for i in range(1, self.counts["proprietes"] + 1):
+            yield (i, _lot(i), f"T{i}" if rng.random() < 0.4 else None, f"Propriétaire {i}",
+                   rng.randint(100, 500000), rng.choice(NATURES), rng.choice(VOCATIONS),
+                   rng.choice(OPERATIONS), f"Situation {i}", rng.randint(1, dossiers), 2,
+                   BASE_DATE + timedelta(minutes=i))
+
+    def demandeurs(self):
+        rng = self._rng("demandeurs")
+        for i in range(1, self.counts["demandeurs"] + 1):
+            titre = rng.choice(["Monsieur", "Madame"])
+            naissance = date(1950, 1, 1) + timedelta(days=rng.randint(0, 20000))
+            yield (i, titre, f"NOM{i}", f"Prénom {i}", naissance, _cin(i),
+                   f"Lot {i} Antananarivo", f"034{i % 10000000:07d}", 2, BASE_DATE + timedelta(minutes=i))
+
+    def contenir(self):
+        rng = self._rng("contenir")
+        dossiers = self.counts["dossiers"]
+        for i in range(1, self.counts["demandeurs"] + 1):
+            yield (rng.randint(1, dossiers), i)
+
+    def _raw_propriete(self, rng, n):
+        return {"lot": _lot(n), "nature": rng.choice(NATURES), "vocation": rng.choice(VOCATIONS),
+                "type_operation": rng.choice(OPERATIONS), "proprietaire": f"Propriétaire {n}",
+                "contenance": rng.randint(100, 500000)}
+
+    def _raw_demandeur(self, rng, n):
+        return {"titre_demandeur": "Monsieur", "nom_demandeur": f"NOM{n}", "prenom_demandeur": f"Prénom {n}",
+                "date_naissance": "1985-03-20", "cin": _cin(n), "telephone": "0340123456"}
+
+    def topo_imports(self):
+        rng = self._rng("topo_imports")
+        c = self.counts
+        statuses = ["pending"] * 5 + ["validated"] * 3 + ["rejected"] * 2
+        for i in range(1, c["imports"] + 1):
+            dossier_id = rng.randint(1, c["dossiers"])
+            district_id = 1 + (dossier_id - 1) % c["districts"]
+            user_id = rng.randint(1, c["topo_users"])
+            imported = BASE_DATE + timedelta(seconds=i * 15)
+            if rng.random() < 0.5:
+                entity_type, n = "propriete", rng.randint(1, c["proprietes"] * 2)
+                raw = self._raw_propriete(rng, n)
+                matched = n if n <= c["proprietes"] else None
+                method = "exact_lot" if matched else None
+            else:
+                entity_type, n = "demandeur", rng.randint(1, c["demandeurs"] * 2)
+                raw = self._raw_demandeur(rng, n)
+                matched = n if n <= c["demandeurs"] else None
+                method = "exact_cin" if matched else None
+            status = rng.choice(statuses)
+            processed = imported + timedelta(days=1) if status != "pending" else None
+            warnings = json.dumps(["Vocation manquante (recommandée)"]) if rng.random() < 0.2 else None
+            yield (i, str(uuid.UUID(int=rng.getrandbits(128))), imported, user_id, f"Géomètre {user_id}",
+                   entity_type, "update" if matched else "create", dossier_id, district_id,
+                   json.dumps(raw, ensure_ascii=False), warnings is not None, warnings,
+                   matched, 1 if matched else None, method, status, processed,
+                   1 + district_id if processed else None,
+                   "Pièces justificatives incomplètes" if status == "rejected" else None, imported)
+
+    def topo_files(self, sample_path: str):
+        rng = self._rng("topo_files")
+        file_id = 0
+        for import_id in range(1, self.counts["imports"] + 1):
+            n = int(self.files_per_import) + (1 if rng.random() < self.files_per_import % 1 else 0)
+            for _ in range(n):
+                file_id += 1
+                stored = f"{uuid.UUID(int=rng.getrandbits(128)).hex}.pdf"
+                yield (file_id, import_id, f"scan_{file_id}.pdf", stored, sample_path, "application/pdf",
+                       rng.randint(50_000, 5_000_000), "pdf", rng.choice(CATEGORIES), None,
+                       f"{rng.getrandbits(256):064x}", BASE_DATE + timedelta(seconds=import_id * 15))
+
+    def import_date_range(self) -> tuple:
+        """(premier, dernier) import_date générés"""
+        return BASE_DATE + timedelta(seconds=15), BASE_DATE + timedelta(seconds=self.counts["imports"] * 15)
+
+    def manifest(self) -> dict:
+        return {
+            "seed": self.seed,
+            "counts": self.counts,
+            "password": BENCH_PASSWORD,
+            "topo_usernames": [f"bench_user_{i}" for i in range(1, self.counts["topo_users"] + 1)],
+            "communes": COMMUNES,
+            "numero_ouverture_range": [1001, 1000 + self.counts["dossiers"]],
+            "open_dossier_ids_sample": [i for i in range(1, min(self.counts["dossiers"], 500) + 1) if i % 10 != 0],
+            "lot_range": [1, self.counts["proprietes"]],
+            "cin_range": [1, self.counts["demandeurs"]],
+        }
+
+    _hash_cache = None
+
+    def _password_hash(self) -> str:
+        # Un seul hash bcrypt pour tous les comptes (coûteux à calculer)
+        if DataGenerator._hash_cache is None:
+            import bcrypt
+            DataGenerator._hash_cache = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        return DataGenerator._hash_cache
+
+CONTENIR_DDL = """
+    CREATE TABLE IF NOT EXISTS contenir (
+        id SERIAL PRIMARY KEY,
+        id_dossier INTEGER REFERENCES dossiers(id),
+        id_demandeur INTEGER REFERENCES demandeurs(id)
+    )
+"""
+
+def _create_import_partitions(cursor, first: datetime, last: datetime):
+    """Partitions mensuelles de topo_imports (create_all ne crée que la table parente),
+    des données générées jusqu'à PARTITION_MONTHS_AHEAD mois après aujourd'hui"""
+    from utils.archive import IMPORTS_TABLE, PARTITION_MONTHS_AHEAD, _add_months
+
+    month = first.date().replace(day=1)
+    end = max(last.date().replace(day=1), _add_months(date.today().replace(day=1), PARTITION_MONTHS_AHEAD))
+    while month <= end:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{IMPORTS_TABLE}_{month:%Y_%m}" PARTITION OF {IMPORTS_TABLE} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+TABLES = ["topo_files", "topo_imports", "contenir", "proprietes", "demandeurs", "dossiers", "topo_users", "users", "districts"]
+
+def load(database_url: str, generator: DataGenerator, upload_dir: str, truncate: bool = False, log=print) -> dict:
+    """Créer le schéma et charger le jeu de données par COPY"""
+    os.environ.setdefault("DATABASE_URL", database_url)
+    from sqlalchemy import create_engine
+    from database import Base
+    import models  # noqa: F401 (enregistre les tables)
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+
+    sample_path = os.path.join(upload_dir, "bench", "sample.pdf")
+    os.makedirs(os.path.dirname(sample_path), exist_ok=True)
+    with open(sample_path, "wb") as f:
+        f.write(b"%PDF-1.4\n% benchmark sample\n%%EOF\n")
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(CONTENIR_DDL)
+        _create_import_partitions(cursor, *generator.import_date_range())
+        if truncate:
+            cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+
+        steps = [
+            ("districts", ["id", "nom_district", "id_region"], generator.districts()),
+            ("users", ["id", "name", "email", "password", "role", "id_district", "status", "created_at"], generator.users()),
+            ("topo_users", ["id", "username", "email", "full_name", "password_hash", "role", "is_active",
+                            "allowed_districts", "created_at", "updated_at"], generator.topo_users()),
+            ("dossiers", ["id", "nom_dossier", "numero_ouverture", "date_descente_debut", "date_descente_fin",
+                          "type_commune", "commune", "fokontany", "circonscription", "id_district", "id_user",
+                          "date_fermeture", "created_at", "updated_at"], generator.dossiers()),
+            ("proprietes", ["id", "lot", "titre", "proprietaire", "contenance", "nature", "vocation",
+                            "type_operation", "situation", "id_dossier", "id_user", "created_at"], generator.proprietes()),
+            ("demandeurs", ["id", "titre_demandeur", "nom_demandeur", "prenom_demandeur", "date_naissance", "cin",
+                            "domiciliation", "telephone", "id_user", "created_at"], generator.demandeurs()),
+            ("contenir", ["id_dossier", "id_demandeur"], generator.contenir()),
+            ("topo_imports", ["id", "batch_id", "import_date", "topo_user_id", "topo_user_name", "entity_type",
+                              "action_suggested", "target_dossier_id", "target_district_id", "raw_data",
+                              "has_warnings", "warnings", "matched_entity_id", "match_confidence", "match_method",
+                              "status", "processed_at", "processed_by", "rejection_reason", "created_at"],
+             generator.topo_imports()),
+            ("topo_files", ["id", "import_id", "original_name", "stored_name", "storage_path", "mime_type",
+                            "file_size", "file_extension", "category", "description", "file_hash", "uploaded_at"],
+             generator.topo_files(sample_path)),
+        ]
+
+        for table, columns, rows in steps:
+            log(f"COPY {table} ...")
+            _copy(cursor, table, columns, rows)
+            raw.commit()
+
+        cursor.execute("ANALYZE")
+        raw.commit()
+    finally:
+        raw.close()
+        engine.dispose()
+
+    return generator.manifest()
@@ -0,0 +1,186 @@
+# benchmarks/scenarios.py
+"""Scénarios de charge HTTP (httpx) et agrégation des latences"""
+import asyncio
+import json
+import math
+import random
+import time
+
+API = "/api/v1"
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Percentile par rang le plus proche"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class ScenarioContext:
+    """Données partagées par les scénarios (manifest du générateur, tokens)"""
+
+    def __init__(self, manifest: dict, seed: int = 0):
+        self.manifest = manifest
+        self.rng = random.Random(seed)
+        self.tokens = {}
+
+    async def token(self, client, username: str = None) -> str:
+        username = username or self.manifest["topo_usernames"][0]
+        if username not in self.tokens:
+            response = await client.post(f"{API}/auth/login", json={
+                "username": username, "password": self.manifest["password"]
+            })
+            response.raise_for_status()
+            self.tokens[username] = response.json()["access_token"]
+        return self.tokens[username]
+
+    async def login_all(self, client):
+        """Ouvrir une session par utilisateur généré (hors mesure)"""
+        await asyncio.gather(*(self.token(client, username) for username in self.manifest["topo_usernames"]))
+
+    async def headers(self, client) -> dict:
+        """Jeton d'un utilisateur tiré au hasard : la charge est répartie sur les budgets
+        de débit par utilisateur (utils/rate_limit.py) au lieu d'en épuiser un seul"""
+        username = self.rng.choice(self.manifest["topo_usernames"])
+        return {"Authorization": f"Bearer {await self.token(client, username)}"}
+
+# ============================================
+# SCÉNARIOS
+# ============================================
+
+async def scenario_login(client, ctx: ScenarioContext):
+    username = ctx.rng.choice(ctx.manifest["topo_usernames"])
+    return await client.post(f"{API}/auth/login", json={
+        "username": username, "password": ctx.manifest["password"]
+    })
+
+async def scenario_sync(client, ctx: ScenarioContext):
+    n = ctx.rng.randint(*ctx.manifest["lot_range"])
+    data = {
+        "entity_type": "propriete",
+        "action_suggested": "create",
+        "target_dossier_id": ctx.rng.choice(ctx.manifest["open_dossier_ids_sample"]),
+        "entity_data": {
+            "lot": f"L{n:06d}", "nature": "Urbaine", "vocation": "Edilitaire",
+            "type_operation": "immatriculation", "proprietaire": f"Propriétaire {n}"
+        }
+    }
+    files = [("files", ("plan.pdf", b"%PDF-1.4\n" + bytes(20000), "application/pdf"))]
+    return await client.post(
+        f"{API}/topo-sync/", data={"data": json.dumps(data)}, files=files,
+        headers=await ctx.headers(client)
+    )
+
+async def scenario_staging_list(client, ctx: ScenarioContext):
+    return await client.get(f"{API}/staging/", params={
+        "status": "pending", "limit": 50, "offset": ctx.rng.randint(0, 20) * 50
+    }, headers=await ctx.headers(client))
+
+async def scenario_staging_summary(client, ctx: ScenarioContext):
+    return await client.get(f"{API}/staging/", params={
+        "status": "pending", "limit": 200, "view": "summary"
+    }, headers=await ctx.headers(client))
+
+async def scenario_stats(client, ctx: ScenarioContext):
+    return await client.get(f"{API}/staging/stats", headers=await ctx.headers(client))
+
+async def scenario_search(client, ctx: ScenarioContext):
+    if ctx.rng.random() < 0.5:
+        q = str(ctx.rng.randint(*ctx.manifest["numero_ouverture_range"]))
+    else:
+        q = ctx.rng.choice(ctx.manifest["communes"])[:5]
+    return await client.get(f"{API}/dossiers/search", params={"q": q, "limit": 20},
+                            headers=await ctx.headers(client))
+
+SCENARIOS = {
+    "login": scenario_login,
+    "sync": scenario_sync,
+    "staging_list": scenario_staging_list,
+    "staging_summary": scenario_staging_summary,
+    "stats": scenario_stats,
+    "search": scenario_search,
+}
+
+# ============================================
+# EXÉCUTION
+# ============================================
+
+async def run_scenario(base_url: str, name: str, ctx: ScenarioContext, concurrency: int = 10,
+                       duration: float = 30.0, warmup: float = 3.0, timeout: float = 30.0) -> dict:
+    """Exécuter un scénario en boucle fermée et retourner ses statistiques"""
+    import httpx
+
+    scenario = SCENARIOS[name]
+    latencies = []
+    status_codes = {}
+    errors = 0
+    rate_limited = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await ctx.login_all(client)
+
+        async def worker(deadline: float, record: bool):
+            nonlocal errors, rate_limited
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await scenario(client, ctx)
+                    status = response.status_code
+                except Exception:
+                    status = "exception"
+                elapsed = time.perf_counter() - start
+                if not record:
+                    continue
+                status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+                # 429 : budget de débit épuisé, compté à part (ni erreur ni latence mesurée)
+                if status == 429:
+                    rate_limited += 1
+                    continue
+                latencies.append(elapsed)
+                if status == "exception" or status >= 400:
+                    errors += 1
+
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rate_limited": rate_limited,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "status_codes": status_codes,
+    }
+
+def compare(baseline: dict, current: dict, metric: str = "p95", tolerance: float = 0.10) -> list:
+    """Comparer deux résultats : liste des scénarios en régression"""
+    regressions = []
+    for name, result in current.get("scenarios", {}).items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        old, new = before["latency_ms"][metric], result["latency_ms"][metric]
+        change = (new - old) / old if old else 0.0
+        regressions.append({
+            "scenario": name,
+            "metric": metric,
+            "baseline_ms": old,
+            "current_ms": new,
+            "change": round(change, 4),
+            "regression": change > tolerance,
+        })
+    return regressions
@@ -1,20 +1,103 @@
 # database.py
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, exc, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from dotenv import load_dotenv
+import logging
 import os
+import time
+
+from utils.metrics import DB_POOL_WAIT, DB_POOL_TIMEOUTS, DB_POOL_PINGS
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Connexion directe à PostgreSQL (hors PgBouncer) pour LISTEN et verrous consultatifs
+DATABASE_DIRECT_URL = os.getenv("DATABASE_DIRECT_URL") or DATABASE_URL
+
+# ============================================
+# CONFIGURATION DU POOL
+# ============================================
+
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue")  # queue | null (PgBouncer en mode transaction)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Ping au checkout seulement si la connexion est restée inactive plus longtemps (0 = jamais)
+DB_PRE_PING_IDLE_SECONDS = float(os.getenv("DB_PRE_PING_IDLE_SECONDS", "30"))
+# Budget total de connexions réparti entre les workers (0 = pas de plafond)
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+if DB_MAX_CONNECTIONS:
+    _per_worker = max(1, DB_MAX_CONNECTIONS // max(API_WORKERS, 1))
+    DB_POOL_SIZE = min(DB_POOL_SIZE, _per_worker)
+    DB_MAX_OVERFLOW = max(0, min(DB_MAX_OVERFLOW, _per_worker - DB_POOL_SIZE))
+
+class TimedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente d'une connexion disponible"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+def _pool_options() -> dict:
+    if DB_POOL_MODE == "null":
+        # Le pooling est délégué à PgBouncer : une connexion par emprunt
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
 
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=False
+    pool_pre_ping=False,
+    echo=False,
+    **_pool_options()
+)
+
+@event.listens_for(engine, "checkin")
+def _mark_idle(dbapi_connection, connection_record):
+    connection_record.info["idle_since"] = time.monotonic()
+
+@event.listens_for(engine, "checkout")
+def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+    """Pre-ping uniquement des connexions restées inactives (évite un aller-retour par emprunt)"""
+    idle_since = connection_record.info.get("idle_since")
+    if not DB_PRE_PING_IDLE_SECONDS or idle_since is None:
+        return
+    if time.monotonic() - idle_since < DB_PRE_PING_IDLE_SECONDS:
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+        dbapi_connection.rollback()
+        DB_POOL_PINGS.inc(result="ok")
+    except Exception:
+        DB_POOL_PINGS.inc(result="stale")
+        # Le pool jette la connexion et en ouvre une nouvelle
+        raise exc.DisconnectionError()
+
+# Connexions de session (LISTEN, verrous consultatifs) : jamais via PgBouncer en mode transaction
+direct_engine = engine if DATABASE_DIRECT_URL == DATABASE_URL else create_engine(
+    DATABASE_DIRECT_URL, poolclass=NullPool, echo=False
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -32,8 +115,8 @@ def check_database_connection():
         with engine.connect() as conn:
             result = conn.execute(text("SELECT version()"))
             version = result.fetchone()[0]
-            print(f"✅ PostgreSQL connecté: {version}")
+            logger.info(f"PostgreSQL connecté: {version}")
             return True
     except Exception as e:
-        print(f"❌ Erreur connexion PostgreSQL: {e}")
-        return False
\ No newline at end of file
+        logger.error(f"Erreur connexion PostgreSQL: {e}")
+        return False
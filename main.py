@@ -1,5 +1,6 @@
 # main.py - Point d'entrée FastAPI (CORRIGÉ)
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -7,9 +8,19 @@ import os
 import atexit
 import logging
 
-from database import check_database_connection
-from routers import auth, dossiers, sync, staging
+from database import engine
+from routers import auth, dossiers, sync, staging, admin, changes
 from utils.cleanup import cleanup_old_imports
+from utils.archive import run_archival
+from utils.leader import leader, leader_only
+from utils.health import db_probe, readiness
+from utils.metrics import (
+    MetricsMiddleware, instrument_engine, render_metrics, start_metrics_writer, verify_metrics_access
+)
+from utils.slow_queries import instrument_slow_queries
+from utils.request_stats import RequestStatsMiddleware, instrument_request_stats
+from utils.profiler import RequestProfilerMiddleware
+from utils.audit import audit_log
 
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
@@ -45,8 +56,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id", "Idempotent-Replayed"],
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestStatsMiddleware)
+app.add_middleware(RequestProfilerMiddleware)
+
+# Durées SQL et statistiques du pool
+instrument_engine(engine)
+instrument_slow_queries(engine)
+instrument_request_stats(engine)
+
+# Mode multi-workers : état du worker écrit pour l'agrégation de /metrics
+start_metrics_writer()
+
 # ============================================
 # MONTER LES FICHIERS STATIQUES
 # ============================================
@@ -61,6 +85,8 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(dossiers.router, prefix="/api/v1/dossiers", tags=["Dossiers"])
 app.include_router(sync.router, prefix="/api/v1/topo-sync", tags=["Synchronisation"])
 app.include_router(staging.router, prefix="/api/v1/staging", tags=["Staging"])
+app.include_router(changes.router, prefix="/api/v1/changes", tags=["Synchronisation"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Administration"])
 
 # ============================================
 # ROUTES RACINE
@@ -76,27 +102,51 @@ def root():
             "auth": "/api/v1/auth",
             "sync": "/api/v1/topo-sync",
             "staging": "/api/v1/staging",
-            "dossiers": "/api/v1/dossiers"
+            "dossiers": "/api/v1/dossiers",
+            "changes": "/api/v1/changes"
         }
     }
 
 @app.get("/health")
 def health_check():
-    db_status = "connected" if check_database_connection() else "disconnected"
+    ready, detail = readiness(scheduler)
     return {
-        "status": "healthy" if db_status == "connected" else "degraded",
-        "database": db_status
+        "status": "healthy" if ready else "degraded",
+        "database": detail["database"]["status"]
     }
 
+@app.get("/health/live")
+def liveness():
+    """Le processus répond (aucun accès base ni disque)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """Prêt à recevoir du trafic : dernière sonde DB, pool, scheduler, disque"""
+    ready, detail = readiness(scheduler)
+    return JSONResponse(detail, status_code=200 if ready else 503)
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_access)])
+def metrics():
+    """Réservé aux adresses METRICS_ALLOWED_IPS ou au jeton METRICS_TOKEN"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ============================================
 # TÂCHES PLANIFIÉES
 # ============================================
 
+# Chaque worker a son scheduler, seul le leader élu exécute les tâches
+leader.start()
+db_probe.start()
+
 scheduler = BackgroundScheduler()
-scheduler.add_job(cleanup_old_imports, 'cron', hour=2)  # Tous les jours à 2h du matin
+scheduler.add_job(leader_only(cleanup_old_imports), 'cron', hour=2, id='cleanup_old_imports')  # Tous les jours à 2h du matin
+scheduler.add_job(leader_only(run_archival), 'cron', hour=3, id='run_archival')  # Partitions + archivage des imports traités
 scheduler.start()
 
 # Arrêter le scheduler lors de l'arrêt de l'app
 atexit.register(lambda: scheduler.shutdown())
+atexit.register(leader.stop)
+atexit.register(audit_log.stop)
 
 logger.info("✅ API FastAPI GeODOC démarrée avec succès")
\ No newline at end of file
@@ -0,0 +1,19 @@
+-- migrations/001_change_feed_indexes.sql
+-- Index du flux de changements (GET /api/v1/changes) : pagination par clé (horodatage, id)
+-- CONCURRENTLY : à exécuter hors transaction (psql -f)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_dossiers_change_feed
+    ON dossiers ((COALESCE(updated_at, created_at)), id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proprietes_change_feed
+    ON proprietes (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_demandeurs_change_feed
+    ON demandeurs (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_topo_imports_change_feed
+    ON topo_imports ((COALESCE(processed_at, import_date)), id);
+
+-- Filtre district des demandeurs (EXISTS sur contenir)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contenir_demandeur_dossier
+    ON contenir (id_demandeur, id_dossier);
@@ -0,0 +1,21 @@
+-- migrations/002_sync_idempotency.sql
+-- Réponses mémorisées des synchronisations rejouées (en-tête Idempotency-Key)
+
+CREATE TABLE IF NOT EXISTS topo_sync_idempotency (
+    id SERIAL PRIMARY KEY,
+    principal VARCHAR(50) NOT NULL,
+    idempotency_key VARCHAR(100) NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    import_id INTEGER,
+    response TEXT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_topo_sync_idempotency_key
+    ON topo_sync_idempotency (principal, idempotency_key);
+
+CREATE INDEX IF NOT EXISTS ix_topo_sync_idempotency_import_id
+    ON topo_sync_idempotency (import_id);
+
+CREATE INDEX IF NOT EXISTS ix_topo_sync_idempotency_created_at
+    ON topo_sync_idempotency (created_at);
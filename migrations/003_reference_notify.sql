@@ -0,0 +1,25 @@
+-- migrations/003_reference_notify.sql
+-- Invalidation du cache de référence de l'API (utils/ref_cache.py) :
+-- NOTIFY sur geodoc_ref_changes quand un dossier ou un district change
+
+CREATE OR REPLACE FUNCTION notify_geodoc_ref_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'geodoc_ref_changes',
+        json_build_object('table', TG_TABLE_NAME, 'id', OLD.id)::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_dossiers_ref_change ON dossiers;
+CREATE TRIGGER trg_dossiers_ref_change
+    AFTER UPDATE OF id_district, date_fermeture, nom_dossier, numero_ouverture OR DELETE
+    ON dossiers
+    FOR EACH ROW EXECUTE FUNCTION notify_geodoc_ref_change();
+
+DROP TRIGGER IF EXISTS trg_districts_ref_change ON districts;
+CREATE TRIGGER trg_districts_ref_change
+    AFTER UPDATE OF nom_district OR DELETE
+    ON districts
+    FOR EACH ROW EXECUTE FUNCTION notify_geodoc_ref_change();
@@ -0,0 +1,78 @@
+-- migrations/004_partition_topo_imports.sql
+-- topo_imports partitionnée par mois sur import_date + table d'archive des imports traités
+-- À exécuter en maintenance (réécrit la table). Les partitions suivantes sont créées
+-- par l'API (utils/archive.py : ensure_partitions), la partition DEFAULT doit rester vide.
+
+BEGIN;
+
+ALTER TABLE topo_imports RENAME TO topo_imports_legacy;
+ALTER INDEX IF EXISTS topo_imports_pkey RENAME TO topo_imports_legacy_pkey;
+
+-- La clé de partition doit faire partie de toute contrainte d'unicité :
+-- la clé étrangère topo_files.import_id ne peut plus être déclarée
+ALTER TABLE topo_files DROP CONSTRAINT IF EXISTS topo_files_import_id_fkey;
+
+UPDATE topo_imports_legacy SET import_date = COALESCE(created_at, NOW()) WHERE import_date IS NULL;
+
+CREATE TABLE topo_imports (
+    LIKE topo_imports_legacy INCLUDING DEFAULTS,
+    PRIMARY KEY (id, import_date)
+) PARTITION BY RANGE (import_date);
+
+ALTER TABLE topo_imports ALTER COLUMN import_date SET NOT NULL;
+ALTER TABLE topo_imports ALTER COLUMN import_date SET DEFAULT NOW();
+ALTER SEQUENCE topo_imports_id_seq OWNED BY topo_imports.id;
+
+ALTER TABLE topo_imports
+    ADD FOREIGN KEY (target_dossier_id) REFERENCES dossiers (id),
+    ADD FOREIGN KEY (target_district_id) REFERENCES districts (id),
+    ADD FOREIGN KEY (processed_by) REFERENCES users (id);
+
+-- Partitions mensuelles : du plus ancien import jusqu'à trois mois après aujourd'hui
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := date_trunc('month', NOW() + INTERVAL '3 months')::date;
+BEGIN
+    SELECT date_trunc('month', COALESCE(MIN(import_date), NOW()))::date
+    INTO month_start FROM topo_imports_legacy;
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF topo_imports FOR VALUES FROM (%L) TO (%L)',
+            'topo_imports_' || to_char(month_start, 'YYYY_MM'),
+            month_start, (month_start + INTERVAL '1 month')::date
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+CREATE TABLE IF NOT EXISTS topo_imports_default PARTITION OF topo_imports DEFAULT;
+
+INSERT INTO topo_imports SELECT * FROM topo_imports_legacy;
+DROP TABLE topo_imports_legacy;
+
+CREATE INDEX IF NOT EXISTS ix_topo_imports_id ON topo_imports (id);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_batch_id ON topo_imports (batch_id);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_topo_user_id ON topo_imports (topo_user_id);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_target_dossier_id ON topo_imports (target_dossier_id);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_target_district_id ON topo_imports (target_district_id);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_status ON topo_imports (status);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_import_date_brin ON topo_imports USING BRIN (import_date);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_change_feed
+    ON topo_imports ((COALESCE(processed_at, import_date)), id);
+
+-- Archive des imports traités (déplacés par utils/archive.py)
+CREATE TABLE IF NOT EXISTS topo_imports_archive (
+    LIKE topo_imports INCLUDING DEFAULTS,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_topo_imports_archive_target_district_id
+    ON topo_imports_archive (target_district_id);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_archive_status ON topo_imports_archive (status);
+CREATE INDEX IF NOT EXISTS ix_topo_imports_archive_import_date_brin
+    ON topo_imports_archive USING BRIN (import_date);
+
+COMMIT;
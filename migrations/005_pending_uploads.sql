@@ -0,0 +1,10 @@
+-- migrations/005_pending_uploads.sql
+-- Fichiers pré-uploadés (POST /topo-sync/files) puis référencés par file_ids.
+-- Tant qu'ils ne sont pas rattachés, import_id est NULL ; la rétention les purge
+-- après CLEANUP_ORPHAN_GRACE_HOURS.
+
+ALTER TABLE topo_files ADD COLUMN IF NOT EXISTS uploaded_by VARCHAR(50);
+
+CREATE INDEX IF NOT EXISTS ix_topo_files_pending
+    ON topo_files (uploaded_by)
+    WHERE import_id IS NULL;
@@ -0,0 +1,11 @@
+-- migrations/006_import_leases.sql
+-- Baux de revue : un validateur réserve des imports en attente (POST /staging/claim)
+-- pour une durée limitée ; un bail expiré rend l'import à nouveau disponible.
+
+ALTER TABLE topo_imports ADD COLUMN IF NOT EXISTS claimed_by INTEGER REFERENCES users(id);
+ALTER TABLE topo_imports ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP;
+
+-- File d'attente par district : seuls les imports en attente sont indexés
+CREATE INDEX IF NOT EXISTS ix_topo_imports_pending_queue
+    ON topo_imports (target_district_id, import_date, id)
+    WHERE status = 'pending';
@@ -0,0 +1,32 @@
+-- migrations/007_audit_events.sql
+-- Journal d'audit des imports (consultation, téléchargement, validation, création).
+-- Écrit par lots par l'API (utils/audit.py) ; ajout seul : les UPDATE sont refusés.
+
+CREATE TABLE IF NOT EXISTS topo_audit_events (
+    id BIGSERIAL PRIMARY KEY,
+    occurred_at TIMESTAMPTZ NOT NULL,
+    event_type VARCHAR(40) NOT NULL,
+    import_id INTEGER,
+    district_id INTEGER,
+    actor VARCHAR(50),
+    actor_name VARCHAR(150),
+    details TEXT,
+    recorded_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_topo_audit_events_import
+    ON topo_audit_events (import_id, occurred_at);
+
+CREATE INDEX IF NOT EXISTS ix_topo_audit_events_occurred_brin
+    ON topo_audit_events USING brin (occurred_at);
+
+CREATE OR REPLACE FUNCTION reject_audit_event_update() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'topo_audit_events est en ajout seul';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_topo_audit_events_append_only ON topo_audit_events;
+CREATE TRIGGER trg_topo_audit_events_append_only
+    BEFORE UPDATE ON topo_audit_events
+    FOR EACH ROW EXECUTE FUNCTION reject_audit_event_update();
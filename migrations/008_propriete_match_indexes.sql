@@ -0,0 +1,24 @@
+-- migrations/008_propriete_match_indexes.sql
+-- Matching des propriétés à la synchronisation (routers/sync.py) : lot, titre et
+-- numéro de réquisition normalisés (majuscules, sans espaces ni ponctuation),
+-- chacun servi par son propre index d'expression par dossier.
+-- CONCURRENTLY : à exécuter hors transaction (psql -f)
+
+CREATE OR REPLACE FUNCTION topo_normalize_ref(value TEXT) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT NULLIF(UPPER(regexp_replace(value, '[^[:alnum:]]', '', 'g')), '')
+$$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proprietes_match_lot
+    ON proprietes (id_dossier, topo_normalize_ref(lot)) INCLUDE (id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proprietes_match_titre
+    ON proprietes (id_dossier, topo_normalize_ref(titre)) INCLUDE (id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proprietes_match_requisition
+    ON proprietes (id_dossier, topo_normalize_ref(numero_requisition)) INCLUDE (id);
+
+-- Confiance combinée fractionnaire (0..1) au lieu d'un entier
+ALTER TABLE topo_imports ALTER COLUMN match_confidence TYPE REAL;
+ALTER TABLE topo_imports_archive ALTER COLUMN match_confidence TYPE REAL;
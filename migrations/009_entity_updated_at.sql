@@ -0,0 +1,24 @@
+-- migrations/009_entity_updated_at.sql
+-- Horodatage de modification des propriétés et demandeurs, tenu par trigger
+-- (GeODOC écrit directement dans ces tables) : la version des instantanés
+-- hors-ligne (utils/snapshots.py) change aussi quand une fiche existante est modifiée
+
+ALTER TABLE proprietes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE demandeurs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_proprietes_touch ON proprietes;
+CREATE TRIGGER trg_proprietes_touch
+    BEFORE UPDATE ON proprietes
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS trg_demandeurs_touch ON demandeurs;
+CREATE TRIGGER trg_demandeurs_touch
+    BEFORE UPDATE ON demandeurs
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
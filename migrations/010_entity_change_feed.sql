@@ -0,0 +1,34 @@
+-- migrations/010_entity_change_feed.sql
+-- Flux de changements (GET /api/v1/changes) : les propriétés et demandeurs modifiés
+-- reviennent dans le flux (clé COALESCE(updated_at, created_at), migrations/009).
+-- Un rattachement ou détachement dans contenir touche le demandeur concerné :
+-- il est renvoyé avec ses dossiers (dossier_ids).
+-- CONCURRENTLY : à exécuter hors transaction (psql -f)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_proprietes_change_feed_new
+    ON proprietes ((COALESCE(updated_at, created_at)), id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_proprietes_change_feed;
+ALTER INDEX ix_proprietes_change_feed_new RENAME TO ix_proprietes_change_feed;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_demandeurs_change_feed_new
+    ON demandeurs ((COALESCE(updated_at, created_at)), id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_demandeurs_change_feed;
+ALTER INDEX ix_demandeurs_change_feed_new RENAME TO ix_demandeurs_change_feed;
+
+CREATE OR REPLACE FUNCTION touch_contenir_demandeur() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        UPDATE demandeurs SET updated_at = NOW() WHERE id = OLD.id_demandeur;
+    END IF;
+    IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.id_demandeur <> OLD.id_demandeur) THEN
+        UPDATE demandeurs SET updated_at = NOW() WHERE id = NEW.id_demandeur;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_contenir_touch_demandeur ON contenir;
+CREATE TRIGGER trg_contenir_touch_demandeur
+    AFTER INSERT OR UPDATE OF id_demandeur, id_dossier OR DELETE
+    ON contenir
+    FOR EACH ROW EXECUTE FUNCTION touch_contenir_demandeur();
@@ -0,0 +1,64 @@
+-- migrations/011_snapshot_notify.sql
+-- Invalidation du cache des versions d'instantanés (utils/snapshots.py) :
+-- NOTIFY sur geodoc_snapshot_changes avec l'id du district dont les données
+-- hors-ligne changent. PostgreSQL fusionne les notifications identiques d'une
+-- même transaction : une écriture en masse ne produit qu'un message par district.
+
+CREATE OR REPLACE FUNCTION notify_snapshot_dossier(dossier_id INTEGER) RETURNS void AS $$
+DECLARE
+    district INTEGER;
+BEGIN
+    SELECT id_district INTO district FROM dossiers WHERE id = dossier_id;
+    IF district IS NOT NULL THEN
+        PERFORM pg_notify('geodoc_snapshot_changes', district::text);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_snapshot_change() RETURNS trigger AS $$
+DECLARE
+    linked RECORD;
+BEGIN
+    IF TG_TABLE_NAME = 'dossiers' THEN
+        IF TG_OP <> 'DELETE' AND NEW.id_district IS NOT NULL THEN
+            PERFORM pg_notify('geodoc_snapshot_changes', NEW.id_district::text);
+        END IF;
+        IF TG_OP <> 'INSERT' AND OLD.id_district IS NOT NULL THEN
+            PERFORM pg_notify('geodoc_snapshot_changes', OLD.id_district::text);
+        END IF;
+    ELSIF TG_TABLE_NAME IN ('proprietes', 'contenir') THEN
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM notify_snapshot_dossier(NEW.id_dossier);
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM notify_snapshot_dossier(OLD.id_dossier);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'demandeurs' THEN
+        FOR linked IN SELECT DISTINCT c.id_dossier FROM contenir c WHERE c.id_demandeur = OLD.id LOOP
+            PERFORM notify_snapshot_dossier(linked.id_dossier);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_dossiers_snapshot_change ON dossiers;
+CREATE TRIGGER trg_dossiers_snapshot_change
+    AFTER INSERT OR UPDATE OR DELETE ON dossiers
+    FOR EACH ROW EXECUTE FUNCTION notify_snapshot_change();
+
+DROP TRIGGER IF EXISTS trg_proprietes_snapshot_change ON proprietes;
+CREATE TRIGGER trg_proprietes_snapshot_change
+    AFTER INSERT OR UPDATE OR DELETE ON proprietes
+    FOR EACH ROW EXECUTE FUNCTION notify_snapshot_change();
+
+DROP TRIGGER IF EXISTS trg_contenir_snapshot_change ON contenir;
+CREATE TRIGGER trg_contenir_snapshot_change
+    AFTER INSERT OR UPDATE OR DELETE ON contenir
+    FOR EACH ROW EXECUTE FUNCTION notify_snapshot_change();
+
+-- Un nouveau demandeur n'apparaît dans un instantané qu'à son rattachement (contenir)
+DROP TRIGGER IF EXISTS trg_demandeurs_snapshot_change ON demandeurs;
+CREATE TRIGGER trg_demandeurs_snapshot_change
+    AFTER UPDATE OR DELETE ON demandeurs
+    FOR EACH ROW EXECUTE FUNCTION notify_snapshot_change();
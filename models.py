@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, Text, DateTime, BigInteger, Enum
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, Text, DateTime, BigInteger, REAL, Enum, Index, func, DDL, event
 from datetime import datetime
 from database import Base
 import enum
@@ -38,6 +38,11 @@ class Dossier(Base):
     date_fermeture = Column(Date, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Flux de changements (routers/changes.py)
+        Index("ix_dossiers_change_feed", func.coalesce(updated_at, created_at), id),
+    )
 
 class Propriete(Base):
     """Propriétés"""
@@ -52,9 +57,33 @@ class Propriete(Base):
     vocation = Column(String(50))
     type_operation = Column(String(50))
     situation = Column(Text)
+    numero_requisition = Column(String(50))
     id_dossier = Column(Integer, ForeignKey("dossiers.id"), index=True)
     id_user = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Tenu par trigger (migrations/009_entity_updated_at.sql)
+    updated_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_proprietes_change_feed", func.coalesce(updated_at, created_at), id),
+        # Matching normalisé (migrations/008_propriete_match_indexes.sql)
+        Index("ix_proprietes_match_lot", id_dossier, func.topo_normalize_ref(lot), postgresql_include=["id"]),
+        Index("ix_proprietes_match_titre", id_dossier, func.topo_normalize_ref(titre), postgresql_include=["id"]),
+        Index(
+            "ix_proprietes_match_requisition", id_dossier, func.topo_normalize_ref(numero_requisition),
+            postgresql_include=["id"]
+        ),
+    )
+
+# Fonction des index de matching (migrations/008_propriete_match_indexes.sql),
+# créée avant la table pour que create_all puisse poser les index
+event.listen(Propriete.__table__, "before_create", DDL("""
+    CREATE OR REPLACE FUNCTION topo_normalize_ref(value TEXT) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+        SELECT NULLIF(UPPER(regexp_replace(value, '[^[:alnum:]]', '', 'g')), '')
+    $$
+"""))
 
 class Demandeur(Base):
     """Demandeurs"""
@@ -70,6 +99,12 @@ class Demandeur(Base):
     telephone = Column(String(15))
     id_user = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Tenu par trigger (migrations/009_entity_updated_at.sql)
+    updated_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_demandeurs_change_feed", func.coalesce(updated_at, created_at), id),
+    )
 
 class ImportStatus(str, enum.Enum):
     PENDING = "pending"
@@ -78,12 +113,13 @@ class ImportStatus(str, enum.Enum):
     ERROR = "error"
 
 class TopoImport(Base):
-    """Imports TopoManager en attente"""
+    """Imports TopoManager en attente (partitionnée par mois sur import_date)"""
     __tablename__ = "topo_imports"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Clé primaire composite (partitionnement) : SERIAL explicite
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     batch_id = Column(String(36), index=True)
-    import_date = Column(DateTime, default=datetime.utcnow)
+    import_date = Column(DateTime, primary_key=True, default=datetime.utcnow)
     topo_user_id = Column(Integer, index=True)
     topo_user_name = Column(String(100))
     entity_type = Column(String(20))
@@ -94,20 +130,80 @@ class TopoImport(Base):
     has_warnings = Column(Boolean, default=False)
     warnings = Column(Text)  # JSON
     matched_entity_id = Column(Integer)
-    match_confidence = Column(Integer)
+    match_confidence = Column(REAL)
     match_method = Column(String(50))
     status = Column(String(20), default='pending', index=True)
     processed_at = Column(DateTime)
     processed_by = Column(Integer, ForeignKey("users.id"))
     rejection_reason = Column(Text)
+    # Bail de revue (POST /staging/claim) : validateur et échéance
+    claimed_by = Column(Integer, ForeignKey("users.id"))
+    claimed_until = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_topo_imports_change_feed", func.coalesce(processed_at, import_date), id),
+        Index("ix_topo_imports_import_date_brin", import_date, postgresql_using="brin"),
+        # File d'attente des validateurs (claim par district, plus anciens d'abord)
+        Index(
+            "ix_topo_imports_pending_queue", target_district_id, import_date, id,
+            postgresql_where=(status == "pending")
+        ),
+        {"postgresql_partition_by": "RANGE (import_date)"},
+    )
+
+class TopoImportArchive(Base):
+    """Imports traités archivés (déplacés par utils/archive.py)"""
+    __tablename__ = "topo_imports_archive"
+    
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String(36))
+    import_date = Column(DateTime, nullable=False)
+    topo_user_id = Column(Integer)
+    topo_user_name = Column(String(100))
+    entity_type = Column(String(20))
+    action_suggested = Column(String(20))
+    target_dossier_id = Column(Integer, index=True)
+    target_district_id = Column(Integer, index=True)
+    raw_data = Column(Text)  # JSON
+    has_warnings = Column(Boolean, default=False)
+    warnings = Column(Text)  # JSON
+    matched_entity_id = Column(Integer)
+    match_confidence = Column(REAL)
+    match_method = Column(String(50))
+    status = Column(String(20), index=True)
+    processed_at = Column(DateTime)
+    processed_by = Column(Integer)
+    rejection_reason = Column(Text)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_topo_imports_archive_import_date_brin", import_date, postgresql_using="brin"),
+    )
+
+class TopoSyncIdempotency(Base):
+    """Réponses mémorisées des synchronisations (Idempotency-Key)"""
+    __tablename__ = "topo_sync_idempotency"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    principal = Column(String(50), nullable=False)  # "topomanager:<id>" / "geodoc:<id>"
+    idempotency_key = Column(String(100), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    import_id = Column(Integer, index=True)
+    response = Column(Text)  # JSON TopoSyncResponse
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        Index("ux_topo_sync_idempotency_key", principal, idempotency_key, unique=True),
+    )
 
 class TopoFile(Base):
     """Fichiers liés aux imports"""
     __tablename__ = "topo_files"
     
     id = Column(Integer, primary_key=True, index=True)
-    import_id = Column(Integer, ForeignKey("topo_imports.id"), index=True)
+    import_id = Column(Integer, index=True)  # topo_imports ou topo_imports_archive (pas de FK : table partitionnée)
     original_name = Column(String(255))
     stored_name = Column(String(255), unique=True)
     storage_path = Column(String(500))
@@ -117,7 +213,12 @@ class TopoFile(Base):
     category = Column(String(20))
     description = Column(Text)
     file_hash = Column(String(64))
+    uploaded_by = Column(String(50))  # principal de l'appelant (pré-upload sans import)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_topo_files_pending", uploaded_by, postgresql_where=import_id.is_(None)),
+    )
 
 class District(Base):
     """Districts"""
@@ -138,4 +239,24 @@ class User(Base):
     role = Column(String(50), default='user')
     id_district = Column(Integer, ForeignKey("districts.id"))
     status = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TopoAuditEvent(Base):
+    """Journal d'audit des imports (ajout seul, écrit par lots par utils/audit.py)"""
+    __tablename__ = "topo_audit_events"
+    
+    id = Column(BigInteger, primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    event_type = Column(String(40), nullable=False)
+    import_id = Column(Integer)
+    district_id = Column(Integer)
+    actor = Column(String(50))  # principal : source:id
+    actor_name = Column(String(150))
+    details = Column(Text)  # JSON
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_topo_audit_events_import", import_id, occurred_at),
+        Index("ix_topo_audit_events_occurred_brin", occurred_at, postgresql_using="brin"),
+    )
+
@@ -0,0 +1,88 @@
+# routers/admin.py
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from utils.security import require_super_admin
+from utils.slow_queries import get_slow_queries, clear_slow_queries, SLOW_QUERY_MS
+from utils.profiler import profile_worker, get_stored_profile, PROFILER_MAX_SECONDS
+from utils.cleanup import cleanup_old_imports, get_last_report, RETENTION_POLICIES
+from utils.audit import audit_log, recent_events
+
+router = APIRouter()
+
+@router.get("/slow-queries")
+async def list_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    fingerprint: Optional[str] = Query(None, max_length=16),
+    current_user: dict = Depends(require_super_admin)
+):
+    """Journal des requêtes lentes (plus récentes d'abord) ; en multi-workers
+    (METRICS_MULTIPROC_DIR), entrées de tous les workers, champ "worker" = pid"""
+    entries = get_slow_queries(limit, fingerprint)
+    return {
+        "threshold_ms": SLOW_QUERY_MS,
+        "count": len(entries),
+        "entries": entries
+    }
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(
+    current_user: dict = Depends(require_super_admin)
+):
+    """Vider le journal des requêtes lentes (tous les workers en multi-workers)"""
+    return {"success": True, "cleared": clear_slow_queries()}
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_live_worker(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=100),
+    current_user: dict = Depends(require_super_admin)
+):
+    """Profil échantillonné du worker courant (piles repliées pour flame graph)"""
+    try:
+        # Le sommeil a lieu hors de la boucle : le worker continue de servir
+        return await run_in_threadpool(profile_worker, seconds, interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(
+    profile_id: str = Path(..., pattern=r'^[0-9a-f]{32}$'),
+    current_user: dict = Depends(require_super_admin)
+):
+    """Profil d'une requête exécutée avec l'en-tête X-Profile"""
+    collapsed = get_stored_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(404, "Profil introuvable")
+    return collapsed
+
+@router.get("/cleanup")
+async def get_cleanup_status(
+    current_user: dict = Depends(require_super_admin)
+):
+    """Politiques de rétention et bilan de la dernière passe (worker courant)"""
+    return {"policies": RETENTION_POLICIES, "last_report": get_last_report()}
+
+@router.post("/cleanup")
+async def run_cleanup(
+    force: bool = Query(False, description="Retirer toutes les lignes dont le fichier manque, sans plafond"),
+    current_user: dict = Depends(require_super_admin)
+):
+    """Lancer immédiatement une passe de rétention (une seule à la fois sur le cluster)"""
+    try:
+        return await run_in_threadpool(cleanup_old_imports, force)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+@router.get("/audit")
+async def list_audit_events(
+    import_id: Optional[int] = Query(None),
+    event_type: Optional[str] = Query(None, max_length=40),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: dict = Depends(require_super_admin)
+):
+    """Journal d'audit des imports (plus récents d'abord) et état de la file d'écriture"""
+    events = await run_in_threadpool(recent_events, import_id, event_type, limit)
+    return {"queue": audit_log.stats(), "count": len(events), "events": events}
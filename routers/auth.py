@@ -1,10 +1,11 @@
 # routers/auth.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 import json
 
 from database import get_db
+from utils.request_stats import timed
+from services import queries
 import auth
 import schemas
 
@@ -16,11 +17,7 @@ async def login_topo_user(
     db: Session = Depends(get_db)
 ):
     """Connexion utilisateur TopoManager"""
-    user = db.execute(text("""
-        SELECT id, username, email, full_name, password_hash, role, is_active, allowed_districts
-        FROM topo_users
-        WHERE username = :username
-    """), {"username": credentials.username}).first()
+    user = db.execute(queries.TOPO_USER_LOGIN, {"username": credentials.username}).first()
     
     if not user:
         raise HTTPException(401, "Identifiants incorrects")
@@ -28,7 +25,10 @@ async def login_topo_user(
     if not user.is_active:
         raise HTTPException(403, "Compte désactivé")
     
-    if not auth.verify_password(credentials.password, user.password_hash):
+    with timed("auth"):
+        password_ok = auth.verify_password(credentials.password, user.password_hash)
+    
+    if not password_ok:
         raise HTTPException(401, "Identifiants incorrects")
     
     token_data = {
@@ -39,11 +39,7 @@ async def login_topo_user(
     
     access_token = auth.create_access_token(token_data)
     
-    db.execute(text("""
-        UPDATE topo_users 
-        SET last_token_refresh = NOW()
-        WHERE id = :id
-    """), {"id": user.id})
+    db.execute(queries.TOPO_USER_TOUCH_TOKEN, {"id": user.id})
     db.commit()
     
     allowed_districts = None
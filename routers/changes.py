@@ -0,0 +1,146 @@
+# routers/changes.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+import base64
+import json
+import os
+
+from database import get_db
+from utils.security import verify_api_key_or_jwt, allowed_district_ids
+from utils.rate_limit import rate_limit, db_slot
+from services import queries
+
+router = APIRouter()
+
+# Marge de sécurité : les lignes plus récentes que NOW() - lag ne sont pas encore
+# servies (une transaction concurrente peut encore committer un horodatage antérieur)
+CHANGES_SAFETY_LAG_SECONDS = int(os.getenv("CHANGES_SAFETY_LAG_SECONDS", "5"))
+
+# Flux : (clé d'ordre, colonnes, FROM, filtre district)
+CHANGE_FEEDS = {
+    "dossiers": {
+        "key": "COALESCE(d.updated_at, d.created_at)",
+        "columns": """
+            d.id, d.nom_dossier, d.numero_ouverture, d.commune, d.fokontany,
+            d.circonscription, d.type_commune, d.id_district, d.date_descente_debut,
+            d.date_descente_fin, d.date_fermeture
+        """,
+        "from": "dossiers d",
+        "district": "d.id_district = ANY(:districts)",
+        "id": "d.id",
+    },
+    "proprietes": {
+        "key": "COALESCE(p.updated_at, p.created_at)",
+        "columns": """
+            p.id, p.id_dossier, p.lot, p.titre, p.proprietaire, p.contenance,
+            p.nature, p.vocation, p.type_operation, p.situation
+        """,
+        "from": "proprietes p",
+        "district": "EXISTS (SELECT 1 FROM dossiers d WHERE d.id = p.id_dossier AND d.id_district = ANY(:districts))",
+        "id": "p.id",
+    },
+    "demandeurs": {
+        # Rattachements contenir inclus : un (dé)rattachement touche le demandeur (migrations/010)
+        "key": "COALESCE(dm.updated_at, dm.created_at)",
+        "columns": """
+            dm.id, dm.titre_demandeur, dm.nom_demandeur, dm.prenom_demandeur,
+            dm.date_naissance, dm.cin, dm.domiciliation, dm.telephone,
+            ARRAY(
+                SELECT c.id_dossier FROM contenir c WHERE c.id_demandeur = dm.id ORDER BY c.id_dossier
+            ) AS dossier_ids
+        """,
+        "from": "demandeurs dm",
+        "district": """EXISTS (
+            SELECT 1 FROM contenir c JOIN dossiers d ON d.id = c.id_dossier
+            WHERE c.id_demandeur = dm.id AND d.id_district = ANY(:districts)
+        )""",
+        "id": "dm.id",
+    },
+    "imports": {
+        "key": "COALESCE(ti.processed_at, ti.import_date)",
+        "columns": """
+            ti.id, ti.batch_id, ti.entity_type, ti.target_dossier_id, ti.target_district_id,
+            ti.status, ti.matched_entity_id, ti.import_date, ti.processed_at, ti.rejection_reason
+        """,
+        "from": "topo_imports ti",
+        "district": "ti.target_district_id = ANY(:districts)",
+        "id": "ti.id",
+    },
+}
+
+def _encode_cursor(positions: dict) -> str:
+    raw = json.dumps(positions, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: Optional[str]) -> dict:
+    if not cursor:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        positions = json.loads(raw)
+        return {
+            name: (datetime.fromisoformat(ts), int(last_id))
+            for name, (ts, last_id) in positions.items()
+            if name in CHANGE_FEEDS
+        }
+    except Exception:
+        raise HTTPException(400, "Curseur invalide")
+
+def _serialize(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+@router.get("/", dependencies=[Depends(rate_limit("sync")), Depends(db_slot)])
+async def get_changes(
+    cursor: Optional[str] = Query(None, description="Curseur retourné par l'appel précédent"),
+    entities: Optional[str] = Query(None, description="Flux à inclure: dossiers,proprietes,demandeurs,imports"),
+    limit: int = Query(200, ge=1, le=1000),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Flux de changements incrémental (pagination par clé)"""
+
+    names = [n.strip() for n in entities.split(",")] if entities else list(CHANGE_FEEDS)
+    unknown = [n for n in names if n not in CHANGE_FEEDS]
+    if unknown:
+        raise HTTPException(422, f"Flux inconnus: {', '.join(unknown)}")
+
+    positions = _decode_cursor(cursor)
+    districts = allowed_district_ids(current_user)
+
+    changes = {}
+    has_more = False
+    for name in names:
+        feed = CHANGE_FEEDS[name]
+        params = {"lag": CHANGES_SAFETY_LAG_SECONDS, "limit": limit + 1}
+        if name in positions:
+            params["after_ts"], params["after_id"] = positions[name]
+        if districts is not None:
+            params["districts"] = districts
+        query = queries.change_feed(
+            name, feed["key"], feed["columns"], feed["from"], feed["district"], feed["id"],
+            after=name in positions, by_district=districts is not None
+        )
+        rows = db.execute(query, params).fetchall()
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+
+        if rows:
+            positions[name] = (rows[-1].change_ts, rows[-1].id)
+
+        changes[name] = [
+            {key: _serialize(value) for key, value in row._mapping.items() if key != "change_ts"}
+            for row in rows
+        ]
+
+    return {
+        "changes": changes,
+        "cursor": _encode_cursor({
+            name: [ts.isoformat(), last_id] for name, (ts, last_id) in positions.items()
+        }),
+        "has_more": has_more
+    }
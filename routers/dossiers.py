@@ -1,16 +1,24 @@
 # routers/dossiers.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 
 from database import get_db
-from utils.security import verify_api_key_or_jwt
+from utils.security import verify_api_key_or_jwt, allowed_district_ids
+from utils.rate_limit import rate_limit, db_slot
+from utils.snapshots import snapshot_version, build_snapshot
+from services import queries
 import schemas
 
 router = APIRouter()
 
-@router.get("/search", response_model=List[schemas.DossierSearchResult])
+@router.get(
+    "/search",
+    response_model=List[schemas.DossierSearchResult],
+    dependencies=[Depends(rate_limit("search")), Depends(db_slot)]
+)
 async def search_dossiers(
     q: str = Query(..., min_length=1, max_length=100),
     district_id: Optional[int] = Query(None),
@@ -33,44 +41,14 @@ async def search_dossiers(
                 raise HTTPException(403, "Accès refusé à ce district")
             district_id = current_user.get("id_district")
     
-    # Construction de la requête
-    query_str = """
-        SELECT 
-            d.id, d.nom_dossier, d.numero_ouverture, d.commune, d.fokontany,
-            d.id_district, dist.nom_district, d.date_fermeture,
-            COUNT(DISTINCT p.id) as proprietes_count,
-            COUNT(DISTINCT c.id_demandeur) as demandeurs_count
-        FROM dossiers d
-        JOIN districts dist ON d.id_district = dist.id
-        LEFT JOIN proprietes p ON p.id_dossier = d.id
-        LEFT JOIN contenir c ON c.id_dossier = d.id
-        WHERE (
-            CAST(d.numero_ouverture AS TEXT) = :q
-            OR LOWER(d.nom_dossier) LIKE LOWER(:q_like)
-            OR LOWER(d.commune) LIKE LOWER(:q_like)
-        )
-    """
-    
-    params = {"q": q, "q_like": f"%{q}%"}
-    
-    if district_id:
-        query_str += " AND d.id_district = :district_id"
-        params["district_id"] = district_id
-    
-    if not include_closed:
-        query_str += " AND d.date_fermeture IS NULL"
-    
-    query_str += """
-        GROUP BY d.id, d.nom_dossier, d.numero_ouverture, d.commune, 
-                 d.fokontany, d.id_district, dist.nom_district, d.date_fermeture
-        ORDER BY 
-            CASE WHEN CAST(d.numero_ouverture AS TEXT) = :q THEN 0 ELSE 1 END,
-            d.numero_ouverture DESC
-        LIMIT :limit
-    """
-    
-    params["limit"] = limit
-    results = db.execute(text(query_str), params).fetchall()
+    filters = queries.active_filters({"district_id": district_id or None})
+    active = set(filters) if include_closed else set(filters) | {"open_only"}
+    results = db.execute(queries.dossier_search(frozenset(active)), {
+        "q": q,
+        "q_like": f"%{q}%",
+        "limit": limit,
+        **filters
+    }).fetchall()
     
     return [
         schemas.DossierSearchResult(
@@ -86,4 +64,32 @@ async def search_dossiers(
             demandeurs_count=r.demandeurs_count or 0
         )
         for r in results
-    ]
\ No newline at end of file
+    ]
+
+@router.get("/snapshots/{district_id}", dependencies=[Depends(rate_limit("sync")), Depends(db_slot)])
+async def get_district_snapshot(
+    district_id: int,
+    request: Request,
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Instantané hors-ligne des dossiers ouverts d'un district (NDJSON gzip)"""
+    
+    allowed = allowed_district_ids(current_user)
+    if allowed is not None and district_id not in allowed:
+        raise HTTPException(403, f"Accès refusé au district {district_id}")
+    
+    version = snapshot_version(db, district_id)
+    etag = f'"{version}"'
+    
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    path = await run_in_threadpool(build_snapshot, district_id, version)
+    
+    return FileResponse(
+        path=path,
+        media_type="application/gzip",
+        filename=f"district_{district_id}.ndjson.gz",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
@@ -1,159 +1,403 @@
 # routers/staging.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
+from typing import List, Optional, Union
+from datetime import date, datetime, timedelta
+import asyncio
+import csv
+import io
 import json
 import os
 import logging
+import zlib
 
-from database import get_db
-from utils.security import verify_api_key_or_jwt
+from database import get_db, engine
+from utils.security import verify_api_key_or_jwt, allowed_district_ids
+from utils.notifications import broker, notify_import_event
+from utils.rate_limit import rate_limit, db_slot, acquire_db_slot, release_db_slot
+from utils.ref_cache import dossier_cache, district_cache
+from utils.archive import IMPORTS_TABLE, ARCHIVE_TABLE
+from utils.request_stats import timed
+from utils.audit import audit_log
+from services import queries
+from services.queries import MATCHED_PROPRIETE_COLUMNS, MATCHED_DEMANDEUR_COLUMNS
 import schemas
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/", response_model=List[schemas.StagingItemResponse])
+# Durée d'un bail de revue et taille maximale d'une réservation
+STAGING_LEASE_SECONDS = int(os.getenv("STAGING_LEASE_SECONDS", "900"))
+STAGING_CLAIM_MAX = int(os.getenv("STAGING_CLAIM_MAX", "50"))
+
+# ============================================
+# SPARSE FIELDSETS (LISTE DE STAGING)
+# ============================================
+
+# Champs de la liste de staging (ordre des réponses complètes)
+STAGING_FIELDS = [
+    "id", "batch_id", "entity_type", "action_suggested", "dossier_id", "dossier_nom",
+    "dossier_numero_ouverture", "district_id", "district_nom", "raw_data",
+    "matched_entity_id", "match_confidence", "match_method", "has_warnings", "warnings",
+    "topo_user_name", "import_date", "status", "processed_at", "rejection_reason",
+]
+
+# Noms lus dans le cache de référence plutôt que joints (champ -> attribut)
+STAGING_DOSSIER_FIELDS = {"dossier_nom": "nom_dossier", "dossier_numero_ouverture": "numero_ouverture"}
+STAGING_DISTRICT_FIELDS = {"district_nom": "nom_district"}
+
+# Champs calculés (lookups fichiers / entité matchée)
+STAGING_DERIVED_FIELDS = {"files", "files_count", "matched_entity_details"}
+
+STAGING_ALL_FIELDS = STAGING_FIELDS + sorted(STAGING_DERIVED_FIELDS)
+
+# Colonnes utiles à l'écran "file d'attente" d'un validateur
+STAGING_SUMMARY_FIELDS = [
+    "id", "entity_type", "action_suggested", "dossier_id", "dossier_nom",
+    "district_id", "district_nom", "has_warnings", "files_count",
+    "topo_user_name", "import_date", "status"
+]
+
+def _resolve_staging_fields(fields: Optional[str], view: str) -> List[str]:
+    """Liste des champs demandés (toujours avec id)"""
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in STAGING_ALL_FIELDS]
+        if unknown:
+            raise HTTPException(422, f"Champs inconnus: {', '.join(unknown)}")
+    elif view == "summary":
+        requested = list(STAGING_SUMMARY_FIELDS)
+    else:
+        requested = list(STAGING_ALL_FIELDS)
+    
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+def _imports_table(archived: bool) -> str:
+    """Table interrogée : imports courants ou archive des imports traités"""
+    return ARCHIVE_TABLE if archived else IMPORTS_TABLE
+
+def _parse_json(value, default=None):
+    try:
+        return json.loads(value) if isinstance(value, str) else (value if value is not None else default)
+    except:
+        return default
+
+def _matched_entity_details(imp) -> Optional[dict]:
+    """Détails de l'entité matchée à partir des colonnes jointes (mp_*, md_*)"""
+    if imp.mp_id is not None:
+        return {col: getattr(imp, f"mp_{col}") for col in MATCHED_PROPRIETE_COLUMNS}
+    if imp.md_id is not None:
+        details = {col: getattr(imp, f"md_{col}") for col in MATCHED_DEMANDEUR_COLUMNS}
+        if details["date_naissance"]:
+            details["date_naissance"] = details["date_naissance"].isoformat()
+        return details
+    return None
+
+def _scoped_district(current_user: dict, district_id: Optional[int]) -> Optional[int]:
+    """District effectif de la liste et de l'export : imposé aux utilisateurs
+    GeODOC de district (403 sur un autre district)"""
+    if current_user["source"] == "geodoc":
+        if current_user["role"] not in ["super_admin", "central_user"]:
+            if district_id and district_id != current_user["id_district"]:
+                raise HTTPException(403, "Accès refusé")
+            return current_user["id_district"]
+    return district_id
+
+@router.get(
+    "/",
+    response_model=List[Union[schemas.StagingItemResponse, schemas.StagingItemSummary]],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(rate_limit("staging")), Depends(db_slot)]
+)
 async def get_staging_imports(
     status: Optional[str] = Query("pending"),
     entity_type: Optional[str] = Query(None),
     district_id: Optional[int] = Query(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
+    view: str = Query("full", pattern=r'^(full|summary)$'),
+    archived: bool = Query(False, description="Interroger l'archive des imports traités"),
     current_user: dict = Depends(verify_api_key_or_jwt),
     db: Session = Depends(get_db)
 ):
     """Liste des imports en attente"""
     
-    if current_user["source"] == "geodoc":
-        if current_user["role"] not in ["super_admin", "central_user"]:
-            if district_id and district_id != current_user["id_district"]:
-                raise HTTPException(403, "Accès refusé")
-            district_id = current_user["id_district"]
-    
-    query = """
-        SELECT 
-            ti.*, d.nom_dossier, d.numero_ouverture as dossier_numero_ouverture,
-            dist.nom_district
-        FROM topo_imports ti
-        JOIN dossiers d ON ti.target_dossier_id = d.id
-        JOIN districts dist ON ti.target_district_id = dist.id
-        WHERE 1=1
-    """
-    params = {}
+    district_id = _scoped_district(current_user, district_id)
     
-    if status:
-        query += " AND ti.status = :status"
-        params["status"] = status
-    
-    if entity_type:
-        query += " AND ti.entity_type = :entity_type"
-        params["entity_type"] = entity_type
+    requested = _resolve_staging_fields(fields, view)
+    is_full = set(requested) == set(STAGING_ALL_FIELDS)
+    filters = queries.active_filters({
+        "status": status or None,
+        "entity_type": entity_type or None,
+        "district": district_id or None
+    })
     
-    if district_id:
-        query += " AND ti.target_district_id = :district"
-        params["district"] = district_id
+    query = queries.staging_list(_imports_table(archived), frozenset(requested), frozenset(filters))
+    imports = db.execute(query, {**filters, "limit": limit, "offset": offset}).fetchall()
     
-    query += " ORDER BY ti.import_date DESC LIMIT :limit OFFSET :offset"
-    params["limit"] = limit
-    params["offset"] = offset
+    # Fichiers : une seule requête pour toute la page
+    files_by_import = {}
+    if "files" in requested and imports:
+        files = db.execute(queries.STAGING_LIST_FILES, {"import_ids": [imp.id for imp in imports]}).fetchall()
+        
+        for f in files:
+            files_by_import.setdefault(f.import_id, []).append({
+                "name": f.original_name,
+                "size": f.file_size,
+                "extension": f.file_extension,
+                "category": f.category,
+                "mime_type": f.mime_type
+            })
     
-    imports = db.execute(text(query), params).fetchall()
+    dossiers = {}
+    if any(f in STAGING_DOSSIER_FIELDS for f in requested):
+        dossiers = dossier_cache.get_many(db, [imp.dossier_id for imp in imports])
+    districts = {}
+    if any(f in STAGING_DISTRICT_FIELDS for f in requested):
+        districts = district_cache.get_many(db, [imp.district_id for imp in imports])
     
     results = []
     for imp in imports:
-        files = db.execute(text("""
-            SELECT original_name, file_size, file_extension, category, mime_type
-            FROM topo_files
-            WHERE import_id = :import_id
-            ORDER BY category, original_name
-        """), {"import_id": imp.id}).fetchall()
+        item = {}
+        for field in requested:
+            if field in STAGING_DOSSIER_FIELDS:
+                dossier = dossiers.get(imp.dossier_id)
+                item[field] = getattr(dossier, STAGING_DOSSIER_FIELDS[field]) if dossier else None
+            elif field in STAGING_DISTRICT_FIELDS:
+                district = districts.get(imp.district_id)
+                item[field] = getattr(district, STAGING_DISTRICT_FIELDS[field]) if district else None
+            elif field == "raw_data":
+                item[field] = _parse_json(imp.raw_data, {})
+            elif field == "warnings":
+                item[field] = _parse_json(imp.warnings) if imp.warnings else None
+            elif field == "match_confidence":
+                item[field] = float(imp.match_confidence) if imp.match_confidence else None
+            elif field == "files":
+                item[field] = files_by_import.get(imp.id, [])
+            elif field == "files_count":
+                item[field] = imp.files_count
+            elif field == "matched_entity_details":
+                item[field] = _matched_entity_details(imp)
+            else:
+                item[field] = getattr(imp, field)
         
-        try:
-            raw_data = json.loads(imp.raw_data) if isinstance(imp.raw_data, str) else imp.raw_data
-        except:
-            raw_data = {}
+        if is_full:
+            results.append(schemas.StagingItemResponse(**item))
+        else:
+            results.append(schemas.StagingItemSummary(**item))
+    
+    return results
+
+@router.get("/stats", dependencies=[Depends(rate_limit("staging")), Depends(db_slot)])
+async def get_stats(
+    archived: bool = Query(False, description="Statistiques de l'archive des imports traités"),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Statistiques des imports"""
+    
+    district = None
+    if current_user["source"] == "geodoc":
+        if current_user["role"] not in ["super_admin", "central_user"]:
+            district = current_user["id_district"]
+    
+    filters = queries.active_filters({"district": district})
+    groups = db.execute(queries.staging_stats(_imports_table(archived), frozenset(filters)), filters).fetchall()
+    
+    by_status = {}
+    by_entity_type = {}
+    by_district = {}
+    for g in groups:
+        by_status[g.status] = by_status.get(g.status, 0) + g.total
+        by_entity_type[g.entity_type] = by_entity_type.get(g.entity_type, 0) + g.total
+        by_district[str(g.target_district_id)] = by_district.get(str(g.target_district_id), 0) + g.total
+    
+    total = sum(g.total for g in groups)
+    pending = by_status.get('pending', 0)
+    validated = by_status.get('validated', 0)
+    rejected = by_status.get('rejected', 0)
+    with_warnings = sum(g.with_warnings for g in groups)
+    
+    return schemas.StatsResponse(
+        total=total,
+        pending=pending,
+        validated=validated,
+        rejected=rejected,
+        with_warnings=with_warnings,
+        by_entity_type=by_entity_type,
+        by_district=by_district
+    )
+
+# ============================================
+# EXPORT EN FLUX (NDJSON / CSV)
+# ============================================
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = [
+    "id", "batch_id", "import_date", "status", "entity_type", "action_suggested",
+    "dossier_id", "dossier_nom", "dossier_numero_ouverture", "district_id", "district_nom",
+    "topo_user_id", "topo_user_name", "has_warnings", "warnings", "matched_entity_id",
+    "match_confidence", "match_method", "processed_at", "processed_by", "rejection_reason",
+    "files_count", "raw_data"
+]
+
+def _export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _export_chunks(query, params: dict, export_format: str):
+    """Lignes encodées par paquets, lues via un curseur côté serveur"""
+    # Connexion propre au flux : la session de la requête est fermée avant l'envoi du corps
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        result = conn.execute(query, params)
         
-        try:
-            warnings = json.loads(imp.warnings) if imp.warnings else None
-        except:
-            warnings = None
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_COLUMNS)
         
-        matched_entity_details = None
-        if imp.matched_entity_id:
-            if imp.entity_type == 'propriete':
-                entity = db.execute(text("""
-                    SELECT id, lot, titre, proprietaire, contenance, nature, vocation
-                    FROM proprietes WHERE id = :id
-                """), {"id": imp.matched_entity_id}).first()
-                
-                if entity:
-                    matched_entity_details = {
-                        "id": entity.id,
-                        "lot": entity.lot,
-                        "titre": entity.titre,
-                        "proprietaire": entity.proprietaire,
-                        "contenance": entity.contenance,
-                        "nature": entity.nature,
-                        "vocation": entity.vocation
-                    }
-            elif imp.entity_type == 'demandeur':
-                entity = db.execute(text("""
-                    SELECT id, cin, nom_demandeur, prenom_demandeur, 
-                           date_naissance, titre_demandeur
-                    FROM demandeurs WHERE id = :id
-                """), {"id": imp.matched_entity_id}).first()
-                
-                if entity:
-                    matched_entity_details = {
-                        "id": entity.id,
-                        "cin": entity.cin,
-                        "nom_demandeur": entity.nom_demandeur,
-                        "prenom_demandeur": entity.prenom_demandeur,
-                        "date_naissance": entity.date_naissance.isoformat() if entity.date_naissance else None,
-                        "titre_demandeur": entity.titre_demandeur
-                    }
+        for partition in result.partitions():
+            dossiers = dossier_cache.get_many(conn, [row.dossier_id for row in partition])
+            districts = district_cache.get_many(conn, [row.district_id for row in partition])
+            for row in partition:
+                values = dict(row._mapping)
+                dossier = dossiers.get(row.dossier_id)
+                district = districts.get(row.district_id)
+                values["dossier_nom"] = dossier.nom_dossier if dossier else None
+                values["dossier_numero_ouverture"] = dossier.numero_ouverture if dossier else None
+                values["district_nom"] = district.nom_district if district else None
+                if writer:
+                    writer.writerow([_export_value(values[col]) for col in EXPORT_COLUMNS])
+                else:
+                    record = {col: _export_value(values[col]) for col in EXPORT_COLUMNS}
+                    record["raw_data"] = _parse_json(record["raw_data"], {})
+                    record["warnings"] = _parse_json(record["warnings"]) if record["warnings"] else None
+                    buffer.write(json.dumps(record, ensure_ascii=False) + "\n")
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
         
-        results.append(schemas.StagingItemResponse(
-            id=imp.id,
-            batch_id=imp.batch_id,
-            entity_type=imp.entity_type,
-            action_suggested=imp.action_suggested,
-            dossier_id=imp.target_dossier_id,
-            dossier_nom=imp.nom_dossier,
-            dossier_numero_ouverture=imp.dossier_numero_ouverture,
-            district_id=imp.target_district_id,
-            district_nom=imp.nom_district,
-            raw_data=raw_data,
-            matched_entity_id=imp.matched_entity_id,
-            matched_entity_details=matched_entity_details,
-            match_confidence=float(imp.match_confidence) if imp.match_confidence else None,
-            match_method=imp.match_method,
-            has_warnings=imp.has_warnings,
-            warnings=warnings,
-            files_count=len(files),
-            files=[
-                {
-                    "name": f.original_name,
-                    "size": f.file_size,
-                    "extension": f.file_extension,
-                    "category": f.category,
-                    "mime_type": f.mime_type
-                }
-                for f in files
-            ],
-            topo_user_name=imp.topo_user_name,
-            import_date=imp.import_date,
-            status=imp.status,
-            processed_at=imp.processed_at,
-            rejection_reason=imp.rejection_reason
-        ))
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+async def _holding_db_slot(chunks):
+    """Parcourir le flux (dans le threadpool) en gardant le créneau DB jusqu'au
+    dernier octet ou à la déconnexion du client"""
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        release_db_slot()
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@router.get("/export", dependencies=[Depends(rate_limit("staging"))])
+async def export_staging_imports(
+    status: Optional[str] = Query(None),
+    entity_type: Optional[str] = Query(None),
+    district_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None, description="Date d'import minimale (incluse)"),
+    date_to: Optional[date] = Query(None, description="Date d'import maximale (incluse)"),
+    format: str = Query("ndjson", pattern=r'^(ndjson|csv)$'),
+    gzip: bool = Query(False),
+    archived: bool = Query(False, description="Exporter l'archive des imports traités"),
+    current_user: dict = Depends(verify_api_key_or_jwt)
+):
+    """Export complet des imports (mémoire constante)"""
     
-    return results
+    district_id = _scoped_district(current_user, district_id)
+    
+    params = queries.active_filters({
+        "status": status or None,
+        "entity_type": entity_type or None,
+        "district": district_id or None,
+        "date_from": date_from,
+        "date_to": date_to + timedelta(days=1) if date_to else None
+    })
+    query = queries.staging_export(_imports_table(archived), frozenset(params))
+    
+    # Le flux ouvre sa propre connexion : créneau DB réservé pour toute sa durée
+    await acquire_db_slot()
+    chunks = _export_chunks(query, params, format)
+    filename = f"topo_imports.{format}"
+    headers = {}
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        filename += ".gz"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        media_type = "application/gzip"
+    
+    return StreamingResponse(_holding_db_slot(chunks), media_type=media_type, headers=headers)
+
+# ============================================
+# ÉVÉNEMENTS TEMPS RÉEL (SSE)
+# ============================================
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+@router.get("/events")
+async def stream_import_events(
+    request: Request,
+    district_id: Optional[int] = Query(None),
+    current_user: dict = Depends(verify_api_key_or_jwt)
+):
+    """Flux Server-Sent Events des nouveaux imports et changements de statut"""
+    
+    allowed = allowed_district_ids(current_user)
+    if district_id is not None:
+        if allowed is not None and district_id not in allowed:
+            raise HTTPException(403, "Accès refusé")
+        districts = [district_id]
+    else:
+        districts = allowed
+    
+    async def event_stream():
+        subscriber = broker.subscribe(districts)
+        queue = subscriber[1]
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield (
+                    f"id: {event.get('import_id')}\n"
+                    f"event: {event.get('event', 'message')}\n"
+                    f"data: {json.dumps(event, default=str)}\n\n"
+                )
+        finally:
+            broker.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@router.get("/{import_id}", response_model=schemas.StagingItemResponse)
+@router.get(
+    "/{import_id}",
+    response_model=schemas.StagingItemResponse,
+    dependencies=[Depends(rate_limit("staging")), Depends(db_slot)]
+)
 async def get_import_details(
     import_id: int,
     current_user: dict = Depends(verify_api_key_or_jwt),
@@ -161,15 +405,11 @@ async def get_import_details(
 ):
     """Détails d'un import"""
     
-    imp = db.execute(text("""
-        SELECT 
-            ti.*, d.nom_dossier, d.numero_ouverture as dossier_numero_ouverture,
-            dist.nom_district
-        FROM topo_imports ti
-        JOIN dossiers d ON ti.target_dossier_id = d.id
-        JOIN districts dist ON ti.target_district_id = dist.id
-        WHERE ti.id = :id
-    """), {"id": import_id}).first()
+    imp = db.execute(queries.IMPORT_DETAIL, {"id": import_id}).first()
+    
+    if not imp:
+        # Import traité déjà archivé
+        imp = db.execute(queries.IMPORT_DETAIL_ARCHIVE, {"id": import_id}).first()
     
     if not imp:
         raise HTTPException(404, "Import introuvable")
@@ -180,12 +420,16 @@ async def get_import_details(
             if imp.target_district_id != current_user["id_district"]:
                 raise HTTPException(403, "Accès refusé")
     
+    audit_log.record(
+        "import_viewed", current_user, import_id, imp.target_district_id,
+        status=imp.status
+    )
+    
+    dossier = dossier_cache.get(db, imp.target_dossier_id)
+    district = district_cache.get(db, imp.target_district_id)
+    
     # Fichiers
-    files = db.execute(text("""
-        SELECT original_name, file_size, file_extension, category, storage_path, mime_type
-        FROM topo_files
-        WHERE import_id = :import_id
-    """), {"import_id": import_id}).fetchall()
+    files = db.execute(queries.IMPORT_FILES, {"import_id": import_id}).fetchall()
     
     try:
         raw_data = json.loads(imp.raw_data) if isinstance(imp.raw_data, str) else imp.raw_data
@@ -201,10 +445,7 @@ async def get_import_details(
     matched_entity_details = None
     if imp.matched_entity_id:
         if imp.entity_type == 'propriete':
-            entity = db.execute(text("""
-                SELECT id, lot, titre, proprietaire, contenance, nature, vocation, type_operation
-                FROM proprietes WHERE id = :id
-            """), {"id": imp.matched_entity_id}).first()
+            entity = db.execute(queries.PROPRIETE_BY_ID, {"id": imp.matched_entity_id}).first()
             
             if entity:
                 matched_entity_details = {
@@ -218,11 +459,7 @@ async def get_import_details(
                     "type_operation": entity.type_operation
                 }
         elif imp.entity_type == 'demandeur':
-            entity = db.execute(text("""
-                SELECT id, cin, nom_demandeur, prenom_demandeur, 
-                       date_naissance, titre_demandeur, domiciliation, telephone
-                FROM demandeurs WHERE id = :id
-            """), {"id": imp.matched_entity_id}).first()
+            entity = db.execute(queries.DEMANDEUR_BY_ID, {"id": imp.matched_entity_id}).first()
             
             if entity:
                 matched_entity_details = {
@@ -242,10 +479,10 @@ async def get_import_details(
         entity_type=imp.entity_type,
         action_suggested=imp.action_suggested,
         dossier_id=imp.target_dossier_id,
-        dossier_nom=imp.nom_dossier,
-        dossier_numero_ouverture=imp.dossier_numero_ouverture,
+        dossier_nom=dossier.nom_dossier if dossier else None,
+        dossier_numero_ouverture=dossier.numero_ouverture if dossier else None,
         district_id=imp.target_district_id,
-        district_nom=imp.nom_district,
+        district_nom=district.nom_district if district else None,
         raw_data=raw_data,
         matched_entity_id=imp.matched_entity_id,
         matched_entity_details=matched_entity_details,
@@ -272,7 +509,105 @@ async def get_import_details(
         rejection_reason=imp.rejection_reason
     )
 
-@router.put("/{import_id}/validate")
+def _require_validator(current_user: dict):
+    """Seuls les utilisateurs GeODOC de district valident (et réservent) des imports"""
+    if current_user["source"] != "geodoc":
+        raise HTTPException(403, "Seuls les utilisateurs GeODOC peuvent valider")
+    
+    if current_user["role"] in ["super_admin", "central_user"]:
+        raise HTTPException(403, "Les super_admin/central_user ne peuvent pas valider")
+
+@router.post(
+    "/claim",
+    response_model=schemas.StagingClaimResponse,
+    dependencies=[Depends(rate_limit("staging")), Depends(db_slot)]
+)
+async def claim_imports(
+    limit: int = Query(10, ge=1, le=STAGING_CLAIM_MAX),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Réserver les prochains imports en attente du district (bail renouvelable)"""
+    
+    _require_validator(current_user)
+    
+    rows = db.execute(queries.CLAIM_IMPORTS, {
+        "district": current_user["id_district"],
+        "user_id": current_user["id"],
+        "limit": limit,
+        "lease": STAGING_LEASE_SECONDS
+    }).fetchall()
+    db.commit()
+    
+    rows = sorted(rows, key=lambda r: (r.import_date, r.id))
+    dossiers = dossier_cache.get_many(db, [r.dossier_id for r in rows])
+    districts = district_cache.get_many(db, [r.district_id for r in rows])
+    
+    return schemas.StagingClaimResponse(
+        lease_seconds=STAGING_LEASE_SECONDS,
+        claimed_until=rows[0].claimed_until if rows else None,
+        imports=[
+            schemas.StagingItemSummary(
+                id=r.id,
+                entity_type=r.entity_type,
+                action_suggested=r.action_suggested,
+                dossier_id=r.dossier_id,
+                dossier_nom=dossiers[r.dossier_id].nom_dossier if r.dossier_id in dossiers else None,
+                district_id=r.district_id,
+                district_nom=districts[r.district_id].nom_district if r.district_id in districts else None,
+                has_warnings=r.has_warnings,
+                files_count=r.files_count,
+                topo_user_name=r.topo_user_name,
+                import_date=r.import_date,
+                status=r.status
+            )
+            for r in rows
+        ]
+    )
+
+@router.put("/{import_id}/claim", dependencies=[Depends(db_slot)])
+async def renew_claim(
+    import_id: int,
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Prolonger le bail d'un import réservé"""
+    
+    _require_validator(current_user)
+    
+    row = db.execute(queries.RENEW_CLAIM, {
+        "id": import_id,
+        "user_id": current_user["id"],
+        "lease": STAGING_LEASE_SECONDS
+    }).first()
+    
+    if not row:
+        raise HTTPException(409, "Import non réservé par vous (bail repris, libéré ou import traité)")
+    
+    db.commit()
+    
+    return {"import_id": import_id, "claimed_until": row.claimed_until, "lease_seconds": STAGING_LEASE_SECONDS}
+
+@router.delete("/{import_id}/claim", dependencies=[Depends(db_slot)])
+async def release_claim(
+    import_id: int,
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Libérer un import réservé sans le traiter"""
+    
+    _require_validator(current_user)
+    
+    row = db.execute(queries.RELEASE_CLAIM, {"id": import_id, "user_id": current_user["id"]}).first()
+    
+    if not row:
+        raise HTTPException(409, "Import non réservé par vous")
+    
+    db.commit()
+    
+    return {"success": True, "import_id": import_id}
+
+@router.put("/{import_id}/validate", dependencies=[Depends(db_slot)])
 async def validate_import(
     import_id: int,
     request: schemas.ValidateImportRequest,
@@ -282,16 +617,10 @@ async def validate_import(
     """Valider ou rejeter un import"""
     
     # Vérifier permissions (uniquement GeODOC district users)
-    if current_user["source"] != "geodoc":
-        raise HTTPException(403, "Seuls les utilisateurs GeODOC peuvent valider")
-    
-    if current_user["role"] in ["super_admin", "central_user"]:
-        raise HTTPException(403, "Les super_admin/central_user ne peuvent pas valider")
+    _require_validator(current_user)
     
-    # Récupérer import
-    imp = db.execute(text("""
-        SELECT * FROM topo_imports WHERE id = :id
-    """), {"id": import_id}).first()
+    # Récupérer import (verrouillé jusqu'au commit)
+    imp = db.execute(queries.IMPORT_FOR_VALIDATION, {"id": import_id}).first()
     
     if not imp:
         raise HTTPException(404, "Import introuvable")
@@ -302,6 +631,10 @@ async def validate_import(
     if imp.status != "pending":
         raise HTTPException(400, f"Import déjà traité (statut: {imp.status})")
     
+    # Un import réservé par un autre validateur lui reste acquis jusqu'à l'expiration du bail
+    if imp.lease_active and imp.claimed_by != current_user["id"]:
+        raise HTTPException(409, f"Import réservé par un autre validateur jusqu'à {imp.claimed_until.isoformat()}")
+    
     # Validation
     if request.action == "accept":
         new_status = "validated"
@@ -313,20 +646,26 @@ async def validate_import(
         rejection_reason = request.rejection_reason
     
     # Mise à jour
-    db.execute(text("""
-        UPDATE topo_imports
-        SET status = :status, processed_at = NOW(), 
-            processed_by = :user_id, rejection_reason = :reason
-        WHERE id = :id
-    """), {
+    db.execute(queries.UPDATE_IMPORT_STATUS, {
         "status": new_status,
         "user_id": current_user["id"],
         "reason": rejection_reason,
         "id": import_id
     })
     
+    notify_import_event(
+        db, "import_status_changed", import_id, imp.target_district_id,
+        dossier_id=imp.target_dossier_id, entity_type=imp.entity_type, status=new_status
+    )
+    
     db.commit()
     
+    audit_log.record(
+        "import_validated" if new_status == "validated" else "import_rejected",
+        current_user, import_id, imp.target_district_id,
+        entity_type=imp.entity_type, rejection_reason=rejection_reason
+    )
+    
     return {
         "success": True,
         "message": f"Import {request.action}é avec succès",
@@ -334,56 +673,6 @@ async def validate_import(
         "status": new_status
     }
 
-@router.get("/stats")
-async def get_stats(
-    current_user: dict = Depends(verify_api_key_or_jwt),
-    db: Session = Depends(get_db)
-):
-    """Statistiques des imports"""
-    
-    query = "SELECT status, entity_type, target_district_id FROM topo_imports WHERE 1=1"
-    params = {}
-    
-    # Filtre district si nécessaire
-    if current_user["source"] == "geodoc":
-        if current_user["role"] not in ["super_admin", "central_user"]:
-            query += " AND target_district_id = :district"
-            params["district"] = current_user["id_district"]
-    
-    imports = db.execute(text(query), params).fetchall()
-    
-    total = len(imports)
-    pending = sum(1 for i in imports if i.status == 'pending')
-    validated = sum(1 for i in imports if i.status == 'validated')
-    rejected = sum(1 for i in imports if i.status == 'rejected')
-    
-    # Par type
-    by_entity_type = {}
-    for imp in imports:
-        by_entity_type[imp.entity_type] = by_entity_type.get(imp.entity_type, 0) + 1
-    
-    # Par district
-    by_district = {}
-    for imp in imports:
-        by_district[str(imp.target_district_id)] = by_district.get(str(imp.target_district_id), 0) + 1
-    
-    # Warnings
-    warnings_query = "SELECT COUNT(*) FROM topo_imports WHERE has_warnings = true"
-    if params.get("district"):
-        warnings_query += " AND target_district_id = :district"
-    
-    with_warnings = db.execute(text(warnings_query), params).scalar()
-    
-    return schemas.StatsResponse(
-        total=total,
-        pending=pending,
-        validated=validated,
-        rejected=rejected,
-        with_warnings=with_warnings,
-        by_entity_type=by_entity_type,
-        by_district=by_district
-    )
-
 @router.get("/files/{import_id}/{filename}")
 async def download_file(
     import_id: int,
@@ -394,16 +683,7 @@ async def download_file(
     """Télécharger un fichier de staging"""
     
     # Vérifier que le fichier appartient à un import autorisé
-    file_record = db.execute(text("""
-        SELECT 
-            tf.storage_path,
-            tf.mime_type,
-            ti.target_district_id
-        FROM topo_files tf
-        JOIN topo_imports ti ON tf.import_id = ti.id
-        WHERE tf.import_id = :import_id 
-        AND tf.stored_name = :filename
-    """), {"import_id": import_id, "filename": filename}).first()
+    file_record = db.execute(queries.FILE_FOR_DOWNLOAD, {"import_id": import_id, "filename": filename}).first()
     
     if not file_record:
         raise HTTPException(404, "Fichier introuvable")
@@ -415,10 +695,18 @@ async def download_file(
                 raise HTTPException(403, "Accès refusé à ce fichier")
     
     # Vérifier existence physique
-    if not os.path.exists(file_record.storage_path):
+    with timed("file"):
+        exists = os.path.exists(file_record.storage_path)
+    
+    if not exists:
         logger.error(f"Fichier physique introuvable: {file_record.storage_path}")
         raise HTTPException(404, "Fichier physique introuvable")
     
+    audit_log.record(
+        "file_downloaded", current_user, import_id, file_record.target_district_id,
+        filename=filename
+    )
+    
     # Retourner le fichier
     return FileResponse(
         path=file_record.storage_path,
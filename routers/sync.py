@@ -1,88 +1,91 @@
 # routers/sync.py
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from pydantic import ValidationError
 from typing import List, Optional
 import json
+import os
 import uuid
 import logging
 
 from database import get_db
 from utils.security import verify_api_key_or_jwt
-from utils.files import validate_file, save_file
+from utils.files import validate_file, save_files
+from utils.notifications import notify_import_event
+from utils.rate_limit import rate_limit, db_slot
+from utils.ref_cache import dossier_cache
+from utils.idempotency import principal_of, content_hash, get_stored_response, store_response
+from utils.payload import read_body, media_type_of, unpack_msgpack
+from utils.audit import audit_log
+from services import queries
 import schemas
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/", response_model=schemas.TopoSyncResponse, status_code=201)
-async def sync_topo_data(
-    data: str = Form(...),
-    files: Optional[List[UploadFile]] = File(None),
-    current_user: dict = Depends(verify_api_key_or_jwt),
-    db: Session = Depends(get_db)
-):
-    """Synchronisation TopoManager → GeODOC"""
-    
+# Confiance minimale pour considérer une propriété comme existante (action create -> update)
+MATCH_CONFIDENCE_THRESHOLD = float(os.getenv("MATCH_CONFIDENCE_THRESHOLD", "0.7"))
+
+def _replay_stored_response(stored, digest: str, response: Response) -> schemas.TopoSyncResponse:
+    """Réponse d'origine d'une soumission rejouée"""
+    if stored.content_hash != digest:
+        raise HTTPException(422, "Idempotency-Key déjà utilisée pour un contenu différent")
+    response.headers["Idempotent-Replayed"] = "true"
+    return schemas.TopoSyncResponse.model_validate_json(stored.response)
+
+def _parse_sync_payload(adapter, data, media_type: str = "json"):
+    """Parsing et validation typée en une passe, avant tout accès à la base"""
     try:
-        sync_data = json.loads(data)
-        sync_request = schemas.TopoSyncRequest(**sync_data)
-    except Exception as e:
+        if media_type == "msgpack":
+            return adapter.validate_python(unpack_msgpack(data))
+        return adapter.validate_json(data)
+    except ValidationError as e:
         raise HTTPException(422, f"Erreur validation données: {str(e)}")
-    
-    # Vérifier dossier
-    dossier = db.execute(text("""
-        SELECT id, id_district, date_fermeture
-        FROM dossiers
-        WHERE id = :id
-    """), {"id": sync_request.target_dossier_id}).first()
-    
+
+def _check_dossier(dossier, dossier_id: int):
     if not dossier:
-        raise HTTPException(404, f"Dossier {sync_request.target_dossier_id} introuvable")
-    
+        raise HTTPException(404, f"Dossier {dossier_id} introuvable")
     if dossier.date_fermeture:
         raise HTTPException(400, "Impossible d'importer dans un dossier fermé")
-    
-    target_district_id = dossier.id_district
-    
-    # Validation et matching
+
+def _score_propriete(candidate) -> tuple:
+    """(confiance, méthode) : part des clés comparables (renseignées des deux côtés) qui concordent"""
+    keys = [
+        ("lot", candidate.lot_match),
+        ("titre", candidate.titre_match),
+        ("requisition", candidate.requisition_match),
+    ]
+    comparable = [name for name, matched in keys if matched is not None]
+    matched = [name for name, matched in keys if matched]
+    return round(len(matched) / len(comparable), 2), "exact_" + "+".join(matched)
+
+def _match_entity(db: Session, sync_request) -> tuple:
+    """Matching avec l'existant GeODOC : (avertissements, MatchDetails ou None)"""
     warnings = []
-    matched_entity_id = None
-    match_confidence = None
-    match_method = None
-    matched_entity_details = None
+    entity_data = sync_request.entity_data
+    match_details = None
     
     if sync_request.entity_type == schemas.EntityType.PROPRIETE:
-        if not sync_request.entity_data.get("lot"):
-            raise HTTPException(422, "Le champ 'lot' est obligatoire")
-        if not sync_request.entity_data.get("nature"):
-            raise HTTPException(422, "Le champ 'nature' est obligatoire")
-        if not sync_request.entity_data.get("type_operation"):
-            raise HTTPException(422, "Le champ 'type_operation' est obligatoire")
-        if not sync_request.entity_data.get("vocation"):
+        if entity_data.vocation is None:
             warnings.append("Vocation manquante (recommandée)")
         
-        # Matching par lot
-        lot = sync_request.entity_data.get("lot", "").strip()
-        if lot:
-            match = db.execute(text("""
-                SELECT 
-                    p.id, p.lot, p.titre, p.proprietaire, p.contenance,
-                    p.nature, p.vocation, p.type_operation
-                FROM proprietes p
-                WHERE p.id_dossier = :dossier_id 
-                AND UPPER(TRIM(p.lot)) = :lot
-                LIMIT 1
-            """), {
-                "dossier_id": sync_request.target_dossier_id, 
-                "lot": lot.upper()
-            }).first()
-            
-            if match:
-                matched_entity_id = match.id
-                match_confidence = 1.0
-                match_method = "exact_lot"
-                matched_entity_details = {
+        # Matching combiné : lot, titre et réquisition normalisés (index par dossier)
+        candidates = db.execute(queries.PROPRIETE_CANDIDATES, {
+            "dossier_id": sync_request.target_dossier_id,
+            "lot": entity_data.lot,
+            "titre": entity_data.titre,
+            "requisition": entity_data.numero_requisition
+        }).fetchall()
+        
+        scored = [(_score_propriete(c), c) for c in candidates]
+        if scored:
+            (confidence, method), match = max(scored, key=lambda s: (s[0][0], s[0][1].count("+"), -s[1].id))
+            match_details = schemas.MatchDetails(
+                matched_entity_type=sync_request.entity_type.value,
+                matched_entity_id=match.id,
+                match_confidence=confidence,
+                match_method=method,
+                matched_entity_details={
                     "id": match.id,
                     "lot": match.lot,
                     "titre": match.titre,
@@ -92,36 +95,27 @@ async def sync_topo_data(
                     "vocation": match.vocation,
                     "type_operation": match.type_operation
                 }
+            )
+            if confidence >= MATCH_CONFIDENCE_THRESHOLD:
                 warnings.append(f"Propriété existante détectée (Lot {match.lot})")
+            else:
+                warnings.append(
+                    f"Correspondance partielle avec la propriété existante Lot {match.lot} "
+                    f"({method}, confiance {confidence:.2f})"
+                )
     
     elif sync_request.entity_type == schemas.EntityType.DEMANDEUR:
-        if not sync_request.entity_data.get("cin"):
-            raise HTTPException(422, "Le champ 'cin' est obligatoire")
-        if not sync_request.entity_data.get("nom_demandeur"):
-            raise HTTPException(422, "Le champ 'nom_demandeur' est obligatoire")
-        if not sync_request.entity_data.get("date_naissance"):
-            raise HTTPException(422, "Le champ 'date_naissance' est obligatoire")
-        if not sync_request.entity_data.get("titre_demandeur"):
-            raise HTTPException(422, "Le champ 'titre_demandeur' est obligatoire")
+        # Matching par CIN (12 chiffres garantis par DemandeurData)
+        cin = entity_data.cin
+        match = db.execute(queries.DEMANDEUR_BY_CIN, {"cin": cin}).first()
         
-        # Matching par CIN
-        cin = sync_request.entity_data.get("cin", "").strip()
-        if cin and len(cin) == 12:
-            match = db.execute(text("""
-                SELECT 
-                    d.id, d.cin, d.nom_demandeur, d.prenom_demandeur,
-                    d.date_naissance, d.titre_demandeur, d.domiciliation,
-                    d.telephone
-                FROM demandeurs d
-                WHERE d.cin = :cin
-                LIMIT 1
-            """), {"cin": cin}).first()
-            
-            if match:
-                matched_entity_id = match.id
-                match_confidence = 1.0
-                match_method = "exact_cin"
-                matched_entity_details = {
+        if match:
+            match_details = schemas.MatchDetails(
+                matched_entity_type=sync_request.entity_type.value,
+                matched_entity_id=match.id,
+                match_confidence=1.0,
+                match_method="exact_cin",
+                matched_entity_details={
                     "id": match.id,
                     "cin": match.cin,
                     "nom_demandeur": match.nom_demandeur,
@@ -131,118 +125,339 @@ async def sync_topo_data(
                     "domiciliation": match.domiciliation,
                     "telephone": match.telephone
                 }
-                warnings.append(f"Demandeur existant détecté (CIN: {cin})")
+            )
+            warnings.append(f"Demandeur existant détecté (CIN: {cin})")
     
-    if matched_entity_id and sync_request.action_suggested == schemas.ActionSuggested.CREATE:
+    # Mise à jour suggérée seulement pour une correspondance suffisamment sûre
+    if (match_details and match_details.match_confidence >= MATCH_CONFIDENCE_THRESHOLD
+            and sync_request.action_suggested == schemas.ActionSuggested.CREATE):
         sync_request.action_suggested = schemas.ActionSuggested.UPDATE
     
-    # Créer import
-    batch_id = str(uuid.uuid4())
-    
-    import_result = db.execute(text("""
-        INSERT INTO topo_imports (
-            batch_id, import_date, topo_user_id, topo_user_name,
-            entity_type, action_suggested, target_dossier_id, target_district_id,
-            raw_data, has_warnings, warnings,
-            matched_entity_id, match_confidence, match_method, status
-        ) VALUES (
-            :batch_id, NOW(), :user_id, :user_name,
-            :entity_type, :action, :dossier_id, :district_id,
-            :raw_data, :has_warnings, :warnings,
-            :matched_id, :confidence, :method, 'pending'
-        ) RETURNING id, import_date
-    """), {
+    return warnings, match_details
+
+def _insert_import(db: Session, current_user: dict, sync_request, district_id: int,
+                   batch_id: str, warnings: list, match_details):
+    """Ligne topo_imports : champs déclarés validés (et normalisés), champs supplémentaires conservés"""
+    return db.execute(queries.INSERT_IMPORT, {
         "batch_id": batch_id,
         "user_id": current_user["id"],
         "user_name": current_user.get("full_name") or current_user.get("username") or current_user.get("name"),
         "entity_type": sync_request.entity_type.value,
         "action": sync_request.action_suggested.value,
         "dossier_id": sync_request.target_dossier_id,
-        "district_id": target_district_id,
-        "raw_data": json.dumps(sync_request.entity_data, default=str),
+        "district_id": district_id,
+        "raw_data": sync_request.entity_data.model_dump_json(exclude_none=True),
         "has_warnings": len(warnings) > 0,
         "warnings": json.dumps(warnings) if warnings else None,
-        "matched_id": matched_entity_id,
-        "confidence": match_confidence,
-        "method": match_method
-    })
+        "matched_id": match_details.matched_entity_id if match_details else None,
+        "confidence": match_details.match_confidence if match_details else None,
+        "method": match_details.match_method if match_details else None
+    }).first()
+
+def _attach_pending_files(db: Session, principal: str, import_id: int, file_ids: list) -> list:
+    """Rattacher les fichiers pré-uploadés ; tous doivent appartenir à l'appelant et être libres"""
+    if not file_ids:
+        return []
+    rows = db.execute(queries.ATTACH_PENDING_FILES, {
+        "import_id": import_id,
+        "file_ids": list(set(file_ids)),
+        "principal": principal
+    }).fetchall()
+    missing = set(file_ids) - {row.id for row in rows}
+    if missing:
+        # La transaction est annulée à la fermeture de la session
+        raise HTTPException(422, f"Fichiers inconnus ou déjà rattachés: {', '.join(map(str, sorted(missing)))}")
+    return [
+        schemas.FileResponse(
+            id=row.id,
+            original_name=row.original_name,
+            stored_name=row.stored_name,
+            file_size=row.file_size,
+            category=row.category,
+            file_extension=row.file_extension,
+            mime_type=row.mime_type
+        )
+        for row in rows
+    ]
+
+def _remove_paths(paths: list):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+async def _persist_files(db: Session, files: List[UploadFile], import_id: Optional[int],
+                         principal: str, warnings: Optional[list]) -> tuple:
+    """Écriture concurrente des fichiers puis une seule insertion topo_files : (FileResponse, chemins).
+    warnings None : tout fichier refusé lève une erreur ; sinon il devient un avertissement."""
+    accepted = []
+    for file in files:
+        validation = validate_file(file)
+        if validation["is_valid"]:
+            accepted.append((file, validation["file_info"]))
+        elif warnings is None:
+            raise HTTPException(422, f"{file.filename}: {', '.join(validation['errors'])}")
+        else:
+            warnings.extend([f"{file.filename}: {err}" for err in validation["errors"]])
     
-    import_record = import_result.first()
-    import_id = import_record.id
-    import_date = import_record.import_date
+    results = await save_files([file for file, _ in accepted], "document", import_id)
     
-    # Upload fichiers
-    uploaded_files = []
-    if files:
-        for file in files:
-            validation = validate_file(file)
-            if not validation["is_valid"]:
-                warnings.extend([f"{file.filename}: {err}" for err in validation["errors"]])
-                continue
-            
-            try:
-                file_info = await save_file(file, "document", import_id)
-                
-                file_result = db.execute(text("""
-                    INSERT INTO topo_files (
-                        import_id, original_name, stored_name, storage_path,
-                        mime_type, file_size, file_extension, category, file_hash, uploaded_at
-                    ) VALUES (
-                        :import_id, :original, :stored, :path,
-                        :mime, :size, :ext, :category, :hash, NOW()
-                    ) RETURNING id
-                """), {
-                    "import_id": import_id,
-                    "original": file.filename,
-                    "stored": file_info["stored_name"],
-                    "path": file_info["storage_path"],
-                    "mime": validation["file_info"]["mime_type"],
-                    "size": file_info["file_size"],
-                    "ext": validation["file_info"]["extension"],
-                    "category": "document",
-                    "hash": file_info["file_hash"]
-                })
-                
-                file_id = file_result.first().id
-                
-                uploaded_files.append(schemas.FileResponse(
-                    id=file_id,
-                    original_name=file.filename,
-                    stored_name=file_info["stored_name"],
-                    file_size=file_info["file_size"],
-                    category="document",
-                    file_extension=validation["file_info"]["extension"],
-                    mime_type=validation["file_info"]["mime_type"]
-                ))
-            except Exception as e:
-                warnings.append(f"{file.filename}: {str(e)}")
+    saved = []
+    failures = []
+    for (file, file_info), result in zip(accepted, results):
+        if isinstance(result, Exception):
+            failures.append((file, result))
+        else:
+            saved.append((file, file_info, result))
+    saved_paths = [result["storage_path"] for _, _, result in saved]
     
-    db.commit()
+    if failures:
+        if warnings is None:
+            _remove_paths(saved_paths)
+            file, error = failures[0]
+            if isinstance(error, ValueError):
+                raise HTTPException(413, f"{file.filename}: {str(error)}")
+            raise error
+        warnings.extend([f"{file.filename}: {str(error)}" for file, error in failures])
     
-    match_details = None
-    if matched_entity_id:
-        match_details = schemas.MatchDetails(
-            matched_entity_type=sync_request.entity_type.value,
-            matched_entity_id=matched_entity_id,
-            match_confidence=match_confidence,
-            match_method=match_method,
-            matched_entity_details=matched_entity_details
-        )
+    if not saved:
+        return [], []
     
+    try:
+        rows = db.execute(queries.INSERT_FILES, {
+            "import_id": import_id,
+            "category": "document",
+            "uploaded_by": principal,
+            "originals": [file.filename for file, _, _ in saved],
+            "stored": [result["stored_name"] for _, _, result in saved],
+            "paths": saved_paths,
+            "mimes": [file_info["mime_type"] for _, file_info, _ in saved],
+            "sizes": [result["file_size"] for _, _, result in saved],
+            "exts": [file_info["extension"] for _, file_info, _ in saved],
+            "hashes": [result["file_hash"] for _, _, result in saved]
+        }).fetchall()
+    except Exception:
+        _remove_paths(saved_paths)
+        raise
+    file_ids = {row.stored_name: row.id for row in rows}
+    
+    return [
+        schemas.FileResponse(
+            id=file_ids[result["stored_name"]],
+            original_name=file.filename,
+            stored_name=result["stored_name"],
+            file_size=result["file_size"],
+            category="document",
+            file_extension=file_info["extension"],
+            mime_type=file_info["mime_type"]
+        )
+        for file, file_info, result in saved
+    ], saved_paths
+
+def _sync_response(sync_request, import_record, batch_id: str, district_id: int,
+                   warnings: list, match_details, uploaded_files: list) -> schemas.TopoSyncResponse:
     return schemas.TopoSyncResponse(
         success=True,
         message="Import créé avec succès",
-        import_id=import_id,
+        import_id=import_record.id,
         batch_id=batch_id,
         entity_type=sync_request.entity_type.value,
         action_suggested=sync_request.action_suggested.value,
         target_dossier_id=sync_request.target_dossier_id,
-        target_district_id=target_district_id,
+        target_district_id=district_id,
         has_warnings=len(warnings) > 0,
         warnings=warnings if warnings else None,
-        match_found=matched_entity_id is not None,
+        match_found=match_details is not None,
         match_details=match_details,
         files_count=len(uploaded_files),
         files=uploaded_files,
-        import_date=import_date
-    )
\ No newline at end of file
+        import_date=import_record.import_date
+    )
+
+async def _process_sync(sync_request, files: Optional[List[UploadFile]], idempotency_key: Optional[str],
+                        response: Response, current_user: dict, db: Session):
+    """Matching, création de l'import et des fichiers, idempotence"""
+    
+    # Rejeu d'une soumission déjà traitée : réponse d'origine, sans matching ni écriture
+    principal = principal_of(current_user)
+    digest = None
+    if idempotency_key:
+        digest = await content_hash(sync_request.model_dump(mode="json"), files)
+        stored = get_stored_response(db, principal, idempotency_key)
+        if stored:
+            return _replay_stored_response(stored, digest, response)
+    
+    # Vérifier dossier (cache de référence, invalidé par NOTIFY)
+    dossier = dossier_cache.get(db, sync_request.target_dossier_id)
+    _check_dossier(dossier, sync_request.target_dossier_id)
+    target_district_id = dossier.id_district
+    
+    # Matching
+    warnings, match_details = _match_entity(db, sync_request)
+    
+    # Créer import
+    batch_id = str(uuid.uuid4())
+    import_record = _insert_import(
+        db, current_user, sync_request, target_district_id, batch_id, warnings, match_details
+    )
+    import_id = import_record.id
+    
+    # Fichiers pré-uploadés puis fichiers joints à la requête
+    uploaded_files = _attach_pending_files(db, principal, import_id, sync_request.file_ids)
+    saved_paths = []
+    if files:
+        request_files, saved_paths = await _persist_files(db, files, import_id, principal, warnings)
+        uploaded_files.extend(request_files)
+    
+    sync_response = _sync_response(
+        sync_request, import_record, batch_id, target_district_id,
+        warnings, match_details, uploaded_files
+    )
+    
+    if idempotency_key:
+        if not store_response(db, principal, idempotency_key, digest, import_id, sync_response.model_dump_json()):
+            # Une tentative concurrente avec la même clé a été validée entre-temps
+            db.rollback()
+            _remove_paths(saved_paths)
+            stored = get_stored_response(db, principal, idempotency_key)
+            return _replay_stored_response(stored, digest, response)
+    
+    notify_import_event(
+        db, "import_created", import_id, target_district_id,
+        dossier_id=sync_request.target_dossier_id,
+        entity_type=sync_request.entity_type.value, status="pending"
+    )
+    
+    db.commit()
+    
+    audit_log.record(
+        "import_created", current_user, import_id, target_district_id,
+        batch_id=batch_id, entity_type=sync_request.entity_type.value,
+        dossier_id=sync_request.target_dossier_id, files_count=len(uploaded_files)
+    )
+    
+    return sync_response
+
+@router.post(
+    "/",
+    response_model=schemas.TopoSyncResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit("sync")), Depends(db_slot)]
+)
+async def sync_topo_data(
+    response: Response,
+    data: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Synchronisation TopoManager → GeODOC"""
+    
+    sync_request = _parse_sync_payload(schemas.SYNC_REQUEST_ADAPTER, data)
+    return await _process_sync(sync_request, files, idempotency_key, response, current_user, db)
+
+@router.post(
+    "/native",
+    response_model=schemas.TopoSyncResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit("sync")), Depends(db_slot)]
+)
+async def sync_topo_data_native(
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Synchronisation sans multipart : corps JSON ou MessagePack (gzip/zstd acceptés),
+    pièces jointes référencées par file_ids"""
+    
+    media_type = media_type_of(request)
+    body = await read_body(request)
+    sync_request = _parse_sync_payload(schemas.SYNC_REQUEST_ADAPTER, body, media_type)
+    return await _process_sync(sync_request, None, idempotency_key, response, current_user, db)
+
+@router.post(
+    "/files",
+    response_model=List[schemas.FileResponse],
+    status_code=201,
+    dependencies=[Depends(rate_limit("sync"))]
+)
+async def upload_pending_files(
+    files: List[UploadFile] = File(...),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Pré-upload de pièces jointes, à référencer ensuite par file_ids (expirent si non rattachées)"""
+    
+    if len(files) > schemas.SYNC_MAX_FILE_IDS:
+        raise HTTPException(422, f"Maximum {schemas.SYNC_MAX_FILE_IDS} fichiers par envoi")
+    
+    principal = principal_of(current_user)
+    uploaded_files, saved_paths = await _persist_files(db, files, None, principal, None)
+    try:
+        db.commit()
+    except Exception:
+        _remove_paths(saved_paths)
+        raise
+    
+    return uploaded_files
+
+@router.post(
+    "/batch",
+    response_model=schemas.TopoSyncBatchResponse,
+    status_code=201,
+    dependencies=[Depends(rate_limit("sync")), Depends(db_slot)]
+)
+async def sync_topo_batch(
+    data: str = Form(...),
+    current_user: dict = Depends(verify_api_key_or_jwt),
+    db: Session = Depends(get_db)
+):
+    """Synchronisation groupée : un import par élément, tout ou rien (fichiers par file_ids)"""
+    
+    sync_requests = _parse_sync_payload(schemas.SYNC_BATCH_ADAPTER, data)
+    principal = principal_of(current_user)
+    
+    dossiers = dossier_cache.get_many(db, [r.target_dossier_id for r in sync_requests])
+    for sync_request in sync_requests:
+        _check_dossier(dossiers.get(sync_request.target_dossier_id), sync_request.target_dossier_id)
+    
+    batch_id = str(uuid.uuid4())
+    results = []
+    for sync_request in sync_requests:
+        district_id = dossiers[sync_request.target_dossier_id].id_district
+        warnings, match_details = _match_entity(db, sync_request)
+        import_record = _insert_import(
+            db, current_user, sync_request, district_id, batch_id, warnings, match_details
+        )
+        attached_files = _attach_pending_files(db, principal, import_record.id, sync_request.file_ids)
+        results.append(_sync_response(
+            sync_request, import_record, batch_id, district_id, warnings, match_details, attached_files
+        ))
+    
+    for result in results:
+        notify_import_event(
+            db, "import_created", result.import_id, result.target_district_id,
+            dossier_id=result.target_dossier_id,
+            entity_type=result.entity_type, status="pending"
+        )
+    
+    db.commit()
+    
+    for result in results:
+        audit_log.record(
+            "import_created", current_user, result.import_id, result.target_district_id,
+            batch_id=batch_id, entity_type=result.entity_type,
+            dossier_id=result.target_dossier_id, files_count=result.files_count
+        )
+    
+    return schemas.TopoSyncBatchResponse(
+        success=True,
+        message=f"{len(results)} imports créés avec succès",
+        batch_id=batch_id,
+        imports_count=len(results),
+        imports=results
+    )
@@ -2,13 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 Script de lancement de l'API FastAPI GeODOC
-Usage: python run.py [--reload] [--port PORT]
+Usage: python run.py [--reload] [--port PORT] [--workers N]
+
+Mode production multi-workers : redémarrage progressif des workers avec
+`kill -HUP <pid du superviseur>`.
 """
 
 import sys
 import argparse
 import uvicorn
 import os
+import shutil
+import tempfile
 from dotenv import load_dotenv
 
 # Forcer l'encodage UTF-8 sur Windows
@@ -19,6 +24,20 @@ if sys.platform == 'win32':
 
 load_dotenv()
 
+def default_workers() -> int:
+    """API_WORKERS, sinon un worker par cœur (plafonné : chaque worker ouvre son pool DB)"""
+    if os.getenv('API_WORKERS'):
+        return int(os.getenv('API_WORKERS'))
+    return max(1, min(os.cpu_count() or 1, 8))
+
+def prepare_metrics_dir():
+    """Répertoire partagé des métriques des workers, vidé à chaque démarrage"""
+    path = os.getenv('METRICS_MULTIPROC_DIR') or os.path.join(tempfile.gettempdir(), 'odocc_metrics')
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ['METRICS_MULTIPROC_DIR'] = path
+    return path
+
 def main():
     parser = argparse.ArgumentParser(description='Lancer l\'API FastAPI GeODOC')
     parser.add_argument(
@@ -38,15 +57,46 @@ def main():
         default=os.getenv('API_HOST', '0.0.0.0'),
         help='Hôte à écouter'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Nombre de processus workers (défaut : API_WORKERS ou nombre de cœurs)'
+    )
+    parser.add_argument(
+        '--graceful-timeout',
+        type=int,
+        default=int(os.getenv('API_GRACEFUL_TIMEOUT', 30)),
+        help='Secondes laissées aux requêtes en cours lors d\'un arrêt ou redémarrage'
+    )
+    parser.add_argument(
+        '--max-requests',
+        type=int,
+        default=int(os.getenv('API_MAX_REQUESTS', 0)) or None,
+        help='Recycler un worker après N requêtes (0 = jamais)'
+    )
     
     args = parser.parse_args()
     
+    if args.reload:
+        if args.workers and args.workers > 1:
+            parser.error('--reload est incompatible avec --workers > 1')
+        workers = 1
+    else:
+        workers = args.workers or default_workers()
+    
+    # Hérité par les workers (répartition de DB_MAX_CONNECTIONS)
+    os.environ['API_WORKERS'] = str(workers)
+    if workers > 1:
+        prepare_metrics_dir()
+    
     print("\n" + "="*60)
     print("🚀 Démarrage de l'API FastAPI GeODOC")
     print("="*60)
     print(f"📍 URL: http://{args.host}:{args.port}")
     print(f"📚 Documentation: http://{args.host}:{args.port}/docs")
     print(f"🔧 Mode: {'DÉVELOPPEMENT' if args.reload else 'PRODUCTION'}")
+    print(f"⚙️  Workers: {workers}")
     print("="*60 + "\n")
     
     # Lancer le serveur
@@ -55,6 +105,9 @@ def main():
         host=args.host,
         port=args.port,
         reload=args.reload,
+        workers=workers if workers > 1 else None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests,
         log_level="info",
         access_log=True
     )
@@ -1,6 +1,6 @@
 # schemas.py - Schémas Pydantic alignés avec GeODOC
-from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, TypeAdapter, field_validator
+from typing import Optional, List, Dict, Any, Literal, Union, Annotated
 from datetime import date, datetime
 from enum import Enum
 
@@ -41,6 +41,9 @@ class TokenResponse(BaseModel):
 
 # ========== PROPRIETE (aligné avec migration GeODOC) ==========
 class ProprieteData(BaseModel):
+    # Champs non déclarés conservés dans raw_data ; seuls ceux ci-dessous sont validés
+    model_config = ConfigDict(extra="allow")
+    
     # Champs obligatoires
     lot: str = Field(..., min_length=1, max_length=15)
     type_operation: TypeOperation
@@ -81,6 +84,9 @@ class ProprieteData(BaseModel):
 
 # ========== DEMANDEUR (aligné avec migration GeODOC) ==========
 class DemandeurData(BaseModel):
+    # Champs non déclarés conservés dans raw_data ; seuls ceux ci-dessous sont validés
+    model_config = ConfigDict(extra="allow")
+    
     # Champs obligatoires
     titre_demandeur: str = Field(..., max_length=20)
     nom_demandeur: str = Field(..., min_length=1, max_length=100)
@@ -123,12 +129,36 @@ class DemandeurData(BaseModel):
         return v
 
 # ========== SYNC REQUEST ==========
-class TopoSyncRequest(BaseModel):
-    entity_type: EntityType
+SYNC_MAX_FILE_IDS = 20
+
+class SyncRequestBase(BaseModel):
     action_suggested: ActionSuggested
     target_dossier_id: int = Field(..., gt=0)
-    entity_data: Dict[str, Any]
     metadata: Optional[Dict[str, Any]] = None
+    # Fichiers pré-uploadés via POST /topo-sync/files
+    file_ids: List[int] = Field(default_factory=list, max_length=SYNC_MAX_FILE_IDS)
+
+class ProprieteSyncRequest(SyncRequestBase):
+    entity_type: Literal[EntityType.PROPRIETE]
+    entity_data: ProprieteData
+
+class DemandeurSyncRequest(SyncRequestBase):
+    entity_type: Literal[EntityType.DEMANDEUR]
+    entity_data: DemandeurData
+
+# Union discriminée : entity_type choisit le schéma de entity_data
+TopoSyncRequest = Annotated[
+    Union[ProprieteSyncRequest, DemandeurSyncRequest],
+    Field(discriminator="entity_type")
+]
+
+SYNC_BATCH_MAX_ITEMS = 200
+
+# Validateurs construits une seule fois (validate_json : parsing et validation en une passe)
+SYNC_REQUEST_ADAPTER = TypeAdapter(TopoSyncRequest)
+SYNC_BATCH_ADAPTER = TypeAdapter(
+    Annotated[List[TopoSyncRequest], Field(min_length=1, max_length=SYNC_BATCH_MAX_ITEMS)]
+)
 
 # ========== RESPONSES ==========
 class FileResponse(BaseModel):
@@ -164,6 +194,13 @@ class TopoSyncResponse(BaseModel):
     files: List[FileResponse] = []
     import_date: datetime
 
+class TopoSyncBatchResponse(BaseModel):
+    success: bool
+    message: str
+    batch_id: str
+    imports_count: int
+    imports: List[TopoSyncResponse]
+
 class DossierSearchResult(BaseModel):
     id: int
     nom_dossier: str
@@ -202,6 +239,38 @@ class StagingItemResponse(BaseModel):
     processed_at: Optional[datetime] = None
     rejection_reason: Optional[str] = None
 
+class StagingItemSummary(BaseModel):
+    """Vue partielle d'un import (paramètres fields / view=summary)"""
+    id: int
+    batch_id: Optional[str] = None
+    entity_type: Optional[str] = None
+    action_suggested: Optional[str] = None
+    dossier_id: Optional[int] = None
+    dossier_nom: Optional[str] = None
+    dossier_numero_ouverture: Optional[int] = None
+    district_id: Optional[int] = None
+    district_nom: Optional[str] = None
+    raw_data: Optional[dict] = None
+    matched_entity_id: Optional[int] = None
+    matched_entity_details: Optional[dict] = None
+    match_confidence: Optional[float] = None
+    match_method: Optional[str] = None
+    has_warnings: Optional[bool] = None
+    warnings: Optional[List[str]] = None
+    files_count: Optional[int] = None
+    files: Optional[List[dict]] = None
+    topo_user_name: Optional[str] = None
+    import_date: Optional[datetime] = None
+    status: Optional[str] = None
+    processed_at: Optional[datetime] = None
+    rejection_reason: Optional[str] = None
+
+class StagingClaimResponse(BaseModel):
+    """Imports réservés au validateur jusqu'à claimed_until"""
+    lease_seconds: int
+    claimed_until: Optional[datetime] = None
+    imports: List[StagingItemSummary] = []
+
 class ValidateImportRequest(BaseModel):
     action: str = Field(..., pattern=r'^(accept|reject)$')
     rejection_reason: Optional[str] = Field(None, min_length=10)
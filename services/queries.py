@@ -0,0 +1,422 @@
+# services/queries.py
+"""Requêtes SQL nommées, partagées par les routers.
+
+Chaque requête est un objet text() construit une seule fois : le texte SQL est
+identique d'un appel à l'autre (cache de compilation SQLAlchemy, réutilisation
+des plans côté serveur). Les requêtes à filtres optionnels sont construites (et
+mises en cache) par ensemble de filtres actifs : chaque variante ne contient que
+ses prédicats, les valeurs restant liées, et son plan peut utiliser les index.
+"""
+from sqlalchemy import text
+from functools import lru_cache
+
+def _query(name: str, sql: str):
+    return text(sql).execution_options(query_name=name)
+
+def _where(filters: frozenset, predicates: dict, prefix: str = "WHERE") -> str:
+    """Prédicats des seuls filtres actifs, dans l'ordre de predicates"""
+    clauses = [sql for name, sql in predicates.items() if name in filters]
+    unknown = filters - predicates.keys()
+    if unknown:
+        raise ValueError(f"Filtres inconnus: {', '.join(sorted(unknown))}")
+    return f"{prefix} " + " AND ".join(clauses) if clauses else ""
+
+def active_filters(values: dict) -> dict:
+    """Filtres renseignés (None = filtre absent de la requête)"""
+    return {name: value for name, value in values.items() if value is not None}
+
+# Colonnes des entités GeODOC exposées dans les détails de matching
+PROPRIETE_COLUMNS = ["id", "lot", "titre", "proprietaire", "contenance", "nature", "vocation", "type_operation"]
+DEMANDEUR_COLUMNS = [
+    "id", "cin", "nom_demandeur", "prenom_demandeur", "date_naissance",
+    "titre_demandeur", "domiciliation", "telephone"
+]
+
+# Sous-ensemble joint dans la liste de staging (préfixes mp_ / md_)
+MATCHED_PROPRIETE_COLUMNS = ["id", "lot", "titre", "proprietaire", "contenance", "nature", "vocation"]
+MATCHED_DEMANDEUR_COLUMNS = ["id", "cin", "nom_demandeur", "prenom_demandeur", "date_naissance", "titre_demandeur"]
+
+_PROPRIETE_SELECT = ", ".join(f"p.{col}" for col in PROPRIETE_COLUMNS)
+_DEMANDEUR_SELECT = ", ".join(f"d.{col}" for col in DEMANDEUR_COLUMNS)
+
+# Tables d'imports autorisées dans les requêtes paramétrées par table
+IMPORT_TABLES = ("topo_imports", "topo_imports_archive")
+
+def _check_table(table: str):
+    if table not in IMPORT_TABLES:
+        raise ValueError(f"Table d'imports inconnue: {table}")
+
+# ============================================
+# AUTHENTIFICATION
+# ============================================
+
+TOPO_USER_LOGIN = _query("auth_login_user", """
+    SELECT id, username, email, full_name, password_hash, role, is_active, allowed_districts
+    FROM topo_users
+    WHERE username = :username
+""")
+
+TOPO_USER_TOUCH_TOKEN = _query("auth_touch_token_refresh", """
+    UPDATE topo_users
+    SET last_token_refresh = NOW()
+    WHERE id = :id
+""")
+
+TOPO_USER_ACTIVE = _query("auth_topo_user", """
+    SELECT id, username, email, full_name, role, allowed_districts
+    FROM topo_users
+    WHERE username = :username AND is_active = true
+""")
+
+GEODOC_USER_ACTIVE = _query("auth_geodoc_user", """
+    SELECT id, name, email, role, id_district
+    FROM users
+    WHERE email = :email AND status = true
+""")
+
+# ============================================
+# DOSSIERS
+# ============================================
+
+_DOSSIER_PREDICATES = {
+    "district_id": "d.id_district = :district_id",
+    "open_only": "d.date_fermeture IS NULL",
+}
+
+@lru_cache(maxsize=None)
+def dossier_search(filters: frozenset):
+    """Recherche de dossiers ; filtres : district_id, open_only"""
+    return _query("dossiers_search", f"""
+        SELECT
+            d.id, d.nom_dossier, d.numero_ouverture, d.commune, d.fokontany,
+            d.id_district, dist.nom_district, d.date_fermeture,
+            (SELECT COUNT(*) FROM proprietes p WHERE p.id_dossier = d.id) AS proprietes_count,
+            (SELECT COUNT(DISTINCT c.id_demandeur) FROM contenir c WHERE c.id_dossier = d.id) AS demandeurs_count
+        FROM dossiers d
+        JOIN districts dist ON d.id_district = dist.id
+        WHERE (
+            CAST(d.numero_ouverture AS TEXT) = :q
+            OR LOWER(d.nom_dossier) LIKE LOWER(:q_like)
+            OR LOWER(d.commune) LIKE LOWER(:q_like)
+        )
+        {_where(filters, _DOSSIER_PREDICATES, prefix="AND")}
+        ORDER BY
+            CASE WHEN CAST(d.numero_ouverture AS TEXT) = :q THEN 0 ELSE 1 END,
+            d.numero_ouverture DESC
+        LIMIT :limit
+    """)
+
+# ============================================
+# MATCHING (SYNCHRONISATION)
+# ============================================
+
+# Candidats : une sonde d'index par clé (lot, titre, réquisition), puis lecture par id
+# des seuls candidats ; *_match vaut NULL quand la clé manque d'un côté.
+# topo_normalize_ref : migrations/008_propriete_match_indexes.sql
+PROPRIETE_CANDIDATES = _query("sync_match_propriete", f"""
+    WITH candidates AS (
+        SELECT id FROM proprietes
+        WHERE id_dossier = :dossier_id AND topo_normalize_ref(lot) = topo_normalize_ref(:lot)
+        UNION
+        SELECT id FROM proprietes
+        WHERE id_dossier = :dossier_id AND topo_normalize_ref(titre) = topo_normalize_ref(:titre)
+        UNION
+        SELECT id FROM proprietes
+        WHERE id_dossier = :dossier_id
+        AND topo_normalize_ref(numero_requisition) = topo_normalize_ref(:requisition)
+    )
+    SELECT
+        {_PROPRIETE_SELECT},
+        topo_normalize_ref(p.lot) = topo_normalize_ref(:lot) AS lot_match,
+        topo_normalize_ref(p.titre) = topo_normalize_ref(:titre) AS titre_match,
+        topo_normalize_ref(p.numero_requisition) = topo_normalize_ref(:requisition) AS requisition_match
+    FROM candidates c
+    JOIN proprietes p ON p.id = c.id
+""")
+
+DEMANDEUR_BY_CIN = _query("sync_match_demandeur", f"""
+    SELECT {_DEMANDEUR_SELECT}
+    FROM demandeurs d
+    WHERE d.cin = :cin
+    LIMIT 1
+""")
+
+PROPRIETE_BY_ID = _query("staging_detail_match_propriete", f"""
+    SELECT {_PROPRIETE_SELECT}
+    FROM proprietes p
+    WHERE p.id = :id
+""")
+
+DEMANDEUR_BY_ID = _query("staging_detail_match_demandeur", f"""
+    SELECT {_DEMANDEUR_SELECT}
+    FROM demandeurs d
+    WHERE d.id = :id
+""")
+
+INSERT_IMPORT = _query("sync_insert_import", """
+    INSERT INTO topo_imports (
+        batch_id, import_date, topo_user_id, topo_user_name,
+        entity_type, action_suggested, target_dossier_id, target_district_id,
+        raw_data, has_warnings, warnings,
+        matched_entity_id, match_confidence, match_method, status
+    ) VALUES (
+        :batch_id, NOW(), :user_id, :user_name,
+        :entity_type, :action, :dossier_id, :district_id,
+        :raw_data, :has_warnings, :warnings,
+        :matched_id, :confidence, :method, 'pending'
+    ) RETURNING id, import_date
+""")
+
+# Une seule instruction pour toutes les pièces jointes d'une requête (tableaux parallèles)
+INSERT_FILES = _query("sync_insert_files", """
+    INSERT INTO topo_files (
+        import_id, original_name, stored_name, storage_path,
+        mime_type, file_size, file_extension, category, file_hash, uploaded_by, uploaded_at
+    )
+    SELECT
+        CAST(:import_id AS INTEGER), f.original, f.stored, f.path,
+        f.mime, f.size, f.ext, :category, f.hash, :uploaded_by, NOW()
+    FROM unnest(
+        CAST(:originals AS VARCHAR[]), CAST(:stored AS VARCHAR[]), CAST(:paths AS VARCHAR[]),
+        CAST(:mimes AS VARCHAR[]), CAST(:sizes AS BIGINT[]), CAST(:exts AS VARCHAR[]),
+        CAST(:hashes AS VARCHAR[])
+    ) AS f(original, stored, path, mime, size, ext, hash)
+    RETURNING id, stored_name
+""")
+
+# Rattachement des fichiers pré-uploadés : seulement ceux de l'appelant, encore libres
+ATTACH_PENDING_FILES = _query("sync_attach_files", """
+    UPDATE topo_files
+    SET import_id = :import_id
+    WHERE id = ANY(:file_ids)
+    AND import_id IS NULL
+    AND uploaded_by = :principal
+    RETURNING id, original_name, stored_name, file_size, category, file_extension, mime_type
+""")
+
+# ============================================
+# STAGING
+# ============================================
+
+# Expression SQL de chaque champ de la liste de staging (routers/staging.py)
+_STAGING_FIELD_SQL = {
+    "id": "ti.id",
+    "batch_id": "ti.batch_id",
+    "entity_type": "ti.entity_type",
+    "action_suggested": "ti.action_suggested",
+    "dossier_id": "ti.target_dossier_id AS dossier_id",
+    "district_id": "ti.target_district_id AS district_id",
+    "raw_data": "ti.raw_data",
+    "matched_entity_id": "ti.matched_entity_id",
+    "match_confidence": "ti.match_confidence",
+    "match_method": "ti.match_method",
+    "has_warnings": "ti.has_warnings",
+    "warnings": "ti.warnings",
+    "topo_user_name": "ti.topo_user_name",
+    "import_date": "ti.import_date",
+    "status": "ti.status",
+    "processed_at": "ti.processed_at",
+    "rejection_reason": "ti.rejection_reason",
+    "files_count": "(SELECT COUNT(*) FROM topo_files tf WHERE tf.import_id = ti.id) AS files_count",
+}
+
+# Champs calculés hors SQL : colonnes dont ils ont besoin
+_STAGING_FIELD_DEPENDENCIES = {
+    "dossier_nom": ("dossier_id",),
+    "dossier_numero_ouverture": ("dossier_id",),
+    "district_nom": ("district_id",),
+    "files": ("id",),
+}
+
+_STAGING_MATCHED_COLUMNS = ", ".join(
+    [f"mp.{col} AS mp_{col}" for col in MATCHED_PROPRIETE_COLUMNS]
+    + [f"md.{col} AS md_{col}" for col in MATCHED_DEMANDEUR_COLUMNS]
+)
+
+_STAGING_MATCHED_JOINS = """
+    LEFT JOIN proprietes mp ON ti.entity_type = 'propriete' AND mp.id = ti.matched_entity_id
+    LEFT JOIN demandeurs md ON ti.entity_type = 'demandeur' AND md.id = ti.matched_entity_id
+"""
+
+_STAGING_PREDICATES = {
+    "status": "ti.status = :status",
+    "entity_type": "ti.entity_type = :entity_type",
+    "district": "ti.target_district_id = :district",
+    "date_from": "ti.import_date >= :date_from",
+    "date_to": "ti.import_date < :date_to",
+}
+
+@lru_cache(maxsize=256)
+def staging_list(table: str, fields: frozenset, filters: frozenset):
+    """Page de staging : seulement les colonnes, sous-requêtes et jointures des champs demandés"""
+    _check_table(table)
+    needed = set(fields)
+    for field in fields:
+        needed.update(_STAGING_FIELD_DEPENDENCIES.get(field, ()))
+    needed.add("id")
+    columns = [sql for field, sql in _STAGING_FIELD_SQL.items() if field in needed]
+    joins = ""
+    if "matched_entity_details" in fields:
+        columns.append(_STAGING_MATCHED_COLUMNS)
+        joins = _STAGING_MATCHED_JOINS
+    return _query("staging_list", f"""
+        SELECT {", ".join(columns)}
+        FROM {table} ti
+        {joins}
+        {_where(filters, _STAGING_PREDICATES)}
+        ORDER BY ti.import_date DESC
+        LIMIT :limit OFFSET :offset
+    """)
+
+STAGING_LIST_FILES = _query("staging_list_files", """
+    SELECT import_id, original_name, file_size, file_extension, category, mime_type
+    FROM topo_files
+    WHERE import_id = ANY(:import_ids)
+    ORDER BY import_id, category, original_name
+""")
+
+@lru_cache(maxsize=None)
+def staging_stats(table: str, filters: frozenset):
+    """Comptages agrégés par statut, type et district"""
+    _check_table(table)
+    return _query("staging_stats", f"""
+        SELECT
+            ti.status, ti.entity_type, ti.target_district_id,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE ti.has_warnings) AS with_warnings
+        FROM {table} ti
+        {_where(filters, _STAGING_PREDICATES)}
+        GROUP BY ti.status, ti.entity_type, ti.target_district_id
+    """)
+
+@lru_cache(maxsize=None)
+def staging_export(table: str, filters: frozenset):
+    _check_table(table)
+    return _query("staging_export", f"""
+        SELECT
+            ti.id, ti.batch_id, ti.import_date, ti.status, ti.entity_type, ti.action_suggested,
+            ti.target_dossier_id AS dossier_id, ti.target_district_id AS district_id,
+            ti.topo_user_id, ti.topo_user_name, ti.has_warnings, ti.warnings,
+            ti.matched_entity_id, ti.match_confidence, ti.match_method,
+            ti.processed_at, ti.processed_by, ti.rejection_reason,
+            (SELECT COUNT(*) FROM topo_files tf WHERE tf.import_id = ti.id) AS files_count,
+            ti.raw_data
+        FROM {table} ti
+        {_where(filters, _STAGING_PREDICATES)}
+        ORDER BY ti.import_date, ti.id
+    """)
+
+IMPORT_DETAIL = _query("staging_detail", """
+    SELECT ti.*
+    FROM topo_imports ti
+    WHERE ti.id = :id
+""")
+
+IMPORT_DETAIL_ARCHIVE = _query("staging_detail_archive", """
+    SELECT ta.*
+    FROM topo_imports_archive ta
+    WHERE ta.id = :id
+""")
+
+IMPORT_FILES = _query("staging_detail_files", """
+    SELECT original_name, file_size, file_extension, category, storage_path, mime_type
+    FROM topo_files
+    WHERE import_id = :import_id
+""")
+
+# Verrou de ligne : deux validations concurrentes du même import sont sérialisées
+IMPORT_FOR_VALIDATION = _query("staging_validate_get", """
+    SELECT ti.*, COALESCE(ti.claimed_until > NOW(), false) AS lease_active
+    FROM topo_imports ti
+    WHERE ti.id = :id
+    FOR UPDATE
+""")
+
+UPDATE_IMPORT_STATUS = _query("staging_validate_update", """
+    UPDATE topo_imports
+    SET status = :status, processed_at = NOW(),
+        processed_by = :user_id, rejection_reason = :reason,
+        claimed_by = NULL, claimed_until = NULL
+    WHERE id = :id
+""")
+
+# ============================================
+# BAUX DE REVUE (FILE D'ATTENTE DES VALIDATEURS)
+# ============================================
+
+# Les N plus anciens imports libres (ou déjà à soi) du district ; SKIP LOCKED :
+# deux validateurs simultanés obtiennent des lots disjoints sans s'attendre
+CLAIM_IMPORTS = _query("staging_claim", """
+    WITH next AS (
+        SELECT id, import_date
+        FROM topo_imports
+        WHERE status = 'pending'
+        AND target_district_id = :district
+        AND (claimed_until IS NULL OR claimed_until <= NOW() OR claimed_by = :user_id)
+        ORDER BY import_date, id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE topo_imports ti
+    SET claimed_by = :user_id, claimed_until = NOW() + make_interval(secs => :lease)
+    FROM next
+    WHERE ti.id = next.id AND ti.import_date = next.import_date
+    RETURNING
+        ti.id, ti.entity_type, ti.action_suggested,
+        ti.target_dossier_id AS dossier_id, ti.target_district_id AS district_id,
+        ti.has_warnings, ti.topo_user_name, ti.import_date, ti.status, ti.claimed_until,
+        (SELECT COUNT(*) FROM topo_files tf WHERE tf.import_id = ti.id) AS files_count
+""")
+
+RENEW_CLAIM = _query("staging_claim_renew", """
+    UPDATE topo_imports
+    SET claimed_until = NOW() + make_interval(secs => :lease)
+    WHERE id = :id
+    AND status = 'pending'
+    AND claimed_by = :user_id
+    RETURNING claimed_until
+""")
+
+RELEASE_CLAIM = _query("staging_claim_release", """
+    UPDATE topo_imports
+    SET claimed_by = NULL, claimed_until = NULL
+    WHERE id = :id
+    AND status = 'pending'
+    AND claimed_by = :user_id
+    RETURNING id
+""")
+
+FILE_FOR_DOWNLOAD = _query("staging_file_lookup", """
+    SELECT
+        tf.storage_path,
+        tf.mime_type,
+        COALESCE(ti.target_district_id, ta.target_district_id) AS target_district_id
+    FROM topo_files tf
+    LEFT JOIN topo_imports ti ON tf.import_id = ti.id
+    LEFT JOIN topo_imports_archive ta ON tf.import_id = ta.id
+    WHERE tf.import_id = :import_id
+    AND tf.stored_name = :filename
+    AND (ti.id IS NOT NULL OR ta.id IS NOT NULL)
+""")
+
+# ============================================
+# FLUX DE CHANGEMENTS
+# ============================================
+
+@lru_cache(maxsize=None)
+def change_feed(name: str, key: str, columns: str, source: str, district_filter: str, id_column: str,
+                after: bool, by_district: bool):
+    """Page d'un flux ; after : reprise après (:after_ts, :after_id), by_district : filtre :districts"""
+    predicates = {
+        "after": f"({key}, {id_column}) > (:after_ts, :after_id)",
+        "by_district": district_filter,
+    }
+    active = frozenset(name for name, on in (("after", after), ("by_district", by_district)) if on)
+    return _query(f"changes_{name}", f"""
+        SELECT {columns}, {key} AS change_ts
+        FROM {source}
+        WHERE {key} < NOW() - make_interval(secs => :lag)
+        {_where(active, predicates, prefix="AND")}
+        ORDER BY {key}, {id_column}
+        LIMIT :limit
+    """)
@@ -0,0 +1,7 @@
+# tests/conftest.py
+"""Configuration minimale pour importer les modules sans base de données"""
+import os
+
+# Les modules lisent leur configuration à l'import ; aucune connexion n'est ouverte
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
@@ -0,0 +1,29 @@
+# tests/test_changes_cursor.py
+"""Curseur opaque du flux de changements"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from routers.changes import CHANGE_FEEDS, _decode_cursor, _encode_cursor
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = _encode_cursor({name: (ts.isoformat(), 42) for name in CHANGE_FEEDS})
+
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == {name: (ts, 42) for name in CHANGE_FEEDS}
+
+def test_empty_cursor_starts_from_scratch():
+    assert _decode_cursor(None) == {}
+    assert _decode_cursor("") == {}
+
+def test_unknown_feeds_are_ignored():
+    cursor = _encode_cursor({"inconnu": ("2026-01-01T00:00:00", 1)})
+    assert _decode_cursor(cursor) == {}
+
+@pytest.mark.parametrize("cursor", ["!!!", _encode_cursor({"imports": ["pas une date", 1]}), _encode_cursor([1, 2])])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        _decode_cursor(cursor)
+    assert exc.value.status_code == 400
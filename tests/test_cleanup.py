@@ -0,0 +1,88 @@
+# tests/test_cleanup.py
+"""Garde-fous du nettoyage des lignes topo_files sans fichier"""
+from collections import namedtuple
+
+import pytest
+
+from utils import cleanup
+from utils.cleanup import CleanupReport, remove_dangling_rows, upload_dir_available
+
+FileRow = namedtuple("FileRow", "id storage_path import_missing")
+
+class FakeEngine:
+    """Engine factice : une page de lignes topo_files, suppressions enregistrées"""
+
+    def __init__(self, rows):
+        self.pages = [rows, []]
+        self.deleted = []
+
+    def connect(self):
+        return self
+
+    begin = connect
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        name = statement.get_execution_options().get("query_name")
+        result = type("Result", (), {})()
+        if name == "cleanup_table_exists":
+            result.scalar = lambda: False
+        elif name == "cleanup_scan_files":
+            rows = self.pages.pop(0)
+            result.fetchall = lambda: rows
+        elif name == "cleanup_delete_dangling":
+            self.deleted.extend(params["ids"])
+            result.rowcount = len(params["ids"])
+        return result
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cleanup, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(cleanup, "_pause", lambda: None)
+    monkeypatch.setattr(cleanup, "CLEANUP_MAX_MISSING_ROWS", 2)
+    return tmp_path
+
+def _run(monkeypatch, rows, sample, force=False):
+    engine = FakeEngine(rows)
+    monkeypatch.setattr(cleanup, "engine", engine)
+    monkeypatch.setattr(cleanup, "_sample_known_paths", lambda: sample)
+    report = CleanupReport()
+    remove_dangling_rows(report, force=force)
+    return engine.deleted, report
+
+def _missing_rows(upload_dir, count):
+    return [FileRow(i, str(upload_dir / f"absent_{i}.pdf"), False) for i in range(1, count + 1)]
+
+def test_upload_dir_available(tmp_path, monkeypatch):
+    present = tmp_path / "present.pdf"
+    present.write_bytes(b"x")
+    monkeypatch.setattr(cleanup, "UPLOAD_DIR", str(tmp_path))
+
+    assert upload_dir_available([])
+    assert upload_dir_available([str(tmp_path / "absent.pdf"), str(present)])
+    assert not upload_dir_available([str(tmp_path / "absent.pdf")])
+
+    monkeypatch.setattr(cleanup, "UPLOAD_DIR", str(tmp_path / "demonte"))
+    assert not upload_dir_available([])
+
+def test_missing_file_rows_are_capped_per_pass(upload_dir, monkeypatch):
+    deleted, report = _run(monkeypatch, _missing_rows(upload_dir, 5), sample=[])
+    assert deleted == [1, 2]
+    assert report.missing_files_kept == 3
+    assert report.as_dict()["missing_files_kept"] == 3
+
+def test_force_lifts_the_cap(upload_dir, monkeypatch):
+    deleted, report = _run(monkeypatch, _missing_rows(upload_dir, 5), sample=[], force=True)
+    assert deleted == [1, 2, 3, 4, 5]
+    assert report.missing_files_kept == 0
+
+def test_unavailable_upload_dir_only_removes_orphan_rows(upload_dir, monkeypatch):
+    rows = _missing_rows(upload_dir, 3) + [FileRow(9, str(upload_dir / "orphelin.pdf"), True)]
+    deleted, report = _run(monkeypatch, rows, sample=[str(upload_dir / "absent.pdf")], force=True)
+    assert deleted == [9]
+    assert report.missing_files_kept == 3
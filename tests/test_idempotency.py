@@ -0,0 +1,33 @@
+# tests/test_idempotency.py
+"""Empreinte de contenu des soumissions idempotentes"""
+import asyncio
+import io
+
+from fastapi import UploadFile
+
+from utils.idempotency import content_hash, principal_of
+
+def _upload(name: str, data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=name)
+
+def _hash(sync_data, files=None) -> str:
+    return asyncio.run(content_hash(sync_data, files))
+
+def test_hash_ignores_key_order():
+    assert _hash({"a": 1, "b": [1, 2]}) == _hash({"b": [1, 2], "a": 1})
+
+def test_hash_depends_on_data_and_files():
+    base = _hash({"lot": "L1"}, [_upload("plan.pdf", b"v1")])
+    assert base == _hash({"lot": "L1"}, [_upload("plan.pdf", b"v1")])
+    assert base != _hash({"lot": "L2"}, [_upload("plan.pdf", b"v1")])
+    assert base != _hash({"lot": "L1"}, [_upload("plan.pdf", b"v2")])
+    assert base != _hash({"lot": "L1"}, [_upload("autre.pdf", b"v1")])
+    assert base != _hash({"lot": "L1"})
+
+def test_hash_rewinds_files():
+    upload = _upload("plan.pdf", b"contenu")
+    _hash({}, [upload])
+    assert asyncio.run(upload.read()) == b"contenu"
+
+def test_principal_separates_sources():
+    assert principal_of({"source": "topomanager", "id": 1}) != principal_of({"source": "geodoc", "id": 1})
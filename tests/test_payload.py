@@ -0,0 +1,64 @@
+# tests/test_payload.py
+"""Corps de synchronisation : plafond de taille et décompression"""
+import asyncio
+import gzip
+
+import pytest
+from fastapi import HTTPException, Request
+
+from utils import payload
+
+def _request(body: bytes, headers: dict = None, chunk_size: int = 1024) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    return Request(scope, receive)
+
+def _read(body: bytes, headers: dict = None) -> bytes:
+    return asyncio.run(payload.read_body(_request(body, headers)))
+
+@pytest.fixture(autouse=True)
+def small_limit(monkeypatch):
+    monkeypatch.setattr(payload, "MAX_BODY_BYTES", 4096)
+
+def _status(body: bytes, headers: dict = None) -> int:
+    with pytest.raises(HTTPException) as exc:
+        _read(body, headers)
+    return exc.value.status_code
+
+def test_plain_body_under_limit():
+    assert _read(b"x" * 4096) == b"x" * 4096
+
+def test_plain_body_over_limit():
+    assert _status(b"x" * 4097) == 413
+
+def test_gzip_body_is_decompressed():
+    assert _read(gzip.compress(b'{"a": 1}'), {"Content-Encoding": "gzip"}) == b'{"a": 1}'
+
+def test_gzip_bomb_is_capped_after_decompression():
+    bomb = gzip.compress(b"\0" * 100000)
+    assert len(bomb) < 4096
+    assert _status(bomb, {"Content-Encoding": "gzip"}) == 413
+
+def test_invalid_or_truncated_gzip():
+    assert _status(b"pas du gzip", {"Content-Encoding": "gzip"}) == 400
+    assert _status(gzip.compress(b"x" * 1000)[:-12], {"Content-Encoding": "gzip"}) == 400
+
+def test_unknown_encoding():
+    assert _status(b"x", {"Content-Encoding": "br"}) == 415
+
+def test_zstd_body_is_decompressed():
+    zstandard = pytest.importorskip("zstandard")
+    body = zstandard.ZstdCompressor().compress(b'{"a": 1}')
+    assert _read(body, {"Content-Encoding": "zstd"}) == b'{"a": 1}'
@@ -0,0 +1,65 @@
+# tests/test_query_budget.py
+"""Budget de requêtes SQL de la liste de staging (en-tête Server-Timing)
+
+Nécessite une base PostgreSQL migrée : TEST_DATABASE_URL=postgresql://... pytest tests
+"""
+import os
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL non défini", allow_module_level=True)
+
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.setdefault("SECRET_KEY", "test")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from database import engine
+from main import app
+from utils.request_stats import parse_server_timing, query_count
+from utils.security import verify_api_key_or_jwt
+
+# Liste de staging + fichiers de la page, quelle que soit la taille de la page
+STAGING_LIST_BUDGET = 2
+STAGING_LIST_FIELDS = "id,status,files_count,files,raw_data,matched_entity_details"
+
+SUPER_ADMIN = {"source": "geodoc", "id": 0, "name": "test", "email": None, "role": "super_admin", "id_district": None}
+
+@pytest.fixture
+def client():
+    batch_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        for _ in range(5):
+            conn.execute(text("""
+                INSERT INTO topo_imports (batch_id, entity_type, action_suggested, raw_data, status)
+                VALUES (:batch_id, 'propriete', 'create', '{}', 'pending')
+            """), {"batch_id": batch_id})
+
+    # Authentification hors budget : seules les requêtes de l'endpoint sont comptées
+    app.dependency_overrides[verify_api_key_or_jwt] = lambda: SUPER_ADMIN
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(verify_api_key_or_jwt, None)
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM topo_imports WHERE batch_id = :batch_id"), {"batch_id": batch_id})
+
+def test_staging_list_query_budget(client):
+    counts = {}
+    for limit in (2, 50):
+        response = client.get("/api/v1/staging/", params={"fields": STAGING_LIST_FIELDS, "limit": limit})
+
+        assert response.status_code == 200
+        assert response.json()
+        assert "server-timing" in response.headers
+        timing = parse_server_timing(response.headers["server-timing"])
+        assert {"db", "db-queries", "total"} <= timing.keys()
+        counts[limit] = query_count(response)
+
+    # Pas de requête par ligne : le nombre de requêtes ne dépend pas de la taille de la page
+    assert counts[2] == counts[50]
+    assert counts[50] <= STAGING_LIST_BUDGET
@@ -0,0 +1,62 @@
+# tests/test_rate_limit.py
+"""Token buckets (mémoire et SQLite) et créneaux DB"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from utils import rate_limit
+from utils.rate_limit import MemoryBucketBackend, SqliteBucketBackend, _refill
+
+def test_refill_is_capped_at_burst():
+    assert _refill(0, 0.0, 2.0, rate=1.0, burst=5) == 2.0
+    assert _refill(4, 0.0, 100.0, rate=1.0, burst=5) == 5
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBucketBackend()
+    return SqliteBucketBackend(str(tmp_path / "buckets.sqlite"))
+
+def test_burst_then_refusal(backend):
+    for _ in range(3):
+        assert backend.acquire("user:1", rate=1.0, burst=3) == 0.0
+    retry_after = backend.acquire("user:1", rate=1.0, burst=3)
+    assert 0 < retry_after <= 1.0
+
+def test_buckets_are_per_key(backend):
+    assert backend.acquire("user:1", rate=1.0, burst=1) == 0.0
+    assert backend.acquire("user:1", rate=1.0, burst=1) > 0
+    assert backend.acquire("user:2", rate=1.0, burst=1) == 0.0
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBucketBackend(max_keys=2)
+    backend.acquire("a", rate=1.0, burst=1)
+    backend.acquire("b", rate=1.0, burst=1)
+    backend.acquire("c", rate=1.0, burst=1)
+    assert list(backend._buckets) == ["b", "c"]
+
+def test_sqlite_sweep_removes_idle_buckets(tmp_path):
+    backend = SqliteBucketBackend(str(tmp_path / "buckets.sqlite"))
+    backend.acquire("user:1", rate=1.0, burst=1)
+    count = "SELECT COUNT(*) FROM buckets"
+
+    backend.sweep()
+    assert backend._conn().execute(count).fetchone()[0] == 1
+
+    backend.sweep(now=backend._last_sweep + rate_limit.BUCKET_IDLE_SECONDS + 1)
+    assert backend._conn().execute(count).fetchone()[0] == 0
+
+def test_db_slot_sheds_when_saturated(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(rate_limit, "_db_semaphore", asyncio.Semaphore(1))
+        monkeypatch.setattr(rate_limit, "DB_CONCURRENCY_WAIT_MS", 10)
+        await rate_limit.acquire_db_slot()
+        with pytest.raises(HTTPException) as exc:
+            await rate_limit.acquire_db_slot()
+        assert exc.value.status_code == 503
+        rate_limit.release_db_slot()
+        await rate_limit.acquire_db_slot()
+        rate_limit.release_db_slot()
+
+    asyncio.run(scenario())
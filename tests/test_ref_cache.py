@@ -0,0 +1,81 @@
+# tests/test_ref_cache.py
+"""Cache de référence : TTL, éviction LRU et génération d'invalidation"""
+from collections import namedtuple
+
+import pytest
+
+from utils import ref_cache
+from utils.ref_cache import RefCache
+
+Row = namedtuple("Row", "id nom")
+
+class FakeConn:
+    """Connexion factice : renvoie les lignes demandées et compte les lectures"""
+
+    def __init__(self, on_execute=None):
+        self.reads = []
+        self.on_execute = on_execute
+
+    def execute(self, query, params):
+        self.reads.append(sorted(params["ids"]))
+        if self.on_execute:
+            self.on_execute()
+        rows = [Row(key, f"n{key}") for key in params["ids"]]
+        return type("Result", (), {"fetchall": lambda self: rows})()
+
+@pytest.fixture(autouse=True)
+def no_listener(monkeypatch):
+    monkeypatch.setattr(ref_cache, "_listening", True)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ref_cache.time, "monotonic", lambda: now[0])
+    return now
+
+def _cache(**kwargs) -> RefCache:
+    return RefCache("test", None, Row, **kwargs)
+
+def test_misses_are_loaded_in_one_query_then_hit():
+    cache, conn = _cache(), FakeConn()
+    assert cache.get_many(conn, [1, 2, None, 2]) == {1: Row(1, "n1"), 2: Row(2, "n2")}
+    assert cache.get(conn, 1) == Row(1, "n1")
+    assert conn.reads == [[1, 2]]
+
+def test_entries_expire_after_ttl(clock):
+    cache, conn = _cache(ttl=10), FakeConn()
+    cache.get(conn, 1)
+    clock[0] += 5
+    cache.get(conn, 1)
+    clock[0] += 10
+    cache.get(conn, 1)
+    assert conn.reads == [[1], [1]]
+
+def test_least_recently_used_entry_is_evicted():
+    cache, conn = _cache(max_entries=2), FakeConn()
+    cache.get_many(conn, [1, 2])
+    cache.get(conn, 1)
+    cache.get(conn, 3)
+    assert list(cache._entries) == [1, 3]
+
+def test_invalidate_one_or_all():
+    cache, conn = _cache(), FakeConn()
+    cache.get_many(conn, [1, 2])
+    cache.invalidate(1)
+    assert list(cache._entries) == [2]
+    cache.invalidate()
+    assert not cache._entries
+
+def test_invalidation_during_load_is_not_cached():
+    cache = _cache()
+    conn = FakeConn(on_execute=cache.invalidate)
+    assert cache.get(conn, 1) == Row(1, "n1")
+    assert not cache._entries
+
+def test_notification_invalidates_target_cache(monkeypatch):
+    cache = _cache()
+    cache.get(FakeConn(), 7)
+    monkeypatch.setitem(ref_cache.CACHES, "dossiers", cache)
+    ref_cache._on_ref_change('{"table": "dossiers", "id": 7}')
+    assert not cache._entries
+    ref_cache._on_ref_change("pas du json")
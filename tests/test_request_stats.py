@@ -0,0 +1,52 @@
+# tests/test_request_stats.py
+"""Budget par requête : en-tête Server-Timing et son décodage"""
+from utils.request_stats import RequestStats, parse_server_timing, query_count, timed, _current_stats
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+def test_server_timing_round_trip():
+    stats = RequestStats()
+    stats.queries = 3
+    stats.db_time = 0.0125
+    stats.file_ops = 2
+
+    timing = parse_server_timing(stats.server_timing())
+
+    assert set(timing) == {"db", "db-queries", "auth", "file", "file-ops", "total"}
+    assert timing["db"]["dur"] == 12.5
+    assert timing["db-queries"]["desc"] == "3"
+    assert timing["file-ops"]["desc"] == "2"
+    assert timing["total"]["dur"] >= 0
+
+def test_parse_server_timing_tolerates_empty_and_bare_metrics():
+    assert parse_server_timing("") == {}
+    assert parse_server_timing(None) == {}
+    assert parse_server_timing('cache, db;dur=1.5;desc="lent"') == {
+        "cache": {}, "db": {"dur": 1.5, "desc": "lent"}
+    }
+
+def test_query_count():
+    assert query_count(FakeResponse({"server-timing": 'db;dur=2.00, db-queries;desc="4"'})) == 4
+    assert query_count(FakeResponse({})) == 0
+
+def test_timed_accumulates_into_current_request():
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        with timed("file"):
+            pass
+        with timed("file"):
+            pass
+        with timed("auth"):
+            pass
+    finally:
+        _current_stats.reset(token)
+
+    assert stats.file_ops == 2
+    assert stats.file_time >= 0 and stats.auth_time >= 0
+
+def test_timed_outside_request_is_noop():
+    with timed("file"):
+        pass
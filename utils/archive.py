@@ -0,0 +1,159 @@
+# utils/archive.py
+"""Partitions mensuelles de topo_imports et archivage des imports traités"""
+from sqlalchemy import text
+from datetime import date
+import logging
+import os
+import re
+import time
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_STATUSES = [s.strip() for s in os.getenv("ARCHIVE_STATUSES", "validated,rejected").split(",") if s.strip()]
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_BATCH_PAUSE_MS = int(os.getenv("ARCHIVE_BATCH_PAUSE_MS", "100"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+IMPORTS_TABLE = "topo_imports"
+ARCHIVE_TABLE = "topo_imports_archive"
+
+_PARTITION_NAME = re.compile(r"^topo_imports_(\d{4})_(\d{2})$")
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def _is_partitioned(conn) -> bool:
+    return conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = :table
+        )
+    """).execution_options(query_name="archive_is_partitioned"), {"table": IMPORTS_TABLE}).scalar()
+
+def _partitions(conn) -> list:
+    rows = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table
+    """).execution_options(query_name="archive_list_partitions"), {"table": IMPORTS_TABLE}).fetchall()
+    return [row.relname for row in rows]
+
+def ensure_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> list:
+    """Créer les partitions mensuelles manquantes jusqu'à months_ahead mois"""
+    created = []
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            logger.warning("topo_imports n'est pas partitionnée (migration 004 non appliquée)")
+            return created
+
+        existing = set(_partitions(conn))
+        current = date.today().replace(day=1)
+        for offset in range(months_ahead + 1):
+            start = _add_months(current, offset)
+            name = f"{IMPORTS_TABLE}_{start:%Y_%m}"
+            if name in existing:
+                continue
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {IMPORTS_TABLE} '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+            ).execution_options(query_name="archive_create_partition"))
+            created.append(name)
+
+    if created:
+        logger.info(f"Partitions topo_imports créées: {', '.join(created)}")
+    return created
+
+def _shared_columns(conn) -> list:
+    """Colonnes communes à topo_imports et à l'archive (l'ordre de la table source)"""
+    rows = conn.execute(text("""
+        SELECT src.column_name
+        FROM information_schema.columns src
+        JOIN information_schema.columns dst
+          ON dst.table_name = :archive AND dst.column_name = src.column_name
+        WHERE src.table_name = :table
+        ORDER BY src.ordinal_position
+    """).execution_options(query_name="archive_columns"), {"table": IMPORTS_TABLE, "archive": ARCHIVE_TABLE}).fetchall()
+    return [row.column_name for row in rows]
+
+def archive_processed_imports(after_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Déplacer les imports traités depuis plus de after_days jours vers l'archive, par lots"""
+    with engine.connect() as conn:
+        columns = _shared_columns(conn)
+    if not columns:
+        logger.warning("Table topo_imports_archive absente (migration 004 non appliquée)")
+        return 0
+    column_list = ", ".join(columns)
+
+    move = text(f"""
+        WITH batch AS (
+            SELECT id, import_date
+            FROM {IMPORTS_TABLE}
+            WHERE status = ANY(:statuses)
+            AND processed_at < NOW() - make_interval(days => :days)
+            ORDER BY processed_at
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        ), moved AS (
+            DELETE FROM {IMPORTS_TABLE} ti
+            USING batch
+            WHERE ti.id = batch.id AND ti.import_date = batch.import_date
+            RETURNING ti.*
+        )
+        INSERT INTO {ARCHIVE_TABLE} ({column_list}, archived_at)
+        SELECT {column_list}, NOW() FROM moved
+    """).execution_options(query_name="archive_move_batch")
+    params = {"statuses": ARCHIVE_STATUSES, "days": after_days, "batch_size": batch_size}
+
+    total = 0
+    while True:
+        # Une transaction courte par lot : verrous brefs, pas de longue transaction
+        with engine.begin() as conn:
+            moved = conn.execute(move, params).rowcount
+        total += moved
+        if moved < batch_size:
+            break
+        time.sleep(ARCHIVE_BATCH_PAUSE_MS / 1000)
+
+    logger.info(f"Archivage topo_imports: {total} import(s) déplacé(s)")
+    return total
+
+def drop_empty_partitions(after_days: int = ARCHIVE_AFTER_DAYS) -> list:
+    """Supprimer les partitions mensuelles entièrement archivées"""
+    dropped = []
+    limit = date.today().toordinal() - after_days
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            return dropped
+        for name in sorted(_partitions(conn)):
+            match = _PARTITION_NAME.match(name)
+            if not match:
+                continue
+            end = _add_months(date(int(match.group(1)), int(match.group(2)), 1), 1)
+            if end.toordinal() > limit:
+                continue
+            has_rows = conn.execute(text(
+                f'SELECT EXISTS (SELECT 1 FROM "{name}")'
+            ).execution_options(query_name="archive_partition_has_rows")).scalar()
+            if not has_rows:
+                conn.execute(text(f'DROP TABLE "{name}"').execution_options(query_name="archive_drop_partition"))
+                dropped.append(name)
+
+    if dropped:
+        logger.info(f"Partitions vides supprimées: {', '.join(dropped)}")
+    return dropped
+
+def run_archival():
+    """Tâche planifiée : partitions à venir, archivage, partitions vidées"""
+    try:
+        ensure_partitions()
+        archive_processed_imports()
+        drop_empty_partitions()
+    except Exception as e:
+        logger.error(f"Archivage topo_imports en échec: {e}")
@@ -0,0 +1,197 @@
+# utils/audit.py
+"""Journal d'audit du cycle de vie des imports : file en mémoire, écriture groupée en arrière-plan"""
+from sqlalchemy import text
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from database import engine
+from utils.idempotency import principal_of
+from utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "True").lower() == "true"
+# Au-delà, les nouveaux événements sont perdus (comptés) plutôt que de ralentir les requêtes
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+AUDIT_MAX_RETRIES = int(os.getenv("AUDIT_MAX_RETRIES", "3"))
+
+AUDIT_EVENTS = Counter(
+    "audit_events_total", "Événements d'audit (written, dropped_full, dropped_error)", ["result"]
+)
+AUDIT_QUEUE_DEPTH = Gauge("audit_queue_depth", "Événements d'audit en attente d'écriture")
+AUDIT_FLUSH_DURATION = Histogram("audit_flush_seconds", "Durée d'écriture d'un lot d'audit")
+
+# Un lot = une instruction, quel que soit le nombre d'événements (tableaux parallèles)
+INSERT_AUDIT_EVENTS = text("""
+    INSERT INTO topo_audit_events (
+        occurred_at, event_type, import_id, district_id, actor, actor_name, details
+    )
+    SELECT * FROM unnest(
+        CAST(:occurred_at AS TIMESTAMPTZ[]), CAST(:event_types AS VARCHAR[]),
+        CAST(:import_ids AS INTEGER[]), CAST(:district_ids AS INTEGER[]),
+        CAST(:actors AS VARCHAR[]), CAST(:actor_names AS VARCHAR[]), CAST(:details AS TEXT[])
+    )
+""").execution_options(query_name="audit_insert_events")
+
+class AuditLog:
+    """record() ne bloque jamais : l'événement est mis en file, un thread l'écrit par lots"""
+
+    def __init__(self, maxsize: int = AUDIT_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._overflowing = False
+        self.written = 0
+        self.dropped_full = 0
+        self.dropped_error = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="audit-writer")
+                self._thread.start()
+
+    def record(self, event_type: str, current_user: Optional[dict] = None, import_id: Optional[int] = None,
+               district_id: Optional[int] = None, **details):
+        if not AUDIT_ENABLED:
+            return
+        self.start()
+        event = (
+            datetime.now(timezone.utc),
+            event_type,
+            import_id,
+            district_id,
+            principal_of(current_user) if current_user else None,
+            (current_user.get("full_name") or current_user.get("username") or current_user.get("name"))
+            if current_user else None,
+            json.dumps(details, default=str) if details else None
+        )
+        try:
+            self._queue.put_nowait(event)
+            self._overflowing = False
+        except queue.Full:
+            self.dropped_full += 1
+            AUDIT_EVENTS.inc(result="dropped_full")
+            if not self._overflowing:
+                logger.warning("File d'audit pleine : événements perdus jusqu'à résorption")
+                self._overflowing = True
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def _next_batch(self) -> list:
+        """Attendre un premier événement, puis compléter le lot jusqu'à AUDIT_FLUSH_SECONDS"""
+        try:
+            batch = [self._queue.get(timeout=AUDIT_FLUSH_SECONDS)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + AUDIT_FLUSH_SECONDS
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                # Délai écoulé ou arrêt : prendre ce qui est déjà en file, sans attendre
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list):
+        columns = list(zip(*batch))
+        params = {
+            "occurred_at": list(columns[0]),
+            "event_types": list(columns[1]),
+            "import_ids": list(columns[2]),
+            "district_ids": list(columns[3]),
+            "actors": list(columns[4]),
+            "actor_names": list(columns[5]),
+            "details": list(columns[6])
+        }
+        for attempt in range(AUDIT_MAX_RETRIES):
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(INSERT_AUDIT_EVENTS, params)
+                AUDIT_FLUSH_DURATION.observe(time.perf_counter() - start)
+                self.written += len(batch)
+                AUDIT_EVENTS.inc(len(batch), result="written")
+                return
+            except Exception as e:
+                logger.warning(f"Écriture du journal d'audit (tentative {attempt + 1}): {e}")
+                if self._stop.wait(min(2 ** attempt, 10)):
+                    break
+        self.dropped_error += len(batch)
+        AUDIT_EVENTS.inc(len(batch), result="dropped_error")
+        logger.error(f"{len(batch)} événement(s) d'audit perdu(s) après {AUDIT_MAX_RETRIES} tentatives")
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def stop(self, timeout: float = 10):
+        """Vider la file avant l'arrêt du worker"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": AUDIT_ENABLED,
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "dropped_full": self.dropped_full,
+            "dropped_error": self.dropped_error
+        }
+
+audit_log = AuditLog()
+
+@lru_cache(maxsize=None)
+def _recent_events_query(filters: frozenset):
+    """Une variante par ensemble de filtres actifs (import_id, event_type)"""
+    clauses = [f"{name} = :{name}" for name in ("import_id", "event_type") if name in filters]
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+    return text(f"""
+        SELECT id, occurred_at, event_type, import_id, district_id, actor, actor_name, details
+        FROM topo_audit_events
+        {where}
+        ORDER BY occurred_at DESC, id DESC
+        LIMIT :limit
+    """).execution_options(query_name="audit_recent_events")
+
+def recent_events(import_id: Optional[int] = None, event_type: Optional[str] = None, limit: int = 100) -> list:
+    filters = {
+        name: value for name, value in (("import_id", import_id), ("event_type", event_type))
+        if value is not None
+    }
+    with engine.connect() as conn:
+        rows = conn.execute(_recent_events_query(frozenset(filters)), {**filters, "limit": limit}).fetchall()
+    return [
+        {
+            "id": row.id,
+            "occurred_at": row.occurred_at.isoformat(),
+            "event_type": row.event_type,
+            "import_id": row.import_id,
+            "district_id": row.district_id,
+            "actor": row.actor,
+            "actor_name": row.actor_name,
+            "details": json.loads(row.details) if row.details else None
+        }
+        for row in rows
+    ]
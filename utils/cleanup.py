@@ -0,0 +1,339 @@
+# utils/cleanup.py
+"""Rétention des imports TopoManager et réconciliation des fichiers de staging"""
+from sqlalchemy import text
+import logging
+import os
+import time
+
+from database import engine
+from utils.files import UPLOAD_DIR
+from utils.leader import LEADER_LOCK_KEY, cluster_lock
+from utils.snapshots import SNAPSHOT_DIR
+from utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+def _retention_days(status: str, default: str) -> int:
+    return int(os.getenv(f"RETENTION_DAYS_{status.upper()}", default))
+
+# Durée de conservation par statut (jours après traitement ; 0 = conserver)
+RETENTION_POLICIES = {
+    "pending": _retention_days("pending", "0"),
+    "validated": _retention_days("validated", "365"),
+    "rejected": _retention_days("rejected", "180"),
+    "error": _retention_days("error", "30"),
+}
+RETENTION_IDEMPOTENCY_DAYS = int(os.getenv("RETENTION_IDEMPOTENCY_DAYS", "7"))
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "200"))
+CLEANUP_BATCH_PAUSE_MS = int(os.getenv("CLEANUP_BATCH_PAUSE_MS", "100"))
+# Un fichier sans ligne topo_files plus récent que ce délai peut appartenir à un upload en cours
+CLEANUP_ORPHAN_GRACE_HOURS = float(os.getenv("CLEANUP_ORPHAN_GRACE_HOURS", "24"))
+# Lignes topo_files dont le fichier manque : plafond de suppressions par passe,
+# au-delà (ou si UPLOAD_DIR semble démonté) elles sont seulement signalées
+CLEANUP_MAX_MISSING_ROWS = int(os.getenv("CLEANUP_MAX_MISSING_ROWS", "100"))
+CLEANUP_DISK_CHECK_SAMPLE = int(os.getenv("CLEANUP_DISK_CHECK_SAMPLE", "20"))
+# Une seule passe à la fois sur l'ensemble des workers (verrou consultatif)
+CLEANUP_LOCK_KEY = int(os.getenv("CLEANUP_LOCK_KEY", str(LEADER_LOCK_KEY + 1)))
+
+CLEANUP_ROWS = Counter("cleanup_rows_deleted_total", "Lignes supprimées par la rétention", ["table"])
+CLEANUP_FILES = Counter("cleanup_files_deleted_total", "Fichiers supprimés par la rétention", ["reason"])
+CLEANUP_BYTES = Counter("cleanup_bytes_reclaimed_total", "Octets libérés sur UPLOAD_DIR")
+
+IMPORT_TABLES = ["topo_imports", "topo_imports_archive"]
+
+_last_report = None
+
+class CleanupReport:
+    """Bilan d'une passe de rétention"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.rows = {}
+        self.files = {}
+        self.bytes_reclaimed = 0
+        self.missing_files_kept = 0
+        self.errors = 0
+
+    def add_rows(self, table: str, count: int):
+        if count:
+            self.rows[table] = self.rows.get(table, 0) + count
+            CLEANUP_ROWS.inc(count, table=table)
+
+    def add_file(self, reason: str, size: int):
+        self.files[reason] = self.files.get(reason, 0) + 1
+        self.bytes_reclaimed += size
+        CLEANUP_FILES.inc(reason=reason)
+        CLEANUP_BYTES.inc(size)
+
+    def as_dict(self) -> dict:
+        return {
+            "duration_seconds": round(time.time() - self.started_at, 2),
+            "rows_deleted": self.rows,
+            "files_deleted": self.files,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "missing_files_kept": self.missing_files_kept,
+            "errors": self.errors
+        }
+
+def _remove_file(path: str, reason: str, report: CleanupReport):
+    try:
+        size = os.stat(path).st_size
+        os.remove(path)
+        report.add_file(reason, size)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        report.errors += 1
+        logger.warning(f"Suppression impossible {path}: {e}")
+
+def _pause():
+    time.sleep(CLEANUP_BATCH_PAUSE_MS / 1000)
+
+# ============================================
+# RÉTENTION DES IMPORTS (PAR LOTS)
+# ============================================
+
+def _table_exists(conn, table: str) -> bool:
+    return conn.execute(
+        text("SELECT to_regclass(:table) IS NOT NULL").execution_options(query_name="cleanup_table_exists"),
+        {"table": table}
+    ).scalar()
+
+def purge_expired_imports(report: CleanupReport):
+    """Supprimer imports expirés et leurs fichiers, un lot committé à la fois"""
+    with engine.connect() as conn:
+        tables = [t for t in IMPORT_TABLES if _table_exists(conn, t)]
+
+    for table in tables:
+        select_batch = text(f"""
+            SELECT id FROM {table}
+            WHERE status = :status
+            AND COALESCE(processed_at, import_date) < NOW() - make_interval(days => :days)
+            ORDER BY id
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        """).execution_options(query_name="cleanup_select_expired")
+        delete_imports = text(f"DELETE FROM {table} WHERE id = ANY(:ids)").execution_options(
+            query_name="cleanup_delete_imports"
+        )
+
+        for status, days in RETENTION_POLICIES.items():
+            if days <= 0:
+                continue
+            while True:
+                with engine.begin() as conn:
+                    ids = [row.id for row in conn.execute(select_batch, {
+                        "status": status, "days": days, "batch_size": CLEANUP_BATCH_SIZE
+                    })]
+                    if not ids:
+                        break
+                    paths = [row.storage_path for row in conn.execute(text("""
+                        DELETE FROM topo_files WHERE import_id = ANY(:ids) RETURNING storage_path
+                    """).execution_options(query_name="cleanup_delete_files"), {"ids": ids})]
+                    deleted = conn.execute(delete_imports, {"ids": ids}).rowcount
+
+                # Fichiers retirés après le COMMIT : un crash laisse au pire des orphelins,
+                # repris par la réconciliation
+                report.add_rows(table, deleted)
+                report.add_rows("topo_files", len(paths))
+                for path in paths:
+                    _remove_file(path, "expired", report)
+                for directory in {os.path.dirname(p) for p in paths}:
+                    try:
+                        os.rmdir(directory)
+                    except OSError:
+                        pass
+
+                if len(ids) < CLEANUP_BATCH_SIZE:
+                    break
+                _pause()
+
+def purge_idempotency_keys(report: CleanupReport):
+    if RETENTION_IDEMPOTENCY_DAYS <= 0:
+        return
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(text("""
+                DELETE FROM topo_sync_idempotency
+                WHERE id IN (
+                    SELECT id FROM topo_sync_idempotency
+                    WHERE created_at < NOW() - make_interval(days => :days)
+                    LIMIT :batch_size
+                )
+            """).execution_options(query_name="cleanup_idempotency"), {
+                "days": RETENTION_IDEMPOTENCY_DAYS, "batch_size": CLEANUP_BATCH_SIZE
+            }).rowcount
+        report.add_rows("topo_sync_idempotency", deleted)
+        if deleted < CLEANUP_BATCH_SIZE:
+            break
+        _pause()
+
+# ============================================
+# RÉCONCILIATION DISQUE <-> topo_files
+# ============================================
+
+def _walk_files(root: str, exclude=()):
+    """(chemin, nom, mtime) de tous les fichiers sous root (os.scandir, sans stat redondant),
+    hors des répertoires exclude"""
+    excluded = {os.path.realpath(path) for path in exclude}
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.realpath(entry.path) not in excluded:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.name, entry.stat(follow_symlinks=False).st_mtime
+        except FileNotFoundError:
+            continue
+
+def _remove_unreferenced(batch: list, report: CleanupReport):
+    with engine.connect() as conn:
+        known = {row.stored_name for row in conn.execute(text("""
+            SELECT stored_name FROM topo_files WHERE stored_name = ANY(:names)
+        """).execution_options(query_name="cleanup_known_files"), {"names": [name for _, name in batch]})}
+    for path, name in batch:
+        if name not in known:
+            _remove_file(path, "orphan_file", report)
+
+def remove_orphan_files(report: CleanupReport):
+    """Fichiers présents dans UPLOAD_DIR mais absents de topo_files"""
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    cutoff = time.time() - CLEANUP_ORPHAN_GRACE_HOURS * 3600
+    batch = []
+    # Les instantanés hors-ligne n'ont pas de ligne topo_files
+    for path, name, mtime in _walk_files(UPLOAD_DIR, exclude=(SNAPSHOT_DIR,)):
+        if mtime >= cutoff:
+            continue
+        batch.append((path, name))
+        if len(batch) >= CLEANUP_BATCH_SIZE:
+            _remove_unreferenced(batch, report)
+            batch = []
+    if batch:
+        _remove_unreferenced(batch, report)
+
+    # Répertoires d'import vidés
+    with os.scandir(UPLOAD_DIR) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    os.rmdir(entry.path)
+                except OSError:
+                    pass
+
+def upload_dir_available(sample_paths: list) -> bool:
+    """UPLOAD_DIR monté et cohérent : le répertoire existe et, s'il y a des fichiers
+    connus, au moins un de l'échantillon est présent sur disque"""
+    if not os.path.isdir(UPLOAD_DIR):
+        return False
+    return not sample_paths or any(os.path.exists(path) for path in sample_paths)
+
+def _sample_known_paths() -> list:
+    with engine.connect() as conn:
+        return [row.storage_path for row in conn.execute(text("""
+            SELECT storage_path FROM topo_files ORDER BY id DESC LIMIT :sample
+        """).execution_options(query_name="cleanup_sample_files"), {"sample": CLEANUP_DISK_CHECK_SAMPLE})]
+
+def remove_dangling_rows(report: CleanupReport, force: bool = False):
+    """Lignes topo_files sans import (courant ou archivé) ou sans fichier sur disque.
+    Les secondes ne sont supprimées que si UPLOAD_DIR est disponible, et au plus
+    CLEANUP_MAX_MISSING_ROWS par passe (sauf force)"""
+    with engine.connect() as conn:
+        archive_join = ""
+        archive_filter = ""
+        if _table_exists(conn, "topo_imports_archive"):
+            archive_join = "LEFT JOIN topo_imports_archive ta ON ta.id = tf.import_id"
+            archive_filter = "AND ta.id IS NULL"
+
+    missing_budget = None if force else CLEANUP_MAX_MISSING_ROWS
+    if not upload_dir_available(_sample_known_paths()):
+        logger.error(f"UPLOAD_DIR indisponible ou vide ({UPLOAD_DIR}) : aucune ligne retirée pour fichier manquant")
+        missing_budget = 0
+
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(text(f"""
+                SELECT tf.id, tf.storage_path, (ti.id IS NULL {archive_filter}) AS import_missing
+                FROM topo_files tf
+                LEFT JOIN topo_imports ti ON ti.id = tf.import_id
+                {archive_join}
+                WHERE tf.id > :last_id
+                AND tf.uploaded_at < NOW() - make_interval(hours => :hours)
+                ORDER BY tf.id
+                LIMIT :batch_size
+            """).execution_options(query_name="cleanup_scan_files"), {
+                "last_id": last_id, "hours": CLEANUP_ORPHAN_GRACE_HOURS, "batch_size": CLEANUP_BATCH_SIZE
+            }).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        orphan_rows = [row for row in rows if row.import_missing]
+        missing_on_disk = [
+            row for row in rows
+            if not row.import_missing and not os.path.exists(row.storage_path)
+        ]
+        if missing_budget is not None:
+            kept = missing_on_disk[missing_budget:]
+            missing_on_disk = missing_on_disk[:missing_budget]
+            missing_budget -= len(missing_on_disk)
+            report.missing_files_kept += len(kept)
+
+        to_delete = [row.id for row in orphan_rows + missing_on_disk]
+        if to_delete:
+            with engine.begin() as conn:
+                deleted = conn.execute(text("""
+                    DELETE FROM topo_files WHERE id = ANY(:ids)
+                """).execution_options(query_name="cleanup_delete_dangling"), {"ids": to_delete}).rowcount
+            report.add_rows("topo_files", deleted)
+            for row in orphan_rows:
+                _remove_file(row.storage_path, "orphan_row", report)
+            if missing_on_disk:
+                logger.warning(f"{len(missing_on_disk)} fichier(s) de staging absent(s) du disque, lignes retirées")
+
+        if len(rows) < CLEANUP_BATCH_SIZE:
+            break
+        _pause()
+
+    if report.missing_files_kept:
+        logger.warning(
+            f"{report.missing_files_kept} ligne(s) topo_files sans fichier conservée(s) "
+            f"(plafond CLEANUP_MAX_MISSING_ROWS ou UPLOAD_DIR indisponible)"
+        )
+
+# ============================================
+# TÂCHE PLANIFIÉE
+# ============================================
+
+def cleanup_old_imports(force: bool = False) -> dict:
+    """Passe complète de rétention (reprise sans état : chaque lot est committé).
+    force : retirer toutes les lignes dont le fichier manque, sans plafond"""
+    global _last_report
+    with cluster_lock(CLEANUP_LOCK_KEY) as acquired:
+        if not acquired:
+            raise RuntimeError("Nettoyage déjà en cours")
+
+        report = CleanupReport()
+        steps = (
+            (purge_expired_imports, {}),
+            (purge_idempotency_keys, {}),
+            (remove_dangling_rows, {"force": force}),
+            (remove_orphan_files, {}),
+        )
+        for step, options in steps:
+            try:
+                step(report, **options)
+            except Exception as e:
+                report.errors += 1
+                logger.error(f"Nettoyage {step.__name__} en échec: {e}")
+
+    _last_report = report.as_dict()
+    logger.info(f"Nettoyage terminé: {_last_report}")
+    return _last_report
+
+def get_last_report() -> dict:
+    return _last_report
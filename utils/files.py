@@ -1,12 +1,22 @@
 # utils/files.py
 from fastapi import UploadFile
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 import uuid
 import hashlib
-from typing import Dict
+from typing import Dict, List, Optional
+
+from utils.request_stats import timed
 
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads/topo_staging")
+# Fichiers pré-uploadés, pas encore rattachés à un import
+PENDING_UPLOAD_FOLDER = "pending"
+# Threads d'écriture des pièces jointes (hachage + disque), partagés par toutes les requêtes
+FILE_IO_WORKERS = int(os.getenv("FILE_IO_WORKERS", "4"))
+
+_FILE_EXECUTOR = ThreadPoolExecutor(max_workers=FILE_IO_WORKERS, thread_name_prefix="file-io")
 
 def validate_file(file: UploadFile) -> dict:
     """Valide un fichier uploadé"""
@@ -27,31 +37,54 @@ def validate_file(file: UploadFile) -> dict:
         }
     }
 
-async def save_file(file: UploadFile, category: str, import_id: int) -> Dict:
-    """Sauvegarde un fichier uploadé"""
+def _write_file(source, storage_path: str, max_size: int) -> tuple:
+    """Copie par blocs avec hachage au fil de l'eau : (sha256, taille)"""
+    digest = hashlib.sha256()
+    file_size = 0
+    source.seek(0)
+    try:
+        with open(storage_path, "wb") as f:
+            while chunk := source.read(1 << 20):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise ValueError(f"Fichier trop volumineux (> {max_size})")
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        try:
+            os.remove(storage_path)
+        except OSError:
+            pass
+        raise
+    return digest.hexdigest(), file_size
+
+async def save_file(file: UploadFile, category: str, import_id: Optional[int]) -> Dict:
+    """Sauvegarde un fichier uploadé (import_id None : pré-upload)"""
     ext = file.filename.split('.')[-1].lower() if '.' in file.filename else 'bin'
     stored_name = f"{uuid.uuid4().hex}.{ext}"
     
-    storage_dir = os.path.join(UPLOAD_DIR, str(import_id))
+    storage_dir = os.path.join(UPLOAD_DIR, str(import_id) if import_id is not None else PENDING_UPLOAD_FOLDER)
     os.makedirs(storage_dir, exist_ok=True)
     
     storage_path = os.path.join(storage_dir, stored_name)
     
-    content = await file.read()
-    file_size = len(content)
-    
     max_size = MAX_FILE_SIZE_MB * 1024 * 1024
-    if file_size > max_size:
-        raise ValueError(f"Fichier trop volumineux ({file_size} > {max_size})")
-    
-    file_hash = hashlib.sha256(content).hexdigest()
-    
-    with open(storage_path, "wb") as f:
-        f.write(content)
+    loop = asyncio.get_running_loop()
+    file_hash, file_size = await loop.run_in_executor(
+        _FILE_EXECUTOR, _write_file, file.file, storage_path, max_size
+    )
     
     return {
         "stored_name": stored_name,
         "storage_path": storage_path,
         "file_hash": file_hash,
         "file_size": file_size
-    }
\ No newline at end of file
+    }
+
+async def save_files(files: List[UploadFile], category: str, import_id: Optional[int]) -> list:
+    """Sauvegarde concurrente : un résultat ou une exception par fichier, dans l'ordre"""
+    with timed("file"):
+        return await asyncio.gather(
+            *(save_file(file, category, import_id) for file in files),
+            return_exceptions=True
+        )
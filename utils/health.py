@@ -0,0 +1,132 @@
+# utils/health.py
+"""Sondes de vivacité et de disponibilité (probe DB mise en cache)"""
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+import logging
+import os
+import shutil
+import threading
+import time
+
+from database import engine
+from utils.files import UPLOAD_DIR
+from utils.leader import leader
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "10"))
+HEALTH_PROBE_TIMEOUT_MS = int(os.getenv("HEALTH_PROBE_TIMEOUT_MS", "2000"))
+HEALTH_MIN_FREE_DISK_MB = int(os.getenv("HEALTH_MIN_FREE_DISK_MB", "500"))
+
+class DatabaseProbe:
+    """SELECT 1 périodique sur une connexion du pool ; les sondes HTTP lisent le dernier résultat"""
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL_SECONDS):
+        self._interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+        self.ok = False
+        self.latency_ms = None
+        self.error = None
+        self.checked_at = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="health-db-probe")
+                self._thread.start()
+
+    def _probe(self):
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(
+                    text("SET LOCAL statement_timeout = :timeout").execution_options(query_name="health_timeout"),
+                    {"timeout": HEALTH_PROBE_TIMEOUT_MS}
+                )
+                conn.execute(text("SELECT 1").execution_options(query_name="health_probe"))
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e).splitlines()[0]
+
+        # Journaliser les transitions uniquement, pas chaque sonde
+        if ok != self.ok or self.checked_at is None:
+            if ok:
+                logger.info("Sonde PostgreSQL : base disponible")
+            else:
+                logger.error(f"Sonde PostgreSQL : base indisponible ({error})")
+
+        self.ok, self.error = ok, error
+        self.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.checked_at = time.time()
+
+    def _run(self):
+        while True:
+            self._probe()
+            time.sleep(self._interval)
+
+    def status(self) -> dict:
+        age = time.time() - self.checked_at if self.checked_at else None
+        # Résultat trop ancien : le thread de sonde est bloqué
+        fresh = age is not None and age <= 3 * self._interval + HEALTH_PROBE_TIMEOUT_MS / 1000
+        return {
+            "status": "connected" if self.ok and fresh else "disconnected",
+            "latency_ms": self.latency_ms,
+            "checked_seconds_ago": round(age, 1) if age is not None else None,
+            "error": self.error
+        }
+
+db_probe = DatabaseProbe()
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0)
+    }
+
+def disk_stats() -> dict:
+    try:
+        usage = shutil.disk_usage(UPLOAD_DIR)
+    except OSError as e:
+        return {"status": "error", "error": str(e)}
+    free_mb = usage.free // (1024 * 1024)
+    return {
+        "status": "ok" if free_mb >= HEALTH_MIN_FREE_DISK_MB else "low",
+        "free_mb": free_mb,
+        "total_mb": usage.total // (1024 * 1024),
+        "min_free_mb": HEALTH_MIN_FREE_DISK_MB
+    }
+
+def scheduler_stats(scheduler) -> dict:
+    return {
+        "running": bool(scheduler and scheduler.running),
+        "leader": leader.is_leader,
+        "jobs": [
+            {
+                "id": job.id,
+                "name": job.name,
+                "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None
+            }
+            for job in (scheduler.get_jobs() if scheduler else [])
+        ]
+    }
+
+def readiness(scheduler=None) -> tuple:
+    """(prêt, détail) : base joignable et espace disque suffisant"""
+    db_probe.start()
+    database = db_probe.status()
+    disk = disk_stats()
+    ready = database["status"] == "connected" and disk["status"] == "ok"
+    return ready, {
+        "status": "ready" if ready else "not_ready",
+        "database": database,
+        "pool": pool_stats(),
+        "scheduler": scheduler_stats(scheduler),
+        "disk": disk
+    }
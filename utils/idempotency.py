@@ -0,0 +1,53 @@
+# utils/idempotency.py
+"""Idempotence des soumissions de synchronisation (en-tête Idempotency-Key)"""
+from fastapi import UploadFile
+from sqlalchemy import text
+from typing import List, Optional
+import hashlib
+import json
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+def principal_of(current_user: dict) -> str:
+    """Identifiant stable de l'appelant (les ids TopoManager et GeODOC se recouvrent)"""
+    return f"{current_user['source']}:{current_user['id']}"
+
+async def content_hash(sync_data: dict, files: Optional[List[UploadFile]]) -> str:
+    """Empreinte du contenu soumis : données JSON canoniques + SHA-256 de chaque fichier"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sync_data, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+    
+    for file in files or []:
+        file_digest = hashlib.sha256()
+        while chunk := await file.read(1 << 20):
+            file_digest.update(chunk)
+        await file.seek(0)
+        digest.update(f"|{file.filename}:{file_digest.hexdigest()}".encode("utf-8"))
+    
+    return digest.hexdigest()
+
+def get_stored_response(db, principal: str, key: str):
+    return db.execute(text("""
+        SELECT content_hash, import_id, response
+        FROM topo_sync_idempotency
+        WHERE principal = :principal AND idempotency_key = :key
+    """).execution_options(query_name="idempotency_lookup"), {"principal": principal, "key": key}).first()
+
+def store_response(db, principal: str, key: str, digest: str, import_id: int, response_json: str) -> bool:
+    """Enregistrer la réponse ; False si une soumission concurrente a déjà pris la clé"""
+    row = db.execute(text("""
+        INSERT INTO topo_sync_idempotency (
+            principal, idempotency_key, content_hash, import_id, response, created_at
+        ) VALUES (
+            :principal, :key, :hash, :import_id, :response, NOW()
+        )
+        ON CONFLICT (principal, idempotency_key) DO NOTHING
+        RETURNING id
+    """).execution_options(query_name="idempotency_store"), {
+        "principal": principal,
+        "key": key,
+        "hash": digest,
+        "import_id": import_id,
+        "response": response_json
+    }).first()
+    return row is not None
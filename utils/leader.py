@@ -0,0 +1,108 @@
+# utils/leader.py
+"""Élection d'un worker leader (verrou consultatif PostgreSQL) pour les tâches planifiées"""
+from sqlalchemy import text
+from contextlib import contextmanager
+import functools
+import logging
+import os
+import threading
+
+from database import direct_engine
+from utils.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_KEY = int(os.getenv("LEADER_LOCK_KEY", "7345001"))
+LEADER_CHECK_SECONDS = float(os.getenv("LEADER_CHECK_SECONDS", "15"))
+
+SCHEDULER_LEADER = Gauge("scheduler_leader", "1 si ce worker exécute les tâches planifiées")
+
+class LeaderElection:
+    """Détient pg_try_advisory_lock sur une connexion dédiée, hors pool.
+    Le verrou est libéré par PostgreSQL si le worker ou sa connexion disparaît."""
+
+    def __init__(self, key: int = LEADER_LOCK_KEY, bind=direct_engine):
+        self._key = key
+        self._engine = bind
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.is_leader = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="leader-election")
+            self._thread.start()
+
+    def _connect(self):
+        dialect = self._engine.dialect
+        cargs, cparams = dialect.create_connect_args(self._engine.url)
+        conn = dialect.loaded_dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        return conn
+
+    def _set_leader(self, value: bool):
+        if value != self.is_leader:
+            logger.info(f"Worker {os.getpid()} {'devient' if value else 'n’est plus'} leader des tâches planifiées")
+        self.is_leader = value
+        SCHEDULER_LEADER.set(1 if value else 0)
+
+    def _check(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        with self._conn.cursor() as cursor:
+            if self.is_leader:
+                # Le verrou vit avec la session : vérifier qu'elle est toujours là
+                cursor.execute("SELECT 1")
+            else:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (self._key,))
+                self._set_leader(bool(cursor.fetchone()[0]))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._check()
+            except Exception as e:
+                logger.warning(f"Élection du leader: {e}")
+                self._set_leader(False)
+                self._close()
+            self._stop.wait(LEADER_CHECK_SECONDS)
+        self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def stop(self):
+        self._stop.set()
+        self._set_leader(False)
+
+leader = LeaderElection()
+
+def leader_only(func):
+    """Tâche planifiée exécutée uniquement par le worker leader"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not leader.is_leader:
+            logger.debug(f"{func.__name__} ignorée : worker {os.getpid()} non leader")
+            return None
+        return func(*args, **kwargs)
+    return wrapper
+
+@contextmanager
+def cluster_lock(key: int, bind=direct_engine):
+    """Verrou consultatif non bloquant partagé par tous les workers : True si obtenu.
+    Libéré en sortie (ou par PostgreSQL si la connexion disparaît)."""
+    with bind.connect() as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                conn.commit()
@@ -0,0 +1,484 @@
+# utils/metrics.py
+"""Métriques au format texte Prometheus (sans dépendance externe)"""
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from starlette.routing import Match
+import atexit
+import hmac
+import ipaddress
+import threading
+import time
+import re
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Buckets de latence en secondes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, labelvalues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+# ============================================
+# TYPES DE MÉTRIQUES
+# ============================================
+
+class Registry:
+    """Registre des métriques exposées sur /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def add_collector(self, collector):
+        """Callback appelé avant chaque rendu (mise à jour des jauges)"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Collecteur de métriques en échec: {e}")
+
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> list:
+        """État sérialisable (JSON) de toutes les métriques"""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Collecteur de métriques en échec: {e}")
+        return [metric.snapshot() for metric in list(self._metrics)]
+
+REGISTRY = Registry()
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {
+            "name": self.name,
+            "type": self.type_name,
+            "help": self.documentation,
+            "labels": list(self.labelnames),
+            "values": json.loads(json.dumps(values))
+        }
+
+    def merge(self, values: list):
+        """Additionner les valeurs d'un autre worker"""
+        with self._lock:
+            for key, value in values:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+    def _header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+    def merge(self, values: list):
+        with self._lock:
+            for key, other in values:
+                key = tuple(key)
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                state["buckets"] = [a + b for a, b in zip(state["buckets"], other["buckets"])]
+                state["sum"] += other["sum"]
+                state["count"] += other["count"]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = [(key, dict(state, buckets=list(state["buckets"]))) for key, state in self._values.items()]
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["buckets"]):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+# ============================================
+# MÉTRIQUES HTTP
+# ============================================
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Nombre de requêtes HTTP",
+    ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latence des requêtes HTTP par route",
+    ["method", "route"]
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours",
+    ["method", "route"]
+)
+
+def route_template(scope) -> str:
+    """Gabarit de route (ex: /api/v1/staging/{import_id}) pour limiter la cardinalité"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    if router is None:
+        return "unmatched"
+
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched") or "unmatched"
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence, compteur et requêtes en cours par route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method=method, route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+            HTTP_IN_PROGRESS.dec(method=method, route=route)
+
+# ============================================
+# MÉTRIQUES BASE DE DONNÉES
+# ============================================
+
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds", "Durée des requêtes SQL par nom de requête",
+    ["query"]
+)
+DB_STATEMENT_ERRORS = Counter(
+    "db_statement_errors_total", "Requêtes SQL en erreur",
+    ["query"]
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Taille configurée du pool de connexions")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connexions actuellement empruntées au pool")
+DB_POOL_CHECKED_IN = Gauge("db_pool_checked_in", "Connexions disponibles dans le pool")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connexions en dépassement (max_overflow)")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Emprunts de connexions au pool")
+DB_POOL_CONNECTS = Counter("db_pool_connections_created_total", "Connexions physiques ouvertes")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Attente d'une connexion du pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Emprunts abandonnés (pool_timeout atteint)")
+DB_POOL_PINGS = Counter("db_pool_pings_total", "Vérifications de connexions inactives", ["result"])
+
+_TABLE_RE = re.compile(r"\b(?:from|into|update)\s+([a-zA-Z_][\w.]*)", re.IGNORECASE)
+_NAME_COMMENT_RE = re.compile(r"^\s*/\*\s*([\w.:-]+)\s*\*/")
+_query_names = {}
+_QUERY_NAMES_MAX = 2000
+
+def query_name(statement: str, execution_options=None) -> str:
+    """Nom stable d'une requête : option query_name, commentaire /* nom */ ou verbe_table"""
+    if execution_options:
+        name = execution_options.get("query_name")
+        if name:
+            return name
+
+    name = _query_names.get(statement)
+    if name is not None:
+        return name
+
+    match = _NAME_COMMENT_RE.match(statement)
+    if match:
+        name = match.group(1)
+    else:
+        words = statement.split(None, 1)
+        verb = words[0].lower() if words else "unknown"
+        table = _TABLE_RE.search(statement)
+        name = f"{verb}_{table.group(1).lower()}" if table else verb
+
+    if len(_query_names) < _QUERY_NAMES_MAX:
+        _query_names[statement] = name
+    return name
+
+def instrument_engine(engine):
+    """Brancher les événements SQLAlchemy (durée des requêtes, pool)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        name = query_name(statement, context.execution_options)
+        DB_STATEMENT_LATENCY.observe(time.perf_counter() - start, query=name)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        statement = exception_context.statement
+        if statement:
+            context = exception_context.execution_context
+            options = context.execution_options if context is not None else None
+            DB_STATEMENT_ERRORS.inc(query=query_name(statement, options))
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+
+    @event.listens_for(engine.pool, "connect")
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.inc()
+
+    def _collect_pool_stats():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            DB_POOL_SIZE.set(pool.size())
+            DB_POOL_CHECKED_OUT.set(pool.checkedout())
+            DB_POOL_CHECKED_IN.set(pool.checkedin())
+            DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    REGISTRY.add_collector(_collect_pool_stats)
+
+# ============================================
+# AGRÉGATION MULTI-WORKERS
+# ============================================
+
+# Répertoire partagé par les workers (défini par run.py en mode multi-workers)
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# Un fichier non réécrit depuis N intervalles appartient à un worker disparu
+# (arrêté, recyclé, ou dont le pid a été réattribué) : il est supprimé
+METRICS_STALE_FLUSHES = int(os.getenv("METRICS_STALE_FLUSHES", "3"))
+
+_METRIC_TYPES = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+def _worker_file(pid: int) -> str:
+    return os.path.join(METRICS_MULTIPROC_DIR, f"worker_{pid}.json")
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def write_worker_snapshot():
+    """Écrire l'état du worker courant (remplacement atomique)"""
+    path = _worker_file(os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(tmp_path, path)
+
+def start_metrics_writer():
+    """Écriture périodique de l'état du worker (si METRICS_MULTIPROC_DIR est défini)"""
+    if not METRICS_MULTIPROC_DIR:
+        return
+
+    def _loop():
+        while True:
+            try:
+                write_worker_snapshot()
+            except Exception as e:
+                logger.warning(f"Écriture des métriques du worker en échec: {e}")
+            time.sleep(METRICS_FLUSH_SECONDS)
+
+    threading.Thread(target=_loop, daemon=True, name="metrics-writer").start()
+    atexit.register(_remove_worker_snapshot)
+
+def _remove_worker_snapshot():
+    """Arrêt propre du worker : son fichier ne doit pas lui survivre"""
+    try:
+        os.remove(_worker_file(os.getpid()))
+    except OSError:
+        pass
+
+def render_aggregated() -> str:
+    """Somme des métriques des workers actifs.
+    Un worker arrêté sort du total (jauges immédiatement, compteurs et histogrammes
+    à la suppression de son fichier) : Prometheus le traite comme une remise à zéro.
+    Le répertoire est vidé au démarrage du maître (run.py)."""
+    write_worker_snapshot()
+    stale_before = time.time() - METRICS_STALE_FLUSHES * METRICS_FLUSH_SECONDS
+    merged = {}
+    with os.scandir(METRICS_MULTIPROC_DIR) as entries:
+        for entry in entries:
+            match = re.fullmatch(r"worker_(\d+)\.json", entry.name)
+            if not match:
+                continue
+            alive = _pid_alive(int(match.group(1)))
+            try:
+                if entry.stat().st_mtime < stale_before:
+                    os.remove(entry.path)
+                    continue
+                with open(entry.path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            for item in snapshot:
+                if item["type"] == "gauge" and not alive:
+                    continue
+                metric = merged.get(item["name"])
+                if metric is None:
+                    cls = _METRIC_TYPES[item["type"]]
+                    kwargs = {"buckets": item["buckets"]} if item["type"] == "histogram" else {}
+                    metric = merged[item["name"]] = cls(item["name"], item["help"], item["labels"], registry=None, **kwargs)
+                metric.merge(item["values"])
+
+    lines = []
+    for metric in merged.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def render_metrics() -> str:
+    """Exposition texte Prometheus"""
+    if METRICS_MULTIPROC_DIR:
+        return render_aggregated()
+    return REGISTRY.render()
+
+# ============================================
+# ACCÈS À /metrics
+# ============================================
+
+# Adresses ou réseaux (CIDR) autorisés, séparés par des virgules ; derrière un
+# reverse proxy, l'adresse vue est celle du proxy
+METRICS_ALLOWED_IPS = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if item.strip()
+]
+# Jeton Bearer acceptant le scraping depuis toute adresse (vide = désactivé)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+def verify_metrics_access(request: Request):
+    """Dépendance : adresse cliente autorisée ou jeton METRICS_TOKEN"""
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return
+    try:
+        client = ipaddress.ip_address(request.client.host) if request.client else None
+    except ValueError:
+        client = None
+    if client is None or not any(client in network for network in METRICS_ALLOWED_IPS):
+        raise HTTPException(403, "Accès aux métriques refusé")
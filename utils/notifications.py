@@ -0,0 +1,178 @@
+# utils/notifications.py
+"""Événements PostgreSQL LISTEN/NOTIFY et diffusion aux abonnés (SSE)"""
+from sqlalchemy import text
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from database import direct_engine
+
+logger = logging.getLogger(__name__)
+
+IMPORT_EVENTS_CHANNEL = "topo_import_events"
+NOTIFY_LISTEN_TIMEOUT = float(os.getenv("NOTIFY_LISTEN_TIMEOUT", "5"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+
+def notify(db, channel: str, payload: dict):
+    """Émettre une notification (délivrée au COMMIT de la transaction courante)"""
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)").execution_options(query_name="pg_notify"),
+        {"channel": channel, "payload": json.dumps(payload, default=str)}
+    )
+
+def notify_import_event(db, event: str, import_id: int, district_id: int, **extra):
+    notify(db, IMPORT_EVENTS_CHANNEL, {
+        "event": event,
+        "import_id": import_id,
+        "district_id": district_id,
+        **extra
+    })
+
+# ============================================
+# ÉCOUTEUR (une connexion dédiée par worker)
+# ============================================
+
+class PgListener:
+    """Thread LISTEN sur une connexion psycopg2 dédiée, hors pool"""
+
+    def __init__(self, bind=direct_engine):
+        self._engine = bind
+        self._handlers = {}
+        self._connect_hooks = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def subscribe(self, channel: str, handler):
+        """handler(payload: str) est appelé dans le thread d'écoute"""
+        with self._lock:
+            self._handlers.setdefault(channel, []).append(handler)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="pg-listener")
+                self._thread.start()
+
+    def add_connect_hook(self, hook):
+        """hook() est appelé après chaque (re)connexion"""
+        with self._lock:
+            self._connect_hooks.append(hook)
+
+    def _connect(self):
+        dialect = self._engine.dialect
+        cargs, cparams = dialect.create_connect_args(self._engine.url)
+        conn = dialect.loaded_dbapi.connect(*cargs, **cparams)
+        conn.set_session(autocommit=True)
+        with self._lock:
+            channels = set(self._handlers)
+        with conn.cursor() as cursor:
+            for channel in channels:
+                cursor.execute(f'LISTEN "{channel}"')
+        return conn, channels
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn, listening = self._connect()
+                backoff = 1
+                with self._lock:
+                    hooks = list(self._connect_hooks)
+                for hook in hooks:
+                    hook()
+                while not self._stop.is_set():
+                    # Nouveaux canaux enregistrés après la connexion
+                    with self._lock:
+                        channels = set(self._handlers)
+                    for channel in channels - listening:
+                        with conn.cursor() as cursor:
+                            cursor.execute(f'LISTEN "{channel}"')
+                        listening.add(channel)
+
+                    if select.select([conn], [], [], NOTIFY_LISTEN_TIMEOUT) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        self._dispatch(notification.channel, notification.payload)
+            except Exception as e:
+                logger.warning(f"Écoute LISTEN interrompue: {e} (nouvelle tentative dans {backoff}s)")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _dispatch(self, channel: str, payload: str):
+        with self._lock:
+            handlers = list(self._handlers.get(channel, []))
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.warning(f"Handler NOTIFY {channel} en échec: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+listener = PgListener()
+
+# ============================================
+# DIFFUSION AUX ABONNÉS SSE
+# ============================================
+
+class ImportEventBroker:
+    """Répartit les événements d'import vers les files asyncio des abonnés"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._registered = False
+        self.dropped = 0
+
+    def _ensure_listening(self):
+        with self._lock:
+            if not self._registered:
+                listener.subscribe(IMPORT_EVENTS_CHANNEL, self._on_notify)
+                self._registered = True
+
+    def subscribe(self, districts=None) -> tuple:
+        """districts: liste d'ids ou None (tous)"""
+        self._ensure_listening()
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SSE_QUEUE_SIZE),
+                      frozenset(districts) if districts is not None else None)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _on_notify(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        district_id = event.get("district_id")
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue, districts in subscribers:
+            if districts is None or district_id in districts:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+
+    def _offer(self, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client trop lent : on perd l'événement plutôt que de bloquer les autres
+            self.dropped += 1
+
+broker = ImportEventBroker()
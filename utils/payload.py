@@ -0,0 +1,86 @@
+# utils/payload.py
+"""Corps de requête natifs : JSON ou MessagePack, éventuellement compressés (gzip, zstd)"""
+from fastapi import HTTPException, Request
+import io
+import os
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Taille maximale du corps, avant et après décompression
+SYNC_MAX_BODY_MB = float(os.getenv("SYNC_MAX_BODY_MB", "2"))
+MAX_BODY_BYTES = int(SYNC_MAX_BODY_MB * 1024 * 1024)
+
+JSON_MEDIA_TYPES = {"application/json"}
+MSGPACK_MEDIA_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+
+def media_type_of(request: Request) -> str:
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in JSON_MEDIA_TYPES:
+        return "json"
+    if media_type in MSGPACK_MEDIA_TYPES:
+        if msgpack is None:
+            raise HTTPException(415, "MessagePack non disponible sur ce serveur")
+        return "msgpack"
+    raise HTTPException(415, f"Content-Type non supporté: {media_type or 'absent'}")
+
+def _too_large():
+    return HTTPException(413, f"Corps de requête trop volumineux (max {SYNC_MAX_BODY_MB} Mo)")
+
+def _gunzip(raw: bytes) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        body = decompressor.decompress(raw, MAX_BODY_BYTES + 1)
+    except zlib.error:
+        raise HTTPException(400, "Corps gzip invalide")
+    if len(body) > MAX_BODY_BYTES:
+        raise _too_large()
+    if not decompressor.eof:
+        raise HTTPException(400, "Corps gzip tronqué")
+    return body
+
+def _unzstd(raw: bytes) -> bytes:
+    if zstandard is None:
+        raise HTTPException(415, "Compression zstd non disponible sur ce serveur")
+    try:
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(raw)) as reader:
+            body = reader.read(MAX_BODY_BYTES + 1)
+    except zstandard.ZstdError:
+        raise HTTPException(400, "Corps zstd invalide")
+    if len(body) > MAX_BODY_BYTES:
+        raise _too_large()
+    return body
+
+async def read_body(request: Request) -> bytes:
+    """Corps lu par morceaux (plafonné) puis décompressé selon Content-Encoding"""
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise _too_large()
+        chunks.append(chunk)
+    raw = b"".join(chunks)
+
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if encoding in ("", "identity"):
+        return raw
+    if encoding in ("gzip", "x-gzip"):
+        return _gunzip(raw)
+    if encoding == "zstd":
+        return _unzstd(raw)
+    raise HTTPException(415, f"Content-Encoding non supporté: {encoding}")
+
+def unpack_msgpack(body: bytes):
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except Exception:
+        raise HTTPException(422, "Corps MessagePack invalide")
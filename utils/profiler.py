@@ -0,0 +1,170 @@
+# utils/profiler.py
+"""Profilage statistique à la demande (piles repliées compatibles flame graph)"""
+from collections import OrderedDict
+import os
+import sys
+import threading
+import time
+import uuid
+
+PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_DEFAULT_INTERVAL_MS = float(os.getenv("PROFILER_DEFAULT_INTERVAL_MS", "5"))
+PROFILER_REQUEST_ENABLED = os.getenv("PROFILER_REQUEST_ENABLED", "False").lower() == "true"
+PROFILER_MAX_STORED = int(os.getenv("PROFILER_MAX_STORED", "20"))
+PROFILE_HEADER = "x-profile"
+# Mode multi-workers : profils stockés dans le répertoire partagé (consultables
+# depuis n'importe quel worker) ; sinon en mémoire du worker
+PROFILER_STORE_DIR = os.getenv("PROFILER_STORE_DIR") or (
+    os.path.join(os.environ["METRICS_MULTIPROC_DIR"], "profiles") if os.getenv("METRICS_MULTIPROC_DIR") else None
+)
+
+class StackSampler:
+    """Échantillonneur de piles Python basé sur sys._current_frames()"""
+
+    def __init__(self, interval: float = PROFILER_DEFAULT_INTERVAL_MS / 1000, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _label(code) -> str:
+        filename = os.path.basename(code.co_filename)
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+    def _sample_once(self, names: dict):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(f"thread:{names.get(thread_id, thread_id)}")
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self._sample_once(names)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="stack-sampler")
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        """Format 'pile;repliée nombre' (flamegraph.pl, speedscope)"""
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.counts.items())) + "\n"
+
+_profile_lock = threading.Lock()
+
+def profile_worker(seconds: float, interval_ms: float = PROFILER_DEFAULT_INTERVAL_MS) -> str:
+    """Échantillonner tout le worker pendant N secondes (bloquant)"""
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("Un profilage est déjà en cours")
+    try:
+        sampler = StackSampler(interval=interval_ms / 1000).start()
+        time.sleep(min(seconds, PROFILER_MAX_SECONDS))
+        return sampler.stop()
+    finally:
+        _profile_lock.release()
+
+# ============================================
+# PROFILAGE PAR REQUÊTE (en-tête X-Profile)
+# ============================================
+
+_stored_profiles = OrderedDict()
+_stored_lock = threading.Lock()
+
+def maybe_start_request_profile(request, current_user: dict):
+    """Démarrer l'échantillonneur si X-Profile est présent et l'appelant super_admin"""
+    if not PROFILER_REQUEST_ENABLED or not request.headers.get(PROFILE_HEADER):
+        return
+    if current_user.get("source") != "geodoc" or current_user.get("role") != "super_admin":
+        return
+    if getattr(request.state, "profiler", None) is None:
+        request.state.profiler = StackSampler().start()
+
+def _profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILER_STORE_DIR, f"{profile_id}.folded")
+
+def get_stored_profile(profile_id: str):
+    if PROFILER_STORE_DIR is None:
+        with _stored_lock:
+            return _stored_profiles.get(profile_id)
+    try:
+        with open(_profile_path(profile_id), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _store_profile(collapsed: str) -> str:
+    """Identifiant aléatoire : unique quel que soit le worker qui le produit"""
+    profile_id = uuid.uuid4().hex
+    if PROFILER_STORE_DIR is None:
+        with _stored_lock:
+            _stored_profiles[profile_id] = collapsed
+            while len(_stored_profiles) > PROFILER_MAX_STORED:
+                _stored_profiles.popitem(last=False)
+        return profile_id
+
+    os.makedirs(PROFILER_STORE_DIR, exist_ok=True)
+    path = _profile_path(profile_id)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(collapsed)
+    os.replace(f"{path}.tmp", path)
+
+    # Conserver les PROFILER_MAX_STORED plus récents, tous workers confondus
+    with os.scandir(PROFILER_STORE_DIR) as entries:
+        stored = sorted(
+            (entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(".folded")
+        )
+    for _, old_path in stored[:-PROFILER_MAX_STORED]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+    return profile_id
+
+class RequestProfilerMiddleware:
+    """Arrête l'échantillonneur d'une requête profilée et renvoie X-Profile-Id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILER_REQUEST_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        def _stop_sampler():
+            state = scope.get("state") or {}
+            sampler = state.pop("profiler", None)
+            return sampler.stop() if sampler is not None else None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                collapsed = _stop_sampler()
+                if collapsed is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", str(_store_profile(collapsed)).encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _stop_sampler()
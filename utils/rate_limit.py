@@ -0,0 +1,179 @@
+# utils/rate_limit.py
+"""Limitation de débit par utilisateur (token bucket) et plafond de concurrence DB"""
+from fastapi import Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+import asyncio
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from utils.security import verify_api_key_or_jwt
+from utils.metrics import Counter, Gauge
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | sqlite
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    "RATE_LIMIT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "odocc_rate_limit.sqlite")
+)
+# Fréquence de purge des buckets SQLite inactifs
+RATE_LIMIT_SWEEP_SECONDS = float(os.getenv("RATE_LIMIT_SWEEP_SECONDS", "300"))
+
+# Budgets par classe de routes : (requêtes par minute, rafale)
+RATE_LIMITS = {
+    "sync": (int(os.getenv("RATE_LIMIT_SYNC_PER_MINUTE", "60")), int(os.getenv("RATE_LIMIT_SYNC_BURST", "20"))),
+    "search": (int(os.getenv("RATE_LIMIT_SEARCH_PER_MINUTE", "120")), int(os.getenv("RATE_LIMIT_SEARCH_BURST", "30"))),
+    "staging": (int(os.getenv("RATE_LIMIT_STAGING_PER_MINUTE", "240")), int(os.getenv("RATE_LIMIT_STAGING_BURST", "60"))),
+}
+
+# Au-delà de cette inactivité, tout bucket est plein : équivalent à un bucket absent
+BUCKET_IDLE_SECONDS = max(burst / (per_minute / 60.0) for per_minute, burst in RATE_LIMITS.values())
+
+# Plafond de handlers DB simultanés par worker (défaut : pool_size + max_overflow)
+DB_CONCURRENCY_LIMIT = int(os.getenv("DB_CONCURRENCY_LIMIT", "30"))
+DB_CONCURRENCY_WAIT_MS = int(os.getenv("DB_CONCURRENCY_WAIT_MS", "200"))
+
+RATE_LIMITED = Counter("rate_limited_total", "Requêtes refusées (429) par classe de routes", ["route_class"])
+DB_SHED = Counter("db_load_shed_total", "Requêtes refusées (503) faute de créneau DB")
+DB_SLOTS_IN_USE = Gauge("db_handler_slots_in_use", "Handlers DB en cours d'exécution")
+
+# ============================================
+# BACKENDS TOKEN BUCKET
+# ============================================
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int) -> float:
+    return min(burst, tokens + (now - updated) * rate)
+
+class MemoryBucketBackend:
+    """Buckets en mémoire du worker (au-delà de max_keys, les moins récemment utilisés sont évincés)"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        """0 si autorisé, sinon délai (s) avant le prochain jeton"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = _refill(tokens, updated, now, rate, burst)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0 if allowed else (1 - tokens) / rate
+
+class SqliteBucketBackend:
+    """Buckets partagés entre workers d'une même machine (fichier SQLite).
+    acquire() peut attendre le verrou du fichier : à appeler hors boucle d'événements."""
+
+    blocking = True
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self._path = path
+        self._local = threading.local()
+        self._last_sweep = time.time()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*(row or (burst, now)), now, rate, burst)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if now - self._last_sweep >= RATE_LIMIT_SWEEP_SECONDS:
+            self.sweep(now)
+        return 0.0 if allowed else (1 - tokens) / rate
+
+    def sweep(self, now: float = None):
+        """Supprimer les buckets inactifs (pleins) : le fichier ne grossit pas indéfiniment"""
+        now = now or time.time()
+        self._last_sweep = now
+        self._conn().execute("DELETE FROM buckets WHERE updated < ?", (now - BUCKET_IDLE_SECONDS,))
+
+backend = SqliteBucketBackend() if RATE_LIMIT_BACKEND == "sqlite" else MemoryBucketBackend()
+
+# ============================================
+# DÉPENDANCES FASTAPI
+# ============================================
+
+def rate_limit(route_class: str):
+    """Dépendance : budget de requêtes par utilisateur authentifié et classe de routes"""
+    per_minute, burst = RATE_LIMITS[route_class]
+    rate = per_minute / 60.0
+
+    async def dependency(current_user: dict = Depends(verify_api_key_or_jwt)):
+        if not RATE_LIMIT_ENABLED:
+            return
+        key = f"{route_class}:{current_user['source']}:{current_user['id']}"
+        if backend.blocking:
+            retry_after = await run_in_threadpool(backend.acquire, key, rate, burst)
+        else:
+            retry_after = backend.acquire(key, rate, burst)
+        if retry_after > 0:
+            RATE_LIMITED.inc(route_class=route_class)
+            raise HTTPException(
+                429, "Trop de requêtes, réessayez plus tard",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+    return dependency
+
+_db_semaphore = asyncio.Semaphore(DB_CONCURRENCY_LIMIT)
+
+async def acquire_db_slot():
+    """Réserver un créneau DB (503 si aucun ne se libère à temps) ; à rendre
+    par release_db_slot()"""
+    try:
+        await asyncio.wait_for(_db_semaphore.acquire(), timeout=DB_CONCURRENCY_WAIT_MS / 1000)
+    except asyncio.TimeoutError:
+        DB_SHED.inc()
+        raise HTTPException(503, "Serveur saturé, réessayez plus tard", headers={"Retry-After": "1"})
+    DB_SLOTS_IN_USE.inc()
+
+def release_db_slot():
+    DB_SLOTS_IN_USE.dec()
+    _db_semaphore.release()
+
+async def db_slot(current_user: dict = Depends(verify_api_key_or_jwt)):
+    """Dépendance : réserve un créneau DB, sinon 503 avant d'épuiser le pool.
+    Après l'authentification ; à déclarer après rate_limit() pour ne pas occuper
+    de créneau avec une requête refusée."""
+    await acquire_db_slot()
+    try:
+        yield
+    finally:
+        release_db_slot()
@@ -0,0 +1,163 @@
+# utils/ref_cache.py
+"""Cache en mémoire des données de référence (dossiers, districts)"""
+from sqlalchemy import text
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from datetime import date
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import Counter, Gauge
+from utils.notifications import listener
+
+logger = logging.getLogger(__name__)
+
+REF_CACHE_TTL_SECONDS = float(os.getenv("REF_CACHE_TTL_SECONDS", "300"))
+REF_CACHE_MAX_ENTRIES = int(os.getenv("REF_CACHE_MAX_ENTRIES", "10000"))
+
+# Canal alimenté par les triggers de migrations/003_reference_notify.sql
+REF_CHANGES_CHANNEL = "geodoc_ref_changes"
+
+REF_CACHE_REQUESTS = Counter(
+    "ref_cache_requests_total", "Lectures du cache de référence", ["cache", "result"]
+)
+REF_CACHE_INVALIDATIONS = Counter(
+    "ref_cache_invalidations_total", "Entrées invalidées (NOTIFY ou reconnexion)", ["cache"]
+)
+REF_CACHE_ENTRIES = Gauge("ref_cache_entries", "Entrées en cache", ["cache"])
+
+class DossierRef(NamedTuple):
+    id: int
+    id_district: int
+    date_fermeture: Optional[date]
+    nom_dossier: Optional[str]
+    numero_ouverture: Optional[int]
+
+class DistrictRef(NamedTuple):
+    id: int
+    nom_district: Optional[str]
+
+class RefCache:
+    """Cache read-through borné (TTL + LRU), chargement groupé des absents"""
+
+    def __init__(self, name: str, query, factory, ttl: float = REF_CACHE_TTL_SECONDS,
+                 max_entries: int = REF_CACHE_MAX_ENTRIES):
+        self.name = name
+        self._query = query
+        self._factory = factory
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (expire_at, valeur)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, conn, key: int):
+        return self.get_many(conn, [key]).get(key)
+
+    def get_many(self, conn, keys) -> dict:
+        """Valeurs connues pour keys ; les absentes sont lues en une requête"""
+        _ensure_listening()
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            generation = self._generation
+            for key in set(k for k in keys if k is not None):
+                entry = self._entries.get(key)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+
+        if found:
+            REF_CACHE_REQUESTS.inc(len(found), cache=self.name, result="hit")
+        if not missing:
+            return found
+        REF_CACHE_REQUESTS.inc(len(missing), cache=self.name, result="miss")
+
+        rows = conn.execute(self._query, {"ids": missing}).fetchall()
+        loaded = {row.id: self._factory(*row) for row in rows}
+        expire_at = time.monotonic() + self._ttl
+        with self._lock:
+            # Invalidation reçue pendant la lecture : ne pas mémoriser une valeur périmée
+            if generation != self._generation:
+                found.update(loaded)
+                return found
+            for key, value in loaded.items():
+                self._entries[key] = (expire_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            REF_CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+
+        found.update(loaded)
+        return found
+
+    def invalidate(self, key: Optional[int] = None):
+        """Retirer une entrée (ou tout le cache si key est None)"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                count = len(self._entries)
+                self._entries.clear()
+            else:
+                count = 1 if self._entries.pop(key, None) else 0
+            REF_CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+        if count:
+            REF_CACHE_INVALIDATIONS.inc(count, cache=self.name)
+
+dossier_cache = RefCache(
+    "dossiers",
+    text("""
+        SELECT id, id_district, date_fermeture, nom_dossier, numero_ouverture
+        FROM dossiers
+        WHERE id = ANY(:ids)
+    """).execution_options(query_name="ref_cache_dossiers"),
+    DossierRef
+)
+
+district_cache = RefCache(
+    "districts",
+    text("""
+        SELECT id, nom_district
+        FROM districts
+        WHERE id = ANY(:ids)
+    """).execution_options(query_name="ref_cache_districts"),
+    DistrictRef
+)
+
+CACHES = {"dossiers": dossier_cache, "districts": district_cache}
+
+# ============================================
+# INVALIDATION ENTRE WORKERS (LISTEN/NOTIFY)
+# ============================================
+
+_listening = False
+_listening_lock = threading.Lock()
+
+def _on_ref_change(payload: str):
+    try:
+        change = json.loads(payload)
+        cache = CACHES[change["table"]]
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Notification de référence invalide: {payload!r}")
+        return
+    cache.invalidate(change.get("id"))
+
+def _on_listener_connect():
+    # Des notifications ont pu être perdues pendant la coupure
+    for cache in CACHES.values():
+        cache.invalidate()
+
+def _ensure_listening():
+    global _listening
+    if _listening:
+        return
+    with _listening_lock:
+        if not _listening:
+            listener.add_connect_hook(_on_listener_connect)
+            listener.subscribe(REF_CHANGES_CHANNEL, _on_ref_change)
+            _listening = True
@@ -0,0 +1,141 @@
+# utils/request_stats.py
+"""Compteurs par requête HTTP (requêtes SQL, temps DB/auth/fichiers) et en-tête Server-Timing"""
+from sqlalchemy import event
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+
+class RequestStats:
+    """Budget consommé par une requête HTTP"""
+    __slots__ = ("queries", "db_time", "auth_time", "file_time", "file_ops", "started")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.auth_time = 0.0
+        self.file_time = 0.0
+        self.file_ops = 0
+        self.started = time.perf_counter()
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        return ", ".join([
+            f"db;dur={self.db_time * 1000:.2f}",
+            f'db-queries;desc="{self.queries}"',
+            f"auth;dur={self.auth_time * 1000:.2f}",
+            f"file;dur={self.file_time * 1000:.2f}",
+            f'file-ops;desc="{self.file_ops}"',
+            f"total;dur={self.total_time * 1000:.2f}",
+        ])
+
+_current_stats: ContextVar = ContextVar("request_stats", default=None)
+
+def current_stats():
+    """Statistiques de la requête en cours (None hors requête HTTP)"""
+    return _current_stats.get()
+
+@contextmanager
+def timed(category: str):
+    """Chronométrer une section (category: 'auth' ou 'file')"""
+    stats = _current_stats.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            elapsed = time.perf_counter() - start
+            if category == "auth":
+                stats.auth_time += elapsed
+            elif category == "file":
+                stats.file_time += elapsed
+                stats.file_ops += 1
+
+class RequestStatsMiddleware:
+    """Middleware ASGI : expose le budget de la requête en Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                    message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"{scope['method']} {scope['path']} {status_code} "
+                    f"queries={stats.queries} db={stats.db_time * 1000:.1f}ms "
+                    f"auth={stats.auth_time * 1000:.1f}ms file={stats.file_time * 1000:.1f}ms "
+                    f"total={stats.total_time * 1000:.1f}ms"
+                )
+
+def instrument_request_stats(engine):
+    """Compter les requêtes SQL et leur durée pour la requête HTTP courante"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current_stats.get() is not None:
+            context._request_stats_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        start = getattr(context, "_request_stats_start", None)
+        if stats is None or start is None:
+            return
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+# ============================================
+# AIDE POUR LES TESTS DE BUDGET
+# ============================================
+
+_TIMING_RE = re.compile(r'\s*([\w-]+)((?:;[^,]*)?)')
+
+def parse_server_timing(header: str) -> dict:
+    """Décoder un en-tête Server-Timing : {nom: {"dur": float, "desc": str}}"""
+    result = {}
+    for part in (header or "").split(","):
+        match = _TIMING_RE.match(part)
+        if not match:
+            continue
+        entry = {}
+        for param in match.group(2).split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            value = value.strip('"')
+            entry[key] = float(value) if key == "dur" else value
+        result[match.group(1)] = entry
+    return result
+
+def query_count(response) -> int:
+    """Nombre de requêtes SQL d'une réponse (ex: assert query_count(r) <= 3)"""
+    timing = parse_server_timing(response.headers.get("server-timing", ""))
+    return int(timing.get("db-queries", {}).get("desc", 0))
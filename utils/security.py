@@ -1,13 +1,16 @@
 # utils/security.py
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from typing import List, Optional
 import json
 import logging
 import os
 
 from database import get_db
+from utils.request_stats import timed
+from utils.profiler import maybe_start_request_profile
+from services import queries
 import auth
 
 logger = logging.getLogger(__name__)
@@ -22,6 +25,7 @@ security = HTTPBearer(
 )
 
 async def verify_api_key_or_jwt(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> dict:
@@ -29,17 +33,25 @@ async def verify_api_key_or_jwt(
     if not credentials:
         raise HTTPException(401, "Token Bearer requis")
     
+    with timed("auth"):
+        user = _authenticate(credentials, db)
+    
+    if user is None:
+        raise HTTPException(401, "Token invalide")
+    
+    request.state.current_user = user
+    maybe_start_request_profile(request, user)
+    return user
+
+def _authenticate(credentials: HTTPAuthorizationCredentials, db: Session) -> Optional[dict]:
+    """Résoudre le token Bearer (TopoManager puis GeODOC)"""
     token = credentials.credentials
     
     # Essayer TopoManager
     try:
         payload = auth.verify_token(token)
         if payload:
-            user = db.execute(text("""
-                SELECT id, username, email, full_name, role, allowed_districts
-                FROM topo_users
-                WHERE username = :username AND is_active = true
-            """), {"username": payload}).first()
+            user = db.execute(queries.TOPO_USER_ACTIVE, {"username": payload}).first()
             
             if user:
                 allowed_districts = None
@@ -65,11 +77,7 @@ async def verify_api_key_or_jwt(
     try:
         payload = auth.verify_token(token, GEODOC_SECRET)
         if payload:
-            user = db.execute(text("""
-                SELECT id, name, email, role, id_district
-                FROM users
-                WHERE email = :email AND status = true
-            """), {"email": payload}).first()
+            user = db.execute(queries.GEODOC_USER_ACTIVE, {"email": payload}).first()
             
             if user:
                 return {
@@ -83,4 +91,21 @@ async def verify_api_key_or_jwt(
     except Exception as e:
         logger.debug(f"GeODOC auth failed: {e}")
     
-    raise HTTPException(401, "Token invalide")
\ No newline at end of file
+    return None
+
+async def require_super_admin(
+    current_user: dict = Depends(verify_api_key_or_jwt)
+) -> dict:
+    """Réservé aux super_admin GeODOC (endpoints d'administration)"""
+    if current_user["source"] != "geodoc" or current_user["role"] != "super_admin":
+        raise HTTPException(403, "Réservé aux super_admin")
+    return current_user
+
+def allowed_district_ids(current_user: dict) -> Optional[List[int]]:
+    """Districts accessibles à l'utilisateur (None = tous)"""
+    if current_user["source"] == "topomanager":
+        return current_user.get("allowed_districts") or None
+    
+    if current_user["role"] in ["super_admin", "central_user"]:
+        return None
+    return [current_user.get("id_district")]
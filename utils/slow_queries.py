@@ -0,0 +1,218 @@
+# utils/slow_queries.py
+"""Journal des requêtes lentes avec capture du plan EXPLAIN"""
+from sqlalchemy import event
+from collections import deque
+from datetime import datetime, timezone
+import hashlib
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from utils.metrics import Counter, query_name
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "True").lower() == "true"
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+# Mode multi-workers : chaque worker publie son journal dans le répertoire partagé
+# des métriques, la lecture et la remise à zéro portent sur tous les workers
+SHARED_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+_CLEARED_MARKER = "slow_queries_cleared_at"
+
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total", "Requêtes SQL au-dessus du seuil SLOW_QUERY_MS",
+    ["query"]
+)
+
+_entries = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+_entries_lock = threading.Lock()
+_ids = itertools.count(1)
+
+# File des EXPLAIN à exécuter (bornée : on préfère perdre un plan que bloquer)
+_explain_queue = queue.Queue(maxsize=50)
+_explain_thread = None
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES_RE = re.compile(r"\s+")
+
+def fingerprint(statement: str) -> tuple:
+    """Forme normalisée d'une requête (littéraux remplacés) et son empreinte"""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _SPACES_RE.sub(" ", normalized).strip()
+    return normalized, hashlib.sha1(normalized.lower().encode("utf-8")).hexdigest()[:16]
+
+def redact_parameters(parameters):
+    """Ne conserver que le type des paramètres (jamais leur valeur)"""
+    def _redact(value):
+        if value is None:
+            return None
+        if isinstance(value, (list, tuple)):
+            return f"<{type(value).__name__}[{len(value)}]>"
+        return f"<{type(value).__name__}>"
+
+    if isinstance(parameters, dict):
+        return {key: _redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(value) for value in parameters]
+    return None
+
+def _is_explainable(statement: str) -> bool:
+    # EXPLAIN ANALYZE exécute réellement la requête : lectures uniquement
+    head = statement.lstrip().split(None, 1)
+    return bool(head) and head[0].lower() in ("select", "with") and "for update" not in statement.lower()
+
+def _explain_worker(engine):
+    while True:
+        entry, statement, parameters = _explain_queue.get()
+        try:
+            with engine.connect() as conn:
+                conn = conn.execution_options(slow_query_ignore=True, query_name="slow_query_explain")
+                with conn.begin() as trans:
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+                    rows = conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters or {}
+                    ).fetchall()
+                    trans.rollback()
+            entry["plan"] = "\n".join(row[0] for row in rows)
+        except Exception as e:
+            entry["explain_error"] = str(e)
+        finally:
+            _publish()
+            _explain_queue.task_done()
+
+def _record(engine, statement, parameters, executemany, name, duration_ms):
+    global _explain_thread
+
+    normalized, digest = fingerprint(statement)
+    entry = {
+        "id": next(_ids),
+        "worker": os.getpid(),
+        "fingerprint": digest,
+        "query_name": name,
+        "statement": normalized,
+        "parameters": None if executemany else redact_parameters(parameters),
+        "duration_ms": round(duration_ms, 2),
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "plan": None,
+        "explain_error": None
+    }
+
+    with _entries_lock:
+        _entries.append(entry)
+    DB_SLOW_QUERIES.inc(query=name)
+    logger.warning(f"Requête lente ({entry['duration_ms']} ms) {name} [{digest}]")
+
+    if not SLOW_QUERY_EXPLAIN:
+        _publish()
+        return
+    if executemany or not _is_explainable(statement):
+        entry["explain_error"] = "EXPLAIN non capturé (requête d'écriture)"
+        _publish()
+        return
+
+    if _explain_thread is None:
+        _explain_thread = threading.Thread(target=_explain_worker, args=(engine,), daemon=True, name="slow-query-explain")
+        _explain_thread.start()
+    try:
+        _explain_queue.put_nowait((entry, statement, parameters))
+    except queue.Full:
+        entry["explain_error"] = "EXPLAIN ignoré (file saturée)"
+        _publish()
+
+def instrument_slow_queries(engine):
+    """Brancher la détection des requêtes lentes sur l'engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_slow_query_start", None)
+        if start is None or context.execution_options.get("slow_query_ignore"):
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= SLOW_QUERY_MS:
+            name = query_name(statement, context.execution_options)
+            _record(engine, statement, parameters, executemany, name, duration_ms)
+
+# ============================================
+# JOURNAL PARTAGÉ ENTRE WORKERS
+# ============================================
+
+def _worker_file(pid: int) -> str:
+    return os.path.join(SHARED_DIR, f"slow_queries_{pid}.json")
+
+def _cleared_at() -> str:
+    """Horodatage ISO de la dernière remise à zéro ("" si aucune)"""
+    try:
+        with open(os.path.join(SHARED_DIR, _CLEARED_MARKER), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+def _publish():
+    """Écrire le journal du worker courant (remplacement atomique) ; rare par nature"""
+    if not SHARED_DIR:
+        return
+    with _entries_lock:
+        entries = [dict(e) for e in _entries]
+    path = _worker_file(os.getpid())
+    try:
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.warning(f"Publication du journal des requêtes lentes en échec: {e}")
+
+def _all_entries() -> list:
+    """Entrées de tous les workers postérieures à la dernière remise à zéro"""
+    entries = []
+    with os.scandir(SHARED_DIR) as files:
+        for entry in files:
+            if re.fullmatch(r"slow_queries_\d+\.json", entry.name):
+                try:
+                    with open(entry.path, encoding="utf-8") as f:
+                        entries.extend(json.load(f))
+                except (OSError, ValueError):
+                    continue
+    cleared_at = _cleared_at()
+    entries = [e for e in entries if e["captured_at"] > cleared_at]
+    entries.sort(key=lambda e: e["captured_at"])
+    return entries
+
+def get_slow_queries(limit: int = 50, fingerprint_filter: str = None) -> list:
+    """Entrées les plus récentes du journal (tous les workers en mode multi-workers)"""
+    if SHARED_DIR:
+        _publish()
+        entries = _all_entries()
+    else:
+        with _entries_lock:
+            entries = list(_entries)
+    if fingerprint_filter:
+        entries = [e for e in entries if e["fingerprint"] == fingerprint_filter]
+    return [dict(e) for e in reversed(entries)][:limit]
+
+def clear_slow_queries() -> int:
+    """Vider le journal ; en multi-workers, les entrées antérieures sont masquées pour tous"""
+    if SHARED_DIR:
+        count = len(_all_entries())
+        marker = os.path.join(SHARED_DIR, _CLEARED_MARKER)
+        with open(f"{marker}.tmp", "w", encoding="utf-8") as f:
+            f.write(datetime.now(timezone.utc).isoformat())
+        os.replace(f"{marker}.tmp", marker)
+    with _entries_lock:
+        local = len(_entries)
+        _entries.clear()
+    _publish()
+    return count if SHARED_DIR else local
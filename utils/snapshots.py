@@ -0,0 +1,213 @@
+# utils/snapshots.py
+"""Instantanés hors-ligne par district (NDJSON compressé gzip)"""
+from sqlalchemy import text
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from database import engine
+from utils.notifications import listener
+
+logger = logging.getLogger(__name__)
+
+# Hors de UPLOAD_DIR : servi en statique et parcouru par la réconciliation des fichiers
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "1000"))
+# Délai de conservation d'une version remplacée (téléchargements encore en cours)
+SNAPSHOT_STALE_GRACE_SECONDS = int(os.getenv("SNAPSHOT_STALE_GRACE_SECONDS", "900"))
+# Durée de vie d'une version en cache (filet si une notification est perdue)
+SNAPSHOT_VERSION_TTL_SECONDS = float(os.getenv("SNAPSHOT_VERSION_TTL_SECONDS", "300"))
+
+# Canal alimenté par les triggers de migrations/011_snapshot_notify.sql
+SNAPSHOT_CHANGES_CHANNEL = "geodoc_snapshot_changes"
+
+# Signature des données ouvertes du district : change à chaque ajout,
+# fermeture ou modification de dossier, de propriété ou de demandeur
+# (updated_at tenu par trigger, migrations/009_entity_updated_at.sql)
+VERSION_QUERY = text("""
+    SELECT
+        (SELECT COUNT(*) || ':' || COALESCE(MAX(COALESCE(d.updated_at, d.created_at))::text, '')
+         FROM dossiers d
+         WHERE d.id_district = :district AND d.date_fermeture IS NULL) AS dossiers_sig,
+        (SELECT COUNT(*) || ':' || COALESCE(MAX(p.id), 0) || ':'
+                || COALESCE(MAX(COALESCE(p.updated_at, p.created_at))::text, '')
+         FROM proprietes p JOIN dossiers d ON d.id = p.id_dossier
+         WHERE d.id_district = :district AND d.date_fermeture IS NULL) AS proprietes_sig,
+        (SELECT COUNT(*) || ':' || COALESCE(MAX(c.id_demandeur), 0) || ':'
+                || COALESCE(MAX(COALESCE(dm.updated_at, dm.created_at))::text, '')
+         FROM contenir c
+         JOIN dossiers d ON d.id = c.id_dossier
+         JOIN demandeurs dm ON dm.id = c.id_demandeur
+         WHERE d.id_district = :district AND d.date_fermeture IS NULL) AS demandeurs_sig
+""").execution_options(query_name="snapshot_version")
+
+SECTIONS = [
+    ("dossier", text("""
+        SELECT d.id, d.nom_dossier, d.numero_ouverture, d.commune, d.fokontany,
+               d.circonscription, d.type_commune, d.id_district,
+               d.date_descente_debut, d.date_descente_fin
+        FROM dossiers d
+        WHERE d.id_district = :district AND d.date_fermeture IS NULL
+        ORDER BY d.id
+    """).execution_options(query_name="snapshot_dossiers")),
+    ("propriete", text("""
+        SELECT p.id, p.id_dossier, p.lot, p.titre, p.proprietaire, p.contenance,
+               p.nature, p.vocation, p.type_operation, p.situation
+        FROM proprietes p
+        JOIN dossiers d ON d.id = p.id_dossier
+        WHERE d.id_district = :district AND d.date_fermeture IS NULL
+        ORDER BY p.id_dossier, p.id
+    """).execution_options(query_name="snapshot_proprietes")),
+    ("demandeur", text("""
+        SELECT c.id_dossier, dm.id, dm.titre_demandeur, dm.nom_demandeur, dm.prenom_demandeur,
+               dm.date_naissance, dm.cin, dm.domiciliation, dm.telephone
+        FROM contenir c
+        JOIN dossiers d ON d.id = c.id_dossier
+        JOIN demandeurs dm ON dm.id = c.id_demandeur
+        WHERE d.id_district = :district AND d.date_fermeture IS NULL
+        ORDER BY c.id_dossier, dm.id
+    """).execution_options(query_name="snapshot_demandeurs")),
+]
+
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+def _district_lock(district_id: int) -> threading.Lock:
+    with _build_locks_guard:
+        return _build_locks.setdefault(district_id, threading.Lock())
+
+def _default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+# ============================================
+# VERSIONS EN CACHE (INVALIDÉES PAR NOTIFY)
+# ============================================
+
+_versions = {}  # district -> (expire_at, version)
+_versions_lock = threading.Lock()
+_versions_generation = 0
+_listening = False
+
+def _invalidate_versions(district_id: int = None):
+    global _versions_generation
+    with _versions_lock:
+        _versions_generation += 1
+        if district_id is None:
+            _versions.clear()
+        else:
+            _versions.pop(district_id, None)
+
+def _on_snapshot_change(payload: str):
+    try:
+        _invalidate_versions(int(payload))
+    except ValueError:
+        _invalidate_versions()
+
+def _ensure_listening():
+    global _listening
+    if _listening:
+        return
+    with _versions_lock:
+        if not _listening:
+            # Des notifications ont pu être perdues pendant la coupure
+            listener.add_connect_hook(_invalidate_versions)
+            listener.subscribe(SNAPSHOT_CHANGES_CHANNEL, _on_snapshot_change)
+            _listening = True
+
+def snapshot_version(db, district_id: int) -> str:
+    """Version des données du district (sert d'ETag), agrégats recalculés seulement
+    après une modification notifiée ou l'expiration du cache"""
+    _ensure_listening()
+    with _versions_lock:
+        entry = _versions.get(district_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        generation = _versions_generation
+
+    row = db.execute(VERSION_QUERY, {"district": district_id}).first()
+    signature = f"{district_id}|{row.dossiers_sig}|{row.proprietes_sig}|{row.demandeurs_sig}"
+    version = hashlib.sha256(signature.encode("utf-8")).hexdigest()[:32]
+
+    with _versions_lock:
+        # Modification notifiée pendant le calcul : ne pas mémoriser une version périmée
+        if generation == _versions_generation:
+            _versions[district_id] = (time.monotonic() + SNAPSHOT_VERSION_TTL_SECONDS, version)
+    return version
+
+def snapshot_path(district_id: int, version: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"district_{district_id}_{version}.ndjson.gz")
+
+def build_snapshot(district_id: int, version: str) -> str:
+    """Construire (ou réutiliser) l'instantané d'une version donnée"""
+    path = snapshot_path(district_id, version)
+    if os.path.exists(path):
+        return path
+
+    with _district_lock(district_id):
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        counts = {}
+        try:
+            with engine.connect() as conn, gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as out:
+                # Curseur côté serveur : mémoire constante quelle que soit la taille du district
+                conn = conn.execution_options(stream_results=True, yield_per=SNAPSHOT_BATCH_SIZE)
+                out.write(json.dumps({
+                    "type": "meta",
+                    "district_id": district_id,
+                    "version": version,
+                    "generated_at": datetime.now(timezone.utc).isoformat()
+                }) + "\n")
+
+                for record_type, query in SECTIONS:
+                    counts[record_type] = 0
+                    for row in conn.execute(query, {"district": district_id}):
+                        record = dict(row._mapping)
+                        record["type"] = record_type
+                        out.write(json.dumps(record, default=_default, ensure_ascii=False) + "\n")
+                        counts[record_type] += 1
+
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        _remove_stale(district_id, keep=path)
+        logger.info(f"Instantané district {district_id} ({version[:8]}): {counts}")
+        return path
+
+def _remove_stale(district_id: int, keep: str):
+    """Supprimer les versions remplacées depuis plus de SNAPSHOT_STALE_GRACE_SECONDS
+
+    Une version est remplacée à la date de création de la suivante : celles
+    remplacées plus récemment peuvent encore être en cours de téléchargement et
+    sont laissées au prochain nettoyage.
+    """
+    prefix = f"district_{district_id}_"
+    snapshots = []
+    with os.scandir(SNAPSHOT_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith(".ndjson.gz"):
+                try:
+                    snapshots.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+
+    snapshots.sort()
+    cutoff = time.time() - SNAPSHOT_STALE_GRACE_SECONDS
+    for (_, path), (replaced_at, _) in zip(snapshots, snapshots[1:]):
+        if path != keep and replaced_at < cutoff:
+            try:
+                os.remove(path)
+            except OSError:
+                pass